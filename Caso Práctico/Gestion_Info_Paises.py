@@ -1,25 +1,41 @@
+import argparse
+import asyncio
+import contextlib
 import csv
+import json
 import os
+import shlex
+import sys
+
+import almacenamiento
+import busqueda
+import carga_paralela
+import consultas
+import estadisticas
+import importacion
+import instantanea
+import instrumentacion
+import persistencia
+import salida
+import segundo_plano
+import servidor
+from bloqueo import ArchivoBloqueado, BloqueoArchivo
+from carga_csv import (CLAVES_ENCABEZADO, MUESTRAS_RECHAZO, TAMANO_BLOQUE, InformeRechazos, es_entero_positivo,
+                       leer_bloques, validar_archivo, validar_entero_desde_archivo, validar_fila, validar_filas)
+from indices import grupos_continente
+from instrumentacion import filas_resultado, medir
+from ordenamiento import describir_claves, normalizar_claves
+from tabla_paises import CAMPOS_NUMERICOS, TablaPaises
 
 nombre_archivo = "paises.csv" # Nombre del archivo CSV para gestionar los datos
+INFORMAR_CADA = 100_000 # Cada cuántos registros leídos se informa el avance de la carga
+MUESTRAS_CARGA = 5 # Filas rechazadas que se muestran (línea, campo y motivo) al terminar la carga
+ESPERA_BLOQUEO = 5.0 # Segundos que se espera el bloqueo del archivo si lo tiene otro proceso
+# Subcomandos que modifican el archivo: toman el bloqueo antes de cargar (las consultas no lo necesitan)
+COMANDOS_ESCRITURA = ("add", "agregar", "update", "actualizar", "import", "importar", "batch", "lote", "serve", "servir")
 
 # Validaciones
 
-def es_entero_positivo(valor_str):
-    """Verifica si una cadena puede ser un entero positivo (> 0)
- y en caso afirmativo retorna el valor como entero; si no, retorna False para ser evaluado en la llamada."""
-       
-    if not valor_str.isdigit():
-        return False
-    
-    valor = int(valor_str)
-    
-    if valor <= 0:
-        return False
-        
-    return valor
-
-
 def validar_entero(dato):
     """Solicita al usuario y valida un entero positivo."""
 
@@ -39,115 +55,211 @@ def validar_entero(dato):
         return valor
     
 
-def validar_entero_desde_archivo(valor_str):
-    """Función auxiliar para validar las cantidades leídas en el archivo."""
-    valor = es_entero_positivo(valor_str)
-
-    if valor is False:
-            return None
-    else:        
-        return valor
-    
-
 def mostrar_paises(paises):
-    """Función para imprimir una lista de países con formato."""
-    if not paises:
-        print("La lista de países a mostrar está vacía.")
-        return
-            
-    print("-" * 75)
-    print(f"{'Nombre':<20}{'Población':<18}{'Superficie (km²)':<20}{'Continente'}")
-    print("-" * 75)
-    for p in paises:
-        # Formato de números con separador de miles
-        poblacion_str = f"{p['poblacion']:,}".replace(",", ".")
-        superficie_str = f"{p['superficie']:,}".replace(",", ".")
-                
-        print(f"{p['nombre']:<20}{poblacion_str:<18}{superficie_str:<20}{p['continente']}")
-    print("-" * 75)
+    """Función para imprimir una lista de países con formato (por lotes, ver salida.escribir_paises)."""
+    salida.escribir_paises(paises)
 
 
 
 # Generador de la lista_paises desde el archivo.
 
-def cargar_datos_csv(nombre_archivo):
+@medir(filas=filas_resultado)
+def cargar_datos_csv(nombre_archivo, tamano_bloque=TAMANO_BLOQUE, procesos=1, usar_instantanea=True, archivo_rechazos=None):
     
-    """Carga datos de países. Si el archivo no existe, lo crea con el encabezado."""
-    lista_paises = []
-    registros_ignorados = 0
-    claves_encabezado = ['nombre', 'poblacion', 'superficie', 'continente']
-
-    # Si no existe el archivo genera uno con los nombres de encabezado de la lista claves_encabezado.
+    """Carga datos de países. Si el archivo no existe, lo crea con el encabezado.
+    El formato del archivo (CSV, columnar o Parquet) depende de su extensión o de la opción --formato-archivo
+    (ver almacenamiento); lo que sigue es para el CSV, el resto se lee de una vez. Lanza ValueError si no se puede leer.
+    El archivo se lee por bloques (ver carga_csv.leer_bloques) informando el avance en archivos grandes.
+    Con procesos distinto de 1 la lectura se reparte entre varios procesos (ver carga_paralela; 0 = uno por núcleo).
+    Si el CSV no cambió desde la carga anterior se usa su instantánea binaria en lugar de leerlo (ver instantanea).
+    Los registros ignorados se informan con sus primeras líneas; con archivo_rechazos se escriben todos en ese CSV.
+    Los países se guardan en una TablaPaises (almacenamiento columnar) que se usa como una lista de diccionarios,
+    con el seguimiento de cambios activado: la versión 0 es el contenido del archivo (ver TablaPaises.seguir_cambios)."""
+    lista_paises = TablaPaises()
+    formato = almacenamiento.formato_de(nombre_archivo)
+
+    # Si no existe el archivo genera uno vacío (en CSV, con los nombres de encabezado de la lista CLAVES_ENCABEZADO).
 
     if not os.path.exists(nombre_archivo):
         print(f" El archivo '{nombre_archivo}' no fue encontrado. Se genera uno vacío con encabezado.")
-        
-        with open(nombre_archivo, mode='w', encoding='utf-8', newline='') as archivo:
-            escritor_csv = csv.writer(archivo)
-            escritor_csv.writerow(claves_encabezado)
+        formato.escribir(nombre_archivo, lista_paises)
         print(" Archivo creado exitosamente. Continuando la ejecución con lista vacía.")
-        return []
+        lista_paises.seguir_cambios()
+        return lista_paises
 
     # Si existe el archivo realiza la carga
-    
-    with open(nombre_archivo, 'r', encoding='utf-8') as archivo:
-        lector_csv = csv.DictReader(archivo)
-        
-        for fila in lector_csv:
-            falta_clave = False
-            for k in claves_encabezado:
-                if k not in fila:
-                    falta_clave = True
-                    break  
-                # si encuentra una clave que falta actualiza el contador de registros ignorados y salta de fila
-            
-            if falta_clave:
-                registros_ignorados += 1
-                continue
-                
-            nombre = fila.get("nombre", "").strip().title()
-            continente = fila.get("continente", "").strip().title() 
-            poblacion = validar_entero_desde_archivo(fila.get("poblacion", "")) 
-            superficie = validar_entero_desde_archivo(fila.get("superficie", ""))
-            
-            if (poblacion is not None and superficie is not None and 
-                nombre and continente): # Si se validaron correctamente las cantidades de población y superficie y existen nombre y continente
-                                        # se genera el diccionario con el país y se agrega a la lista lista_paises. Si no, se actuliza el contador de ignorados.
-                
-                pais = {
-                    "nombre": nombre,
-                    "poblacion": poblacion,
-                    "superficie": superficie,
-                    "continente": continente
-                }
-                lista_paises.append(pais)
+
+    totales = {"cargados": 0, "ignorados": 0}
+    proximo_aviso = [INFORMAR_CADA]
+
+    def informar_avance(cargados, ignorados): # se llama después de cada bloque con los totales acumulados
+        totales["cargados"] = cargados
+        totales["ignorados"] = ignorados
+        if cargados + ignorados >= proximo_aviso[0]:
+            print(f" ... {cargados} países cargados, {ignorados} registros ignorados hasta el momento.")
+            proximo_aviso[0] += INFORMAR_CADA
+
+    # La instantánea no guarda las filas rechazadas: para el archivo de rechazos hay que leer el CSV.
+    usar_instantanea = usar_instantanea and formato.usa_instantanea and not archivo_rechazos
+    guardada = instantanea.cargar(nombre_archivo) if usar_instantanea else None
+    informe = InformeRechazos(muestras=MUESTRAS_CARGA, archivo_rechazos=archivo_rechazos)
+    if formato is not almacenamiento.CSV:
+        motivos = informe.motivos
+        lista_paises = formato.leer(nombre_archivo, motivos)
+        informar_avance(len(lista_paises), sum(motivos.values()))
+    elif guardada is not None:
+        lista_paises, motivos = guardada
+        informar_avance(len(lista_paises), sum(motivos.values()))
+        print(f" Datos tomados de la instantánea '{instantanea.ruta_instantanea(nombre_archivo)}' (el CSV no cambió).")
+    else:
+        estado = os.stat(nombre_archivo)
+        motivos = informe.motivos # motivo -> cantidad de registros ignorados
+        try:
+            if procesos == 1:
+                for bloque in leer_bloques(nombre_archivo, tamano_bloque, informar_avance, informe=informe):
+                    lista_paises.extend(bloque)
             else:
-                registros_ignorados += 1 
-                    
-        print(f"\n Carga finalizada. {len(lista_paises)} países cargados correctamente.") # se informa la cantidad de países cargados a la lista_paises
-        if registros_ignorados > 0:
-            print(f"Advertencia: {registros_ignorados} registros ignorados (formato/datos incompletos).") # y se informan los registros ignorados si los hay.
-            
+                lista_paises = carga_paralela.cargar_en_paralelo(nombre_archivo, procesos, informar_avance, informe=informe)
+        finally:
+            informe.cerrar()
+        if usar_instantanea:
+            instantanea.guardar(nombre_archivo, lista_paises, motivos, estado) # antes de aplicar el registro de cambios
+
+    print(f"\n Carga finalizada. {len(lista_paises)} países cargados correctamente.") # se informa la cantidad de países cargados a la lista_paises
+    if totales["ignorados"] > 0:
+        print(f"Advertencia: {totales['ignorados']} registros ignorados (formato/datos incompletos).") # y se informan los registros ignorados si los hay.
+        for motivo, cantidad in sorted(motivos.items(), key=lambda item: -item[1]):
+            print(f"   - {motivo}: {cantidad}")
+        mostrar_muestras_rechazo(informe)
+    if archivo_rechazos and formato is almacenamiento.CSV:
+        print(f" Registros ignorados guardados en '{archivo_rechazos}'.")
+
+    # Cambios registrados desde la última compactación (altas y modificaciones no volcadas al CSV):
+    # cuentan como cambios sin guardar, así el próximo guardado los lleva al archivo.
+    lista_paises.seguir_cambios()
+    aplicados = persistencia.reproducir_registro(nombre_archivo, lista_paises)
+    if aplicados:
+        print(f" Se aplicaron {aplicados} cambio(s) pendiente(s) del registro '{persistencia.ruta_registro(nombre_archivo)}'.")
+
+    lista_paises.calcular_derivadas() # densidad: una vez para toda la tabla, no en cada consulta
     return lista_paises
 
 
+def mostrar_muestras_rechazo(informe):
+    """Muestra las primeras filas rechazadas del informe (ver carga_csv.InformeRechazos)."""
+    for muestra in informe.muestras:
+        linea = f"línea {muestra['linea']}" if muestra['linea'] is not None else "fila"
+        print(f"     {linea}: {muestra['errores']}")
+    if informe.total > len(informe.muestras) > 0:
+        print(f"     ... y {informe.total - len(informe.muestras)} más (ver el subcomando validate o la opción --rechazos).")
+
+
+@medir()
+def escribir_datos_csv(nombre_archivo, lista_paises, registro_hasta=None):
+    """Escribe la lista completa de países en el archivo (en su formato, ver almacenamiento), sobrescribiendo
+    el contenido de forma atómica (archivo temporal + fsync + rename) y descartando el registro de cambios ya
+    incluido (ver persistencia.compactar). No muestra mensajes: la usa el hilo escritor (ver segundo_plano)."""
+    formato = almacenamiento.formato_de(nombre_archivo)
+    persistencia.compactar(nombre_archivo, lambda nombre: formato.escribir(nombre, lista_paises), registro_hasta)
+
+    # El CSV cambió: si se venía usando una instantánea se regenera con la tabla, que ahora coincide con el archivo.
+    if (formato.usa_instantanea and isinstance(lista_paises, TablaPaises)
+            and os.path.exists(instantanea.ruta_instantanea(nombre_archivo))):
+        instantanea.guardar(nombre_archivo, lista_paises)
+
+
+# Hilo que reescribe el CSV sin bloquear el menú (la función se busca por nombre en cada escritura).
+escritor_csv = segundo_plano.EscritorSegundoPlano(
+    lambda nombre, copia, registro_hasta: escribir_datos_csv(nombre, copia, registro_hasta))
+
+
+def mostrar_error_guardado(nombre_archivo, error, archivo=None):
+    """Informa un error al guardar (también uno del hilo escritor, que se lanza en el pedido siguiente)."""
+    print(f"\n Error al guardar '{nombre_archivo}': {error}. Los cambios siguen en memoria; "
+          "se volverá a intentar al guardar o al salir.", file=archivo)
+
+
+def programar_guardado(nombre_archivo, lista_paises):
+    """Pide la reescritura del CSV en segundo plano y vuelve enseguida (los pedidos seguidos se combinan)."""
+    escritor_csv.programar(nombre_archivo, lista_paises)
+    print(f" El archivo '{nombre_archivo}' se reescribe en segundo plano.")
+
+
+@medir()
 def guardar_datos_csv(nombre_archivo, lista_paises):
-    """Guarda la lista completa de países en el archivo CSV, sobrescribiendo el contenido."""
+    """Guarda los países en el archivo y espera a que termine la escritura (junto con cualquier
+    guardado en segundo plano que estuviera pendiente). Solo escribe lo necesario: nada si no
+    hubo cambios desde el último guardado, las filas nuevas al final del archivo si desde
+    entonces solo se agregaron países (y el formato lo permite) y, si no, el archivo completo.
+    Retorna False si no había nada que guardar."""
+    escritor_csv.esperar() # un guardado en curso puede dejar la tabla ya guardada
+    if not persistencia.cambios_sin_guardar(nombre_archivo, lista_paises):
+        print(f"\n No hay cambios para guardar: '{nombre_archivo}' ya está al día.")
+        return False
 
-    claves_encabezado = ['nombre', 'poblacion', 'superficie', 'continente']
-    
-    with open(nombre_archivo, 'w', encoding='utf-8', newline='') as archivo:
-        escritor_csv = csv.DictWriter(archivo, fieldnames=claves_encabezado)
-        
-        escritor_csv.writeheader()
-        escritor_csv.writerows(lista_paises)
-    
+    if guardar_filas_agregadas(nombre_archivo, lista_paises):
+        return True
+
+    escritor_csv.programar(nombre_archivo, lista_paises)
+    escritor_csv.esperar()
     print(f"\n Datos guardados exitosamente en '{nombre_archivo}'.")
+    return True
+
+
+def guardar_filas_agregadas(nombre_archivo, lista_paises):
+    """Si desde el último guardado solo se agregaron países, los agrega al final del archivo
+    (ver almacenamiento.FormatoCSV.anexar) y descarta el registro de cambios. Retorna False
+    si hay que reescribir el archivo completo."""
+    anexar = getattr(almacenamiento.formato_de(nombre_archivo), 'anexar', None)
+    if anexar is None or not isinstance(lista_paises, TablaPaises):
+        return False
+    nuevas = lista_paises.filas_agregadas_desde(lista_paises.version_guardada)
+    if nuevas is None:
+        return False
+
+    version = lista_paises.version
+    registro_hasta = persistencia.tamano_registro(nombre_archivo)
+    if not anexar(nombre_archivo, map(lista_paises.registro, nuevas)):
+        return False
+    persistencia.descartar_registro(nombre_archivo, registro_hasta)
+    lista_paises.marcar_guardada(version)
+    if os.path.exists(instantanea.ruta_instantanea(nombre_archivo)): # el CSV cambió: se regenera, como al compactar
+        instantanea.guardar(nombre_archivo, lista_paises)
+    if nuevas:
+        print(f"\n Se agregaron {len(nuevas)} país(es) al final de '{nombre_archivo}' (sin reescribirlo).")
+    else:
+        print(f"\n '{nombre_archivo}' ya incluía los cambios del registro: se descartó el registro.")
+    return True
+
+
+def registrar_cambio(nombre_archivo, lista_paises, cambio):
+    """Agrega el cambio al registro (sin reescribir el CSV). Si el registro supera el umbral, compacta."""
+    registrar_cambios(nombre_archivo, lista_paises, [cambio])
+
+
+def registrar_cambios(nombre_archivo, lista_paises, cambios):
+    """Persiste un lote de cambios con una sola escritura: un lote grande (importación) reescribe
+    directamente el CSV; uno chico se agrega al registro y se compacta si supera el umbral."""
+    if not cambios:
+        return
+    if len(cambios) >= importacion.LOTE_GRANDE:
+        programar_guardado(nombre_archivo, lista_paises)
+        return
+
+    tamano = persistencia.anexar_cambios(nombre_archivo, cambios)
+
+    if tamano > persistencia.UMBRAL_COMPACTACION and not escritor_csv.pendiente(): # si ya hay uno en curso, alcanza
+        print(" El registro de cambios superó el umbral de compactación.")
+        programar_guardado(nombre_archivo, lista_paises)
+    elif len(cambios) == 1:
+        print(f" Cambio guardado en '{persistencia.ruta_registro(nombre_archivo)}'.")
+    else:
+        print(f" {len(cambios)} cambios guardados en '{persistencia.ruta_registro(nombre_archivo)}'.")
 
 
 
 def agregar_pais(lista_paises, nombre_archivo):
-    """Solicita datos de un nuevo país, valida y lo agrega, y luego guarda en el archivo."""
+    """Solicita datos de un nuevo país, valida y lo agrega, y luego registra el alta en el archivo."""
     print("\n AGREGAR NUEVO PAIS ")
         
     while True:
@@ -156,13 +268,7 @@ def agregar_pais(lista_paises, nombre_archivo):
             print("** El nombre del país no puede estar vacío. **")
             continue
         
-        existe = False
-        for pais in lista_paises:
-            if pais['nombre'] == nombre:
-                existe = True
-                break
-        
-        if existe: 
+        if lista_paises.indice_de(nombre) is not None: # búsqueda O(1) en el índice de nombres (sin acentos ni mayúsculas)
             print(f"** El país '{nombre}' ya existe en la lista. **")
             continue
         break
@@ -177,42 +283,100 @@ def agregar_pais(lista_paises, nombre_archivo):
             continue
         break
         
-    nuevo_pais = {
-        "nombre": nombre,
-        "poblacion": poblacion,
-        "superficie": superficie,
-        "continente": continente
-    }
+    agregar_registro(lista_paises, nombre_archivo, nombre, poblacion, superficie, continente)
+
+
+def agregar_registro(lista_paises, nombre_archivo, nombre, poblacion, superficie, continente):
+    """Agrega un país con datos ya ingresados (sin preguntar al usuario) y registra el alta en el archivo.
+    Lanza ValueError si algún dato no es válido o el país ya existe."""
+    nuevo_pais = validar_fila(str(nombre), str(poblacion), str(superficie), str(continente)) # mismas reglas que la carga del CSV
+    if nuevo_pais is None:
+        raise ValueError("Datos inválidos: nombre y continente no pueden estar vacíos; población y superficie deben ser enteros positivos.")
+    if lista_paises.indice_de(nuevo_pais["nombre"]) is not None:
+        raise ValueError(f"El país '{nuevo_pais['nombre']}' ya existe en la lista.")
         
     lista_paises.append(nuevo_pais)
-    print(f"\n País '{nombre}' agregado correctamente.")
+    print(f"\n País '{nuevo_pais['nombre']}' agregado correctamente.")
     
-    guardar_datos_csv(nombre_archivo, lista_paises)
+    registrar_cambio(nombre_archivo, lista_paises, persistencia.cambio_alta(nuevo_pais))
+    return nuevo_pais
+
+
+
+def importar_archivo(lista_paises, nombre_archivo, origen, politica='omitir', formato=None):
+    """Importa los países de otro archivo CSV o JSON Lines (ver importacion) y persiste el lote
+    con una sola escritura. Retorna el informe de la importación."""
+    cambios, informe = importacion.importar(lista_paises, origen, politica, formato)
+    registrar_cambios(nombre_archivo, lista_paises, cambios)
+    return informe
+
+
+def mostrar_informe_importacion(informe):
+    """Muestra el resultado de una importación: cantidades, velocidad y motivos de rechazo."""
+    print(f"\n Filas leídas: {informe['leidos']} ({formato_numero(informe['filas_por_segundo'])} filas/s, "
+          f"{informe['segundos']:.2f} s)")
+    print(f" Países agregados: {informe['agregados']}")
+    print(f" Países actualizados: {informe['actualizados']}")
+    if informe['sin_cambios']:
+        print(f" Países sin cambios: {informe['sin_cambios']}")
+    if informe['omitidos']:
+        print(f" Filas omitidas (país existente): {informe['omitidos']}")
+    if informe['rechazados']:
+        print(f" Filas rechazadas: {informe['rechazados']}")
+        for motivo, cantidad in sorted(informe['motivos'].items(), key=lambda item: -item[1]):
+            print(f"   - {motivo}: {cantidad}")
+        for numero, motivo in informe['rechazos']:
+            print(f"   línea {numero}: {motivo}")
+        if informe['rechazados'] > len(informe['rechazos']):
+            print(f"   ... y {informe['rechazados'] - len(informe['rechazos'])} más.")
+
+
+def importar_paises(lista_paises, nombre_archivo):
+    """Solicita un archivo CSV o JSON Lines y la política de duplicados, e importa sus países."""
+    print("\n IMPORTAR PAISES DESDE ARCHIVO ")
+    origen = input(" Ruta del archivo a importar (.csv o .jsonl): ").strip()
+    if not origen:
+        print(" La ruta no puede estar vacía.")
+        return
+    if not os.path.exists(origen):
+        print(f" El archivo '{origen}' no fue encontrado.")
+        return
 
+    print(" Si un país ya existe: 1. Omitir la fila / 2. Sobrescribir sus datos / 3. Combinar (solo campos con valor)")
+    while True:
+        opcion = input(" Seleccione una opción: ").strip()
+        if opcion in ('1', '2', '3'):
+            break
+        print(" Opción inválida. Ingrese 1, 2 o 3.")
+    politica = importacion.POLITICAS[int(opcion) - 1]
+
+    try:
+        informe = importar_archivo(lista_paises, nombre_archivo, origen, politica)
+    except (OSError, UnicodeDecodeError, csv.Error) as error:
+        print(f" No se pudo leer el archivo: {error}")
+        return
+    mostrar_informe_importacion(informe)
 
 
 def actualizar_datos(lista_paises, nombre_archivo):
-    """Actualiza Población y Superficie de un país existente y luego guarda la modificación en el archivo."""
+    """Actualiza Población y Superficie de un país existente y luego registra la modificación en el archivo."""
     if not lista_paises:
         print("** No hay datos para actualizar. **")
         return
     print("\n ACTUALIZAR DATOS ")
     nombre_buscado = input(" Ingrese el nombre EXACTO del país: ").strip().title()
         
-    indice_pais = -1 # si este valor no cambia significa que no se encontro el nombre de pais en la lista.
-
-    for i, pais in enumerate(lista_paises):
-        if pais["nombre"].upper() == nombre_buscado.upper():
-            indice_pais = i # se encontró el nombre de país en la lista.
-            break 
+    indice_pais = lista_paises.indice_de(nombre_buscado) # None significa que no se encontro el nombre de pais en la lista.
                 
-    if indice_pais == -1:
+    if indice_pais is None:
         print(f"** El país '{nombre_buscado}' no fue encontrado. **")
         return
             
+    nombre_buscado = lista_paises[indice_pais]['nombre'] # se muestra el nombre tal como está guardado
     print(f"\n País encontrado: **{nombre_buscado}**.")
     
-    cambio_realizado = False  # se fija este valor por defecto, si se actualizan población o superficie se cambia a True
+    nueva_poblacion = None  # si se ingresan valores válidos de población o superficie se guardan aquí
+    nueva_superficie = None
         
     # Actualizar Población
     nueva_poblacion_str = input("Nueva Población (Enter para mantener): ").strip()
@@ -221,9 +385,7 @@ def actualizar_datos(lista_paises, nombre_archivo):
         nueva_poblacion = validar_entero_desde_archivo(nueva_poblacion_str)
         
         if nueva_poblacion:
-            lista_paises[indice_pais]['poblacion'] = nueva_poblacion
             print(" Población actualizada.")
-            cambio_realizado = True
         else:
             print(" Valor de población no válido. Se mantuvo el valor anterior.")
             
@@ -234,23 +396,47 @@ def actualizar_datos(lista_paises, nombre_archivo):
         nueva_superficie = validar_entero_desde_archivo(nueva_superficie_str)
         
         if nueva_superficie:
-            lista_paises[indice_pais]['superficie'] = nueva_superficie
             print(" Superficie actualizada.")
-            cambio_realizado = True
         else:
             print(" Valor de superficie no válido. Se mantuvo el valor anterior.")
             
     print(f"\n **Actualización de datos para {nombre_buscado} completada.**")
 
-    if cambio_realizado: 
-        guardar_datos_csv(nombre_archivo, lista_paises)
+    if nueva_poblacion or nueva_superficie: 
+        actualizar_registro(lista_paises, nombre_archivo, nombre_buscado, nueva_poblacion, nueva_superficie)
     else:
         print(" No se detectaron cambios válidos para guardar.")
 
 
+def actualizar_registro(lista_paises, nombre_archivo, nombre, poblacion=None, superficie=None):
+    """Actualiza población y/o superficie de un país (sin preguntar al usuario) y registra la modificación.
+    Retorna el diccionario de campos modificados. Lanza ValueError si el país no existe o un valor no es válido."""
+    indice_pais = lista_paises.indice_de(nombre)
+    if indice_pais is None:
+        raise ValueError(f"El país '{nombre}' no fue encontrado.")
+
+    campos_modificados = {}
+    for campo, valor in (('poblacion', poblacion), ('superficie', superficie)):
+        if valor is None:
+            continue
+        valor = validar_entero_desde_archivo(str(valor))
+        if valor is None:
+            raise ValueError(f"Valor de {campo} no válido: debe ser un entero positivo.")
+        campos_modificados[campo] = valor
+
+    for campo, valor in campos_modificados.items():
+        lista_paises[indice_pais][campo] = valor
+
+    if campos_modificados:
+        cambio = persistencia.cambio_modificacion(lista_paises[indice_pais]['nombre'], campos_modificados)
+        registrar_cambio(nombre_archivo, lista_paises, cambio)
+    return campos_modificados
+
+
 
 def buscar_pais(lista_paises):
-    """Busca países por nombre (coincidencia parcial o exacta)."""
+    """Busca países por nombre (coincidencia parcial o exacta, sin distinguir acentos ni mayúsculas).
+    Los resultados se muestran por relevancia; si no hay coincidencias se sugieren nombres con un error de tipeo."""
     if not lista_paises:
         print("** La lista de países está vacía. **")
         return []
@@ -260,50 +446,30 @@ def buscar_pais(lista_paises):
         print(" ** La cadena a buscar no puede estar vacía. **")
         return []
             
-    resultados = []
-        
-    for pais in lista_paises:
-        if nombre_buscado in pais["nombre"].lower():
-            resultados.append(pais)
+    resultados = busqueda.buscar_paises(lista_paises, nombre_buscado) # índice de trigramas, se arma en la primera búsqueda
             
     if resultados:
         print(f"\n Se encontraron {len(resultados)} país(es) que coinciden:")
         mostrar_paises(resultados)
     else:
         print(f"\n Búsqueda sin resultados para '{nombre_buscado.title()}'.")
+        resultados = busqueda.buscar_paises(lista_paises, nombre_buscado, tolerar_errores=True)
+        if resultados:
+            print(" Quizás quiso decir:")
+            mostrar_paises(resultados)
         
     return resultados
 
 
 # Filtros
 
-def ordenar_lista(lista): # Función auxiliar para filtrar
-    """Ordena una lista  de elementos (cadenas/números)."""
-    n = len(lista)
-
-    for i in range(1, n):
-        valor_actual = lista[i]
-        j = i - 1
-        # Mueve los elementos de lista[0..i-1] que son mayores que valor_actual
-        # una posición adelante de su posición actual
-        while j >= 0 and lista[j] > valor_actual:
-            lista[j + 1] = lista[j]
-            j -= 1
-        lista[j + 1] = valor_actual
-
-    return lista
-
-
 def filtrar_por_continente(lista_paises):
     """Filtra la lista de países por el continente especificado."""
-    continentes_set = set()
-    for pais in lista_paises:
-        continentes_set.add(pais['continente']) # se usa un set para obtener luego una lista de nombres únicos.
-    
+    if isinstance(lista_paises, TablaPaises):
+        continentes_disponibles = grupos_continente(lista_paises).continentes() # sin recorrer los países
+    else:
+        continentes_disponibles = sorted({pais['continente'] for pais in lista_paises}) # set: nombres únicos
 
-    continentes_disponibles = list(continentes_set)
-    ordenar_lista(continentes_disponibles) # Uso de la función auxiliar
-    
 
     print(f"Continentes disponibles: {', '.join(continentes_disponibles)}") # muestra por pantalla una lista de los continentes posibles.
     continente_buscado = input(" Ingrese el Continente a filtrar ( Debe conincidir con alguno de los Continentes disponibles ): ").strip().title()
@@ -312,10 +478,7 @@ def filtrar_por_continente(lista_paises):
         print(" El nombre del continente no puede estar vacío.")
         return
         
-    resultados_filtro = []
-    for pais in lista_paises:
-        if pais["continente"] == continente_buscado:
-            resultados_filtro.append(pais)
+    resultados_filtro = consultas.consulta(lista_paises).donde(continente=continente_buscado).resultado()
     
     if resultados_filtro:
         print(f"\n Se encontraron {len(resultados_filtro)} país(es) en '{continente_buscado}':")
@@ -337,10 +500,7 @@ def filtrar_por_rango_poblacion(lista_paises):
         else:
             break
                 
-    resultados_filtro = []
-    for pais in lista_paises:
-        if min_poblacion <= pais["poblacion"] <= max_poblacion:
-            resultados_filtro.append(pais)
+    resultados_filtro = consultas.consulta(lista_paises).donde(poblacion=(min_poblacion, max_poblacion)).resultado()
     
     if resultados_filtro:
         print(f"\n Se encontraron {len(resultados_filtro)} país(es) en el rango:")
@@ -360,10 +520,7 @@ def filtrar_por_rango_superficie(lista_paises):
         else:
             break
                 
-    resultados_filtro = []
-    for pais in lista_paises:
-        if min_superficie <= pais["superficie"] <= max_superficie:
-            resultados_filtro.append(pais)
+    resultados_filtro = consultas.consulta(lista_paises).donde(superficie=(min_superficie, max_superficie)).resultado()
     
     if resultados_filtro:
         print(f"\n Se encontraron {len(resultados_filtro)} país(es) en el rango:")
@@ -372,6 +529,58 @@ def filtrar_por_rango_superficie(lista_paises):
         print("\n** Búsqueda sin resultados para el rango de superficie especificado. **")
 
 
+def validar_entero_opcional(dato):
+    """Solicita un entero positivo que puede omitirse con Enter (retorna None en ese caso)."""
+    while True:
+        valor_str = input(f" {dato} (Enter para omitir): ").strip()
+        if not valor_str:
+            return None
+        valor = es_entero_positivo(valor_str)
+        if valor is False:
+            print(" Debe ingresar un número entero positivo.")
+            continue
+        return valor
+
+
+def filtrar_combinado(lista_paises):
+    """Filtra por continente, rango de población y rango de superficie a la vez (los criterios vacíos se omiten),
+    y opcionalmente ordena y limita el resultado: todo se resuelve en una sola consulta (ver consultas.Consulta)."""
+    print(" FILTRO COMBINADO ")
+    continente = input(" Continente (Enter para omitir): ").strip().title() or None
+
+    rangos = {}
+    for clave, titulo in (('poblacion', 'Población'), ('superficie', 'Superficie (km²)'),
+                          ('densidad', 'Densidad (hab./km²)')):
+        minimo = validar_entero_opcional(f"{titulo} Mínima")
+        maximo = validar_entero_opcional(f"{titulo} Máxima")
+        if minimo is not None and maximo is not None and maximo < minimo:
+            print(" El valor Máximo no puede ser menor que el Mínimo. Se omite este criterio.")
+            continue
+        if minimo is not None or maximo is not None:
+            rangos[clave] = (minimo, maximo)
+
+    consulta = consultas.consulta(lista_paises).donde(continente, **rangos)
+
+    while True:
+        claves = input(" Ordenar por (ej: -superficie o continente,-poblacion; Enter para no ordenar): ").strip()
+        if not claves:
+            break
+        try:
+            consulta.ordenar_por(claves)
+            break
+        except ValueError as error:
+            print(f" {error}. Claves válidas: nombre, poblacion, superficie, densidad, continente.")
+    consulta.limite(validar_entero_opcional("Cantidad máxima de países a mostrar"))
+
+    resultados_filtro = consulta.resultado()
+
+    if resultados_filtro:
+        print(f"\n Se encontraron {len(resultados_filtro)} país(es) que cumplen todos los criterios:")
+        mostrar_paises(resultados_filtro)
+    else:
+        print("\n** Búsqueda sin resultados para los criterios especificados. **")
+
+
 def menu_filtros(lista_paises):
     """Submenú para manejar las opciones de filtrado, usando match/case."""
     if not lista_paises: 
@@ -383,7 +592,8 @@ def menu_filtros(lista_paises):
         print("1. Filtrar por Continente")
         print("2. Filtrar por Rango de Población")
         print("3. Filtrar por Rango de Superficie")
-        print("4. Volver al Menú Principal")
+        print("4. Filtro Combinado (Continente + Población + Superficie + Densidad)")
+        print("5. Volver al Menú Principal")
         opcion = input(" Seleccione una opción: ").strip()
                 
         match opcion:
@@ -394,6 +604,8 @@ def menu_filtros(lista_paises):
             case '3':
                 filtrar_por_rango_superficie(lista_paises)
             case '4':
+                filtrar_combinado(lista_paises)
+            case '5':
                 break
             case _:
                 print(" Opción inválida. Intente nuevamente")
@@ -401,46 +613,28 @@ def menu_filtros(lista_paises):
 
 # Ordenamientos
 
-def ordenar_paises(lista_paises, clave, opcion_orden):
+@medir()
+def ordenar_paises(lista_paises, clave, opcion_orden='a'):
     """ Ordena y muestra la lista de países  , recibiendo como parámetros : 
-    la lista , la clave del campo a ordenar y si es ascendente o descendente (valor por defecto)"""
+    la lista , la clave (o claves separadas por coma) del campo a ordenar y si es ascendente o descendente.
+    La lista original no se modifica: se muestra una copia ordenada."""
 
-    n = len(lista_paises)  
-    resultados_ordenados = lista_paises  # Se crea una copia para ordenar y no modificar la lista original
-    
-    for i in range(1, n):
-        pais_actual = resultados_ordenados[i]
-        valor_actual = pais_actual[clave] # se obtiene el valor de la clave solicitada en el llamado de la función ( población o superficie )
-        j = i - 1
-        
-        # Mueve los países de resultados_ordenados que son mayores (o menores si es descendente) 
-        # una posición adelante de su posición actual
-        while j >= 0:
-            valor_comparacion = resultados_ordenados[j][clave]
-            
-            debe_moverse = False
-            
-            if opcion_orden == 'd': # Descendente
-                if valor_comparacion < valor_actual: 
-                    debe_moverse = True
-            else: # Ascendente
-                if valor_comparacion > valor_actual: 
-                    debe_moverse = True
-
-            if debe_moverse:
-                resultados_ordenados[j + 1] = resultados_ordenados[j]
-                j -= 1
-            else:
-                break
+    if opcion_orden == 'd':
+        claves = [(campo, 'd') for campo, _ in normalizar_claves(clave)]
+    else:
+        claves = clave
 
-        resultados_ordenados[j + 1] = pais_actual
+    resultados_ordenados = consultas.consulta(lista_paises).ordenar_por(claves).resultado() # sin alterar la original
 
     if opcion_orden == 'd':
         orden_str = "Descendente (Z-A / Mayor a Menor)" 
     else:
         orden_str = "Ascendente (A-Z / Menor a Mayor)"
 
-    print(f"\n Países ordenados por '{clave.title()}' en orden '{orden_str}':")
+    if ',' in clave:
+        print(f"\n Países ordenados por: {describir_claves(claves)}")
+    else:
+        print(f"\n Países ordenados por '{clave.title()}' en orden '{orden_str}':")
     mostrar_paises(resultados_ordenados)
 
 
@@ -466,7 +660,9 @@ def menu_ordenamiento(lista_paises):
         print("1. Nombre (A-Z / Z-A)")
         print("2. Población")
         print("3. Superficie")
-        print("4. Volver al Menú Principal")
+        print("4. Densidad (habitantes por km²)")
+        print("5. Varios criterios (ej: continente,-densidad)")
+        print("6. Volver al Menú Principal")
                 
         opcion_criterio = input(" Ingrese una opción: ").strip()
         
@@ -481,6 +677,17 @@ def menu_ordenamiento(lista_paises):
                 opcion_orden = opción_ordenamiento()
                 ordenar_paises(lista_paises, 'superficie', opcion_orden )
             case '4':
+                opcion_orden = opción_ordenamiento()
+                ordenar_paises(lista_paises, 'densidad', opcion_orden )
+            case '5':
+                claves = input(" Claves separadas por coma ('-' adelante para descendente): ").strip()
+                try:
+                    normalizar_claves(claves)
+                except ValueError as error:
+                    print(f"** {error} **")
+                    continue
+                ordenar_paises(lista_paises, claves)
+            case '6':
                 break
             case _:
                 print("** Opción de criterio para Ordenamiento inválida. **")
@@ -496,35 +703,33 @@ def obtener_extremos_poblacion(lista_paises):
         
     print("\n ESTADISTICAS: POBLACION MAX y MIN ")
     
-    # Se inicializan ambos con el primer elemento de la lista
-    pais_max_pob = lista_paises[0]
-    pais_min_pob = lista_paises[0]
-    
-    # Se itera desde el segundo elemento
-    for pais in lista_paises[1:]:
-        if pais['poblacion'] > pais_max_pob['poblacion']:
-            pais_max_pob = pais
-        if pais['poblacion'] < pais_min_pob['poblacion']:
-            pais_min_pob = pais
+    if isinstance(lista_paises, TablaPaises): # resultado cacheado del motor de estadísticas
+        resumen = estadisticas.motor_estadisticas(lista_paises).resumen('poblacion')
+        nombre_max, poblacion_max = resumen['pais_maximo'], resumen['maximo']
+        nombre_min, poblacion_min = resumen['pais_minimo'], resumen['minimo']
+    else:
+        # Una sola pasada: admite tanto la lista como un generador de carga_csv.iterar_paises
+        pais_min_pob, pais_max_pob = consultas.extremos(lista_paises, 'poblacion')
+        if pais_min_pob is None:
+            print(" No hay países para calcular extremos.")
+            return
+        nombre_max, poblacion_max = pais_max_pob['nombre'], pais_max_pob['poblacion']
+        nombre_min, poblacion_min = pais_min_pob['nombre'], pais_min_pob['poblacion']
     
     # Formateo
-    pob_max_str = f"{pais_max_pob['poblacion']:,}".replace(",", ".")
-    pob_min_str = f"{pais_min_pob['poblacion']:,}".replace(",", ".")
+    pob_max_str = f"{poblacion_max:,}".replace(",", ".")
+    pob_min_str = f"{poblacion_min:,}".replace(",", ".")
         
-    print(f" País con Mayor Población:  {pais_max_pob['nombre']} ({pob_max_str} hab.)")
-    print(f" País con Menor Población:  {pais_min_pob['nombre']} ({pob_min_str} hab.)")
+    print(f" País con Mayor Población:  {nombre_max} ({pob_max_str} hab.)")
+    print(f" País con Menor Población:  {nombre_min} ({pob_min_str} hab.)")
 
 
+@medir()
 def calcular_promedio(lista_paises, clave):
-    """Calcula el promedio de una clave numérica."""
-    if not lista_paises:
-        return None
-        
-    suma_total = 0
-    for pais in lista_paises:
-        suma_total += pais[clave]
-    
-    return suma_total / len(lista_paises)
+    """Calcula el promedio de una clave numérica (None si no hay países)."""
+    if isinstance(lista_paises, TablaPaises):
+        return estadisticas.motor_estadisticas(lista_paises).resumen(clave).get('promedio')
+    return consultas.promedio(lista_paises, clave)
 
 
 def mostrar_promedio_poblacion(lista_paises):
@@ -564,11 +769,10 @@ def contar_por_continente(lista_paises):
         
     print("\n ESTADISTICAS: PAISES POR CONTINENTE ")
         
-    conteo_continentes = {}
-    for pais in lista_paises:
-        continente = pais.get("continente")
-        if continente: # actualiza el contador de paises por continente, si es el primero asume valor 0 y lo incrementa en 1.
-            conteo_continentes[continente] = conteo_continentes.get(continente, 0) + 1
+    if isinstance(lista_paises, TablaPaises):
+        conteo_continentes = grupos_continente(lista_paises).conteo() # largo de cada grupo, sin recorrer la tabla
+    else:
+        conteo_continentes = consultas.conteo_por_continente(lista_paises)
             
     if conteo_continentes:# título del informe.
         print(" Continente | Cant. de países")
@@ -586,6 +790,71 @@ def contar_por_continente(lista_paises):
         print(" No se encontraron datos de continentes.")
 
 
+def formato_numero(valor, decimales=0):
+    """Número con punto como separador de miles y coma decimal."""
+    return f"{valor:,.{decimales}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def mostrar_resumen_estadistico(lista_paises):
+    """Muestra cantidad, promedio, mínimo, máximo, desvío y percentiles de población, superficie y densidad,
+    para el total y para cada continente (calculados una vez por el motor de estadísticas). Debajo de la
+    cantidad se muestra la parte del total que corresponde a cada continente (en densidad: la densidad del
+    continente entero, población total sobre superficie total)."""
+    motor = estadisticas.motor_estadisticas(lista_paises)
+
+    for campo, titulo in (('poblacion', 'POBLACION'), ('superficie', 'SUPERFICIE (km²)'),
+                          ('densidad', 'DENSIDAD (hab./km²)')):
+        decimales = 2 if campo == 'densidad' else 0
+        print(f"\n ESTADISTICAS: RESUMEN DE {titulo} ")
+        print("-" * 120)
+        print(f"{'Continente':<14}{'Cant.':>7}{'Promedio':>18}{'Mínimo (país)':>28}{'Máximo (país)':>28}{'Desvío':>17}")
+        segunda = 'Total' if campo == 'densidad' else '% tot.'
+        print(f"{'':<14}{segunda:>7}{'P25':>18}{'Mediana':>28}{'P75':>28}{'P90':>17}")
+        print("-" * 120)
+
+        grupos = {'Todos': motor.resumen(campo)}
+        grupos.update(motor.resumen_por_continente(campo))
+        for continente, datos in grupos.items():
+            if not datos['cantidad']:
+                continue
+            minimo = f"{formato_numero(datos['minimo'], decimales)} ({datos['pais_minimo'][:10]})"
+            maximo = f"{formato_numero(datos['maximo'], decimales)} ({datos['pais_maximo'][:10]})"
+            print(f"{continente[:13]:<14}{datos['cantidad']:>7}{formato_numero(datos['promedio'], 2):>18}"
+                  f"{minimo:>28}{maximo:>28}{formato_numero(datos['desvio'], 2):>17}")
+            if 'agregado' in datos:
+                parte = formato_numero(datos['agregado'], 1)
+            elif 'participacion' in datos:
+                parte = formato_numero(datos['participacion'] * 100, 1) + "%"
+            else:
+                parte = ""
+            percentiles = datos['percentiles']
+            print(f"{'':<14}{parte:>7}{formato_numero(percentiles[25], 2):>18}{formato_numero(percentiles[50], 2):>28}"
+                  f"{formato_numero(percentiles[75], 2):>28}{formato_numero(percentiles[90], 2):>17}")
+        print("-" * 120)
+
+
+
+def mostrar_ranking(lista_paises):
+    """Muestra los K países con mayor o menor población/superficie/densidad, opcionalmente de un continente."""
+    print("\n ESTADISTICAS: RANKING ")
+    campos = {'1': ('poblacion', 'población'), '2': ('superficie', 'superficie'), '3': ('densidad', 'densidad')}
+    while True:
+        opcion_campo = input(" Campo del ranking: 1. Población / 2. Superficie / 3. Densidad: ").strip()
+        if opcion_campo in campos:
+            break
+        print(" Opción inválida. Ingrese 1, 2 o 3.")
+    campo, titulo_campo = campos[opcion_campo]
+
+    opcion_orden = opción_ordenamiento() # 'd' = los mayores, 'a' = los menores
+    cantidad = validar_entero_opcional("Cantidad de países a mostrar (por defecto 10)") or 10
+    continente = input(" Continente (Enter para todos): ").strip().title() or None
+
+    resultados = consultas.ranking(lista_paises, campo, cantidad, mayores=opcion_orden == 'd', continente=continente)
+    extremo = "mayor" if opcion_orden == 'd' else "menor"
+    ambito = f" de {continente}" if continente else ""
+    print(f"\n Los {len(resultados)} país(es){ambito} con {extremo} {titulo_campo}:")
+    mostrar_paises(resultados)
+
 
 def menu_estadisticas(lista_paises):
     """Submenú para manejar las opciones de estadísticas, usando match/case."""
@@ -599,7 +868,9 @@ def menu_estadisticas(lista_paises):
         print("2. Promedio de Población")
         print("3. Promedio de Superficie")
         print("4. Cantidad de Países por Continente")
-        print("5. Volver al Menú Principal")
+        print("5. Resumen Estadístico por Continente")
+        print("6. Ranking de Población/Superficie/Densidad (los K mayores o menores)")
+        print("7. Volver al Menú Principal")
         opcion = input(" Seleccione una opción: ").strip()
         
         match opcion:
@@ -612,6 +883,10 @@ def menu_estadisticas(lista_paises):
             case '4':
                 contar_por_continente(lista_paises)
             case '5':
+                mostrar_resumen_estadistico(lista_paises)
+            case '6':
+                mostrar_ranking(lista_paises)
+            case '7':
                 break
             case _:
                 print(" Opción inválida. Intente nuevamente.")
@@ -620,49 +895,433 @@ def menu_estadisticas(lista_paises):
 
 # Menú Principal
 
-# Carga de datos
-print("\nIniciando la carga de datos desde 'paises.csv'...")
-lista_paises = cargar_datos_csv(nombre_archivo)
-    
-# Menú principal
-while True:
-    print("\n" + "=" * 40)
-    print("      Gestión de Datos de Países ")
-    print("=" * 40)
-    print("1. Agregar un País")
-    print("2. Actualizar Población/Superficie")
-    print("3. Buscar País por Nombre")
-    print("4. Filtrar Países")
-    print("5. Ordenar Países")
-    print("6. Mostrar Estadísticas")
-    print("7. Mostrar Todos los Países")
-    print("8. Salir del Sistema")
-    print("-" * 40)
-            
-    opcion = input(" Ingrese su opción: ").strip()
-            
-    # La lista 'lista_paises' se pasa como argumento
-
-    match opcion:
-        case '1':
-            agregar_pais(lista_paises, nombre_archivo)
-        case '2':
-            actualizar_datos(lista_paises, nombre_archivo)
-        case '3':
-            buscar_pais(lista_paises)
-        case '4':
-            menu_filtros(lista_paises)
-        case '5':
-            menu_ordenamiento(lista_paises)
-        case '6':
-            menu_estadisticas(lista_paises)
-        case '7':
-            print("\n LISTA COMPLETA DE PAISES ")
-            mostrar_paises(lista_paises)
-        case '8':
-            print("\n Guardando datos y saliendo del sistema...")
-            guardar_datos_csv(nombre_archivo, lista_paises)
+def menu_principal(lista_paises, nombre_archivo):
+    """Menú interactivo principal. La lista 'lista_paises' se pasa como argumento a cada opción."""
+    while True:
+        print("\n" + "=" * 40)
+        print("      Gestión de Datos de Países ")
+        print("=" * 40)
+        print("1. Agregar un País")
+        print("2. Actualizar Población/Superficie")
+        print("3. Buscar País por Nombre")
+        print("4. Filtrar Países")
+        print("5. Ordenar Países")
+        print("6. Mostrar Estadísticas")
+        print("7. Mostrar Todos los Países")
+        print("8. Importar Países desde Archivo")
+        print("9. Salir del Sistema")
+        print("-" * 40)
+                
+        opcion = input(" Ingrese su opción: ").strip()
+
+        if opcion == '9':
+            print("\n Saliendo del sistema...")
+            try:
+                guardar_datos_csv(nombre_archivo, lista_paises)
+            except OSError as error:
+                mostrar_error_guardado(nombre_archivo, error)
+                salir = input(" ¿Salir de todos modos? Los cambios no guardados se pierden (s/n): ").strip().lower()
+                if salir != 's':
+                    continue
             print(" Gracias por usar: 'Gestión de Datos de Países'")
             break
-        case _:
-            print("Opción no válida. Intente nuevamente")
\ No newline at end of file
+
+        try: # las opciones que modifican datos guardan (o reciben el error de un guardado en segundo plano)
+            match opcion:
+                case '1':
+                    agregar_pais(lista_paises, nombre_archivo)
+                case '2':
+                    actualizar_datos(lista_paises, nombre_archivo)
+                case '3':
+                    buscar_pais(lista_paises)
+                case '4':
+                    menu_filtros(lista_paises)
+                case '5':
+                    menu_ordenamiento(lista_paises)
+                case '6':
+                    menu_estadisticas(lista_paises)
+                case '7':
+                    print("\n LISTA COMPLETA DE PAISES ")
+                    mostrar_paises(lista_paises)
+                case '8':
+                    importar_paises(lista_paises, nombre_archivo)
+                case _:
+                    print("Opción no válida. Intente nuevamente")
+        except OSError as error:
+            mostrar_error_guardado(nombre_archivo, error)
+
+
+# Modo por línea de comandos (sin menú)
+
+def imprimir_paises(paises, args):
+    """Escribe los países en stdout con el formato y la paginación (--limit/--offset) pedidos."""
+    salida.escribir_paises(paises, args.formato, limite=args.limite, desplazamiento=args.desplazamiento)
+
+
+def imprimir_consulta(lista_paises, args):
+    """Arma una sola consulta con los filtros, el orden y la paginación de filter/sort y escribe el resultado."""
+    rangos = {}
+    if args.poblacion_min is not None or args.poblacion_max is not None:
+        rangos['poblacion'] = (args.poblacion_min, args.poblacion_max)
+    if args.superficie_min is not None or args.superficie_max is not None:
+        rangos['superficie'] = (args.superficie_min, args.superficie_max)
+    if args.densidad_min is not None or args.densidad_max is not None:
+        rangos['densidad'] = (args.densidad_min, args.densidad_max)
+    continente = args.continente.strip().title() if args.continente else None
+
+    consulta = consultas.consulta(lista_paises).donde(continente, **rangos)
+    if args.claves:
+        consulta.ordenar_por(args.claves)
+    consulta.desde(args.desplazamiento).limite(args.limite) # el límite llega a la consulta (top-K sin ordenar todo)
+    salida.escribir_paises(consulta.resultado(), args.formato)
+
+
+def imprimir_estadisticas(lista_paises, campos, continente=None, formato='tabla'):
+    """Escribe en stdout el resumen estadístico de los campos (total y por continente, o de un continente)."""
+    if formato == 'tabla' and continente is None and len(campos) == len(CAMPOS_NUMERICOS):
+        mostrar_resumen_estadistico(lista_paises)
+        return
+
+    motor = estadisticas.motor_estadisticas(lista_paises)
+    filas = []
+    for campo in campos:
+        if continente is None:
+            grupos = {'Todos': motor.resumen(campo)}
+            grupos.update(motor.resumen_por_continente(campo))
+        else:
+            grupos = {continente: motor.resumen(campo, continente)}
+        for nombre_grupo, datos in grupos.items():
+            fila = {'campo': campo, 'continente': nombre_grupo}
+            fila.update({clave: valor for clave, valor in datos.items() if clave != 'percentiles'})
+            for p, valor in datos.get('percentiles', {}).items():
+                fila[f'p{p}'] = valor
+            filas.append(fila)
+
+    columnas = ['campo', 'continente', 'cantidad', 'suma', 'promedio', 'minimo', 'pais_minimo',
+                'maximo', 'pais_maximo', 'varianza', 'desvio', 'participacion', 'agregado'] + \
+               [f'p{p}' for p in estadisticas.PERCENTILES]
+    if formato in ('json', 'jsonl'):
+        for fila in filas:
+            sys.stdout.write(json.dumps(fila, ensure_ascii=False) + "\n")
+    else:
+        delimitador = ',' if formato == 'csv' else '\t'
+        escritor_csv = csv.DictWriter(sys.stdout, fieldnames=columnas, delimiter=delimitador, lineterminator='\n')
+        escritor_csv.writeheader()
+        escritor_csv.writerows(filas)
+
+
+def crear_parser():
+    """Parser de argumentos del modo por línea de comandos."""
+    parser = argparse.ArgumentParser(
+        prog="Gestion_Info_Paises.py",
+        description="Gestión de Datos de Países. Sin subcomando inicia el menú interactivo.")
+    parser.add_argument("--archivo", default=nombre_archivo, help="archivo CSV de países (por defecto: %(default)s)")
+    parser.add_argument("--formato-archivo", choices=almacenamiento.FORMATOS,
+                        help="formato del archivo de datos (por defecto según la extensión: .pcol columnar, "
+                             ".parquet Parquet, cualquier otra CSV)")
+    parser.add_argument("--procesos", type=int, default=1,
+                        help="procesos para leer el CSV (0 = uno por núcleo; por defecto: %(default)s, secuencial)")
+    parser.add_argument("--sin-instantanea", dest="usar_instantanea", action="store_false",
+                        help="lee siempre el CSV, sin usar ni generar la instantánea binaria '<csv>.snap'")
+    parser.add_argument("--perfil", action="store_true",
+                        help="mide tiempo y filas/s de cada operación y muestra un resumen al salir (en stderr)")
+    parser.add_argument("--perfil-memoria", action="store_true",
+                        help="como --perfil, y además mide la memoria pico de cada operación (más lento)")
+    parser.add_argument("--traza", metavar="ARCHIVO",
+                        help="escribe las operaciones medidas en formato Chrome trace (JSON); implica --perfil")
+    parser.add_argument("--rechazos", metavar="ARCHIVO",
+                        help="escribe los registros ignorados al cargar (línea, campo, motivo y columnas originales) "
+                             "en este CSV; lee el CSV de datos completo, sin la instantánea")
+    parser.add_argument("--espera-bloqueo", type=float, default=ESPERA_BLOQUEO, metavar="SEGUNDOS",
+                        help="cuánto esperar si otro proceso está modificando el archivo (por defecto: %(default)s)")
+
+    formato = argparse.ArgumentParser(add_help=False)
+    formato.add_argument("--format", "--formato", dest="formato", choices=salida.FORMATOS, default='tabla',
+                         help="formato de salida (por defecto: %(default)s)")
+    formato.add_argument("--limit", "--limite", dest="limite", type=int, help="cantidad máxima de filas a mostrar")
+    formato.add_argument("--offset", "--desde", dest="desplazamiento", type=int, default=0,
+                         help="cantidad de filas a saltear antes de mostrar")
+
+    subcomandos = parser.add_subparsers(dest="comando", metavar="COMANDO")
+
+    subcomandos.add_parser("list", aliases=["listar"], parents=[formato], help="lista todos los países")
+
+    buscar = subcomandos.add_parser("search", aliases=["buscar"], parents=[formato], help="busca países por nombre")
+    buscar.add_argument("texto", help="nombre o parte del nombre")
+    buscar.add_argument("--aproximado", action="store_true", help="incluye nombres con un error de tipeo")
+
+    # Criterios de filter y sort: los dos subcomandos arman la misma consulta (filtros + orden + límite)
+    criterios = argparse.ArgumentParser(add_help=False)
+    criterios.add_argument("--continente")
+    criterios.add_argument("--poblacion-min", type=int)
+    criterios.add_argument("--poblacion-max", type=int)
+    criterios.add_argument("--superficie-min", type=int)
+    criterios.add_argument("--superficie-max", type=int)
+    criterios.add_argument("--densidad-min", type=float, help="habitantes por km²")
+    criterios.add_argument("--densidad-max", type=float, help="habitantes por km²")
+    ayuda_claves = "claves separadas por coma, '-' adelante para descendente (ej: continente,-poblacion o --por=-superficie)"
+
+    filtrar = subcomandos.add_parser("filter", aliases=["filtrar"], parents=[formato, criterios],
+                                     help="filtra por continente y/o rangos de población, superficie y densidad")
+    filtrar.add_argument("--por", dest="claves", help="ordena el resultado: " + ayuda_claves)
+
+    ordenar = subcomandos.add_parser("sort", aliases=["ordenar"], parents=[formato, criterios],
+                                     help="ordena los países (opcionalmente filtrados)")
+    ordenar.add_argument("--por", dest="claves", required=True, help=ayuda_claves)
+
+    estadistica = subcomandos.add_parser("stats", aliases=["estadisticas"], parents=[formato],
+                                         help="estadísticas de población, superficie y densidad")
+    estadistica.add_argument("--campo", choices=CAMPOS_NUMERICOS, help="solo este campo")
+    estadistica.add_argument("--continente", help="solo este continente")
+
+    ranking = subcomandos.add_parser("top", aliases=["ranking"], parents=[formato],
+                                     help="los K países con mayor (o menor) población, superficie o densidad")
+    ranking.add_argument("--por", dest="campo", choices=CAMPOS_NUMERICOS, default='poblacion')
+    ranking.add_argument("-k", "--cantidad", type=int, default=10, help="cantidad de países (por defecto: %(default)s)")
+    ranking.add_argument("--menores", action="store_true", help="los de menor valor en lugar de los de mayor")
+    ranking.add_argument("--continente", help="solo este continente")
+
+    agregar = subcomandos.add_parser("add", aliases=["agregar"], help="agrega un país")
+    agregar.add_argument("nombre")
+    agregar.add_argument("poblacion")
+    agregar.add_argument("superficie")
+    agregar.add_argument("continente")
+
+    actualizar = subcomandos.add_parser("update", aliases=["actualizar"], help="actualiza población y/o superficie")
+    actualizar.add_argument("nombre")
+    actualizar.add_argument("--poblacion")
+    actualizar.add_argument("--superficie")
+
+    importar = subcomandos.add_parser("import", aliases=["importar"], parents=[formato],
+                                      help="importa los países de otro archivo CSV o JSON Lines ('-' = stdin)")
+    importar.add_argument("origen")
+    importar.add_argument("--duplicados", choices=importacion.POLITICAS, default='omitir',
+                          help="qué hacer si el país ya existe (por defecto: %(default)s)")
+    importar.add_argument("--entrada", choices=importacion.FORMATOS,
+                          help="formato del origen (por defecto según la extensión; stdin: csv)")
+
+    lote = subcomandos.add_parser("batch", aliases=["lote"],
+                                  help="ejecuta un comando por línea (desde un archivo o '-' para stdin) con una sola carga de datos")
+    lote.add_argument("entrada", nargs="?", default="-")
+
+    exportar = subcomandos.add_parser("export", aliases=["exportar"],
+                                      help="guarda una copia de los datos en otro archivo (CSV, columnar o Parquet)")
+    exportar.add_argument("destino")
+    exportar.add_argument("--como", choices=almacenamiento.FORMATOS,
+                          help="formato del destino (por defecto según su extensión)")
+
+    validar = subcomandos.add_parser("validate", aliases=["validar"],
+                                     help="valida el archivo sin cargarlo e informa los registros rechazados "
+                                          "(código de salida 1 si hay alguno)")
+    validar.add_argument("--muestras", type=int, default=MUESTRAS_RECHAZO,
+                         help="filas rechazadas que se muestran completas (por defecto: %(default)s)")
+    validar.add_argument("--format", "--formato", dest="formato", choices=('tabla', 'json'), default='tabla',
+                         help="formato del informe (por defecto: %(default)s)")
+
+    servir = subcomandos.add_parser("serve", aliases=["servir"],
+                                    help="atiende pedidos de varios clientes sobre los datos en memoria (ver servidor.py)")
+    servir.add_argument("--direccion", help="'unix:RUTA' o 'HOST:PUERTO' (por defecto: socket Unix '<csv>.sock')")
+
+    return parser
+
+
+def ejecutar_comando(args, lista_paises, nombre_archivo):
+    """Ejecuta un subcomando ya interpretado sobre los datos cargados. Lanza ValueError ante datos inválidos."""
+    comando = args.comando
+    formato = getattr(args, 'formato', 'tabla')
+
+    if comando in ("list", "listar"):
+        imprimir_paises(lista_paises, args)
+
+    elif comando in ("search", "buscar"):
+        imprimir_paises(busqueda.buscar_paises(lista_paises, args.texto, tolerar_errores=args.aproximado), args)
+
+    elif comando in ("filter", "filtrar", "sort", "ordenar"):
+        imprimir_consulta(lista_paises, args)
+
+    elif comando in ("stats", "estadisticas"):
+        campos = [args.campo] if args.campo else list(CAMPOS_NUMERICOS)
+        continente = args.continente.strip().title() if args.continente else None
+        imprimir_estadisticas(lista_paises, campos, continente, formato)
+
+    elif comando in ("top", "ranking"):
+        if args.cantidad < 0:
+            raise ValueError("La cantidad no puede ser negativa.")
+        continente = args.continente.strip().title() if args.continente else None
+        imprimir_paises(consultas.ranking(lista_paises, args.campo, args.cantidad, not args.menores, continente), args)
+
+    elif comando in ("add", "agregar"):
+        with contextlib.redirect_stdout(sys.stderr):
+            agregar_registro(lista_paises, nombre_archivo, args.nombre, args.poblacion, args.superficie, args.continente)
+
+    elif comando in ("import", "importar"):
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                informe = importar_archivo(lista_paises, nombre_archivo, args.origen, args.duplicados, args.entrada)
+        except (OSError, UnicodeDecodeError, csv.Error) as error:
+            raise ValueError(f"No se pudo leer '{args.origen}': {error}")
+        if formato in ('json', 'jsonl'):
+            sys.stdout.write(json.dumps(informe, ensure_ascii=False) + "\n")
+        else:
+            mostrar_informe_importacion(informe)
+
+    elif comando in ("update", "actualizar"):
+        if args.poblacion is None and args.superficie is None:
+            raise ValueError("Indique --poblacion y/o --superficie.")
+        with contextlib.redirect_stdout(sys.stderr):
+            actualizar_registro(lista_paises, nombre_archivo, args.nombre, args.poblacion, args.superficie)
+
+    elif comando in ("export", "exportar"):
+        formato_destino = almacenamiento.formato(args.como or almacenamiento.detectar_formato(args.destino))
+        try:
+            formato_destino.escribir(args.destino, lista_paises)
+        except OSError as error:
+            raise ValueError(f"No se pudo escribir '{args.destino}': {error}")
+        print(f" Se exportaron {len(lista_paises)} países a '{args.destino}' ({formato_destino.nombre}, "
+              f"{os.path.getsize(args.destino):,} bytes).", file=sys.stderr)
+
+    elif comando in ("serve", "servir"):
+        direccion = args.direccion or servidor.direccion_por_defecto(nombre_archivo)
+        try:
+            asyncio.run(servidor.servir(lista_paises, nombre_archivo, escritor_csv, direccion))
+        except OSError as error:
+            raise ValueError(f"No se pudo atender en '{direccion}': {error}")
+        except KeyboardInterrupt: # donde no hay manejadores de señales (Windows)
+            pass
+
+
+def validar_datos(nombre_archivo, muestras, archivo_rechazos=None, formato='tabla'):
+    """Subcomando validate: valida el archivo sin cargarlo ni modificarlo y muestra el informe de
+    rechazos (ver carga_csv.InformeRechazos). Retorna 1 si hay registros rechazados y 0 si no."""
+    formato_archivo = almacenamiento.formato_de(nombre_archivo)
+    try:
+        if formato_archivo is almacenamiento.CSV:
+            validos, informe = validar_archivo(nombre_archivo, muestras, archivo_rechazos)
+        else:
+            informe = InformeRechazos(muestras=muestras, archivo_rechazos=archivo_rechazos)
+            informe.iniciar(CLAVES_ENCABEZADO)
+            try:
+                validos = sum(1 for _ in validar_filas(formato_archivo.filas(nombre_archivo), (0, 1, 2, 3), informe=informe))
+            finally:
+                informe.cerrar()
+    except OSError as error:
+        raise ValueError(f"No se pudo leer '{nombre_archivo}': {error}")
+
+    resultado = {"archivo": nombre_archivo, "validos": validos, **informe.a_diccionario()}
+    if formato == 'json':
+        sys.stdout.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    else:
+        print(f"'{nombre_archivo}': {validos} registros válidos, {informe.total} rechazados.")
+        for motivo, cantidad in sorted(informe.motivos.items(), key=lambda item: -item[1]):
+            print(f"   - {motivo}: {cantidad}")
+        if informe.campos:
+            print(" Campos inválidos: " + ", ".join(f"{campo} ({cantidad})" for campo, cantidad
+                                                     in sorted(informe.campos.items(), key=lambda item: -item[1])))
+        for muestra in informe.muestras:
+            print(f"   línea {muestra['linea']}: {muestra['errores']} -> {','.join(muestra['fila'])}")
+    if archivo_rechazos:
+        print(f" Registros rechazados guardados en '{archivo_rechazos}'.", file=sys.stderr)
+    return 1 if informe.total else 0
+
+
+def ejecutar_lote(parser, entrada, lista_paises, nombre_archivo):
+    """Ejecuta un comando por línea sobre los mismos datos cargados. Retorna la cantidad de líneas con error."""
+    errores = 0
+    archivo = sys.stdin if entrada == '-' else open(entrada, 'r', encoding='utf-8')
+    try:
+        for numero, linea in enumerate(archivo, start=1):
+            linea = linea.strip()
+            if not linea or linea.startswith('#'):
+                continue
+            try:
+                args = parser.parse_args(shlex.split(linea))
+                if args.comando in (None, "batch", "lote", "serve", "servir", "validate", "validar"):
+                    raise ValueError("comando no válido dentro de un lote")
+                ejecutar_comando(args, lista_paises, nombre_archivo)
+            except SystemExit as salida: # argparse ya mostró el error (o la ayuda)
+                if salida.code:
+                    errores += 1
+                    print(f"Línea {numero}: argumentos inválidos.", file=sys.stderr)
+            except ValueError as error:
+                errores += 1
+                print(f"Línea {numero}: {error}", file=sys.stderr)
+            except BrokenPipeError:
+                raise
+            except OSError as error: # no se pudo guardar: el lote sigue, los cambios quedan en memoria
+                errores += 1
+                print(f"Línea {numero}: no se pudo guardar '{nombre_archivo}': {error}", file=sys.stderr)
+    finally:
+        if archivo is not sys.stdin:
+            archivo.close()
+    return errores
+
+
+def main(argv=None):
+    """Punto de entrada: sin subcomando abre el menú interactivo; con subcomando lo ejecuta y termina.
+    El menú y los subcomandos que modifican datos toman antes el bloqueo del archivo (ver bloqueo)."""
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    instrumentacion.configurar(args.perfil, args.perfil_memoria, args.traza) # también PAISES_PERFIL/PAISES_TRAZA
+    if args.formato_archivo:
+        almacenamiento.elegir_formato(args.archivo, args.formato_archivo)
+
+    bloqueo = None
+    if args.comando is None or args.comando in COMANDOS_ESCRITURA:
+        bloqueo = BloqueoArchivo(args.archivo, "menú" if args.comando is None else args.comando, args.espera_bloqueo)
+        try:
+            bloqueo.adquirir()
+        except ArchivoBloqueado as error:
+            print(f"Error: {error}", file=sys.stderr)
+            return 1
+
+    try:
+        if args.comando is None:
+            print(f"\nIniciando la carga de datos desde '{args.archivo}'...")
+            lista_paises = cargar_datos_csv(args.archivo, procesos=args.procesos, usar_instantanea=args.usar_instantanea,
+                                            archivo_rechazos=args.rechazos)
+            menu_principal(lista_paises, args.archivo)
+            return 0
+        return ejecutar_linea_de_comandos(parser, args)
+    except ValueError as error: # archivo de datos ilegible (por ejemplo, columnar dañado)
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        if bloqueo is not None:
+            bloqueo.liberar()
+
+
+def ejecutar_linea_de_comandos(parser, args):
+    """Carga los datos, ejecuta el subcomando (o el lote) y retorna el código de salida."""
+    if args.comando in ("validate", "validar"):
+        return validar_datos(args.archivo, args.muestras, args.rechazos, args.formato)
+
+    with contextlib.redirect_stdout(sys.stderr): # los mensajes de la carga no se mezclan con la salida
+        lista_paises = cargar_datos_csv(args.archivo, procesos=args.procesos, usar_instantanea=args.usar_instantanea,
+                                        archivo_rechazos=args.rechazos)
+
+    codigo = 0
+    try:
+        if args.comando in ("batch", "lote"):
+            codigo = 1 if ejecutar_lote(parser, args.entrada, lista_paises, args.archivo) else 0
+        else:
+            ejecutar_comando(args, lista_paises, args.archivo)
+    except ValueError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        codigo = 1
+    except BrokenPipeError:
+        # La salida se cerró antes de terminar (por ejemplo '| head'): no es un error.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except OSError as error:
+        print(f"Error: no se pudo guardar '{args.archivo}': {error}", file=sys.stderr)
+        codigo = 1
+    finally:
+        try:
+            escritor_csv.esperar() # un guardado en segundo plano (importación, compactación) termina antes de salir
+        except OSError as error:
+            print(f"Error: no se pudo guardar '{args.archivo}': {error}", file=sys.stderr)
+            codigo = 1
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""Formatos del archivo de países: CSV (por defecto, para intercambio), columnar binario y Parquet.
+
+Cada formato es un objeto con leer(nombre_archivo, motivos) -> TablaPaises y
+escribir(nombre_archivo, paises) (escritura atómica, ver persistencia.escribir_atomico); los
+binarios tienen además filas(nombre_archivo), que genera las filas como textos sin validar
+(nombre, poblacion, superficie, continente) para importarlas (ver importacion). Los que
+admiten agregar filas al final sin reescribir el archivo (CSV) tienen anexar(nombre_archivo,
+paises), que usa el guardado cuando desde el anterior solo hubo altas.
+El formato de un archivo se elige por su extensión (ver EXTENSIONES; cualquier otra es CSV)
+o explícitamente con elegir_formato() (opción --formato-archivo); el registro de cambios,
+la compactación y el bloqueo funcionan igual con cualquiera.
+
+El formato columnar ('.pcol') usa solo la biblioteca estándar: cada columna se guarda como
+un bloque de enteros del ancho mínimo que alcanza para sus valores (1, 2, 4 u 8 bytes),
+little endian y comprimido con zlib; los nombres son un bloque UTF-8 con los largos en otra
+columna. Cargarlo es copiar esos bloques a los arrays de la TablaPaises, sin analizar
+texto ni convertir números fila por fila. Parquet ('.parquet') necesita pyarrow instalado
+y sirve para intercambiar datos con otras herramientas; sus filas se validan como las del CSV.
+"""
+
+import csv
+import json
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate, chain
+from operator import sub
+
+import persistencia
+from carga_csv import CLAVES_ENCABEZADO, leer_bloques, validar_filas
+from instrumentacion import medir
+from tabla_paises import TablaPaises
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+MAGICO = b'PAISCOL1'
+VERSION = 1
+
+# mágico, versión, filas, bytes del esquema (JSON con continentes y columnas)
+ENCABEZADO = struct.Struct('<8sHQQ')
+
+NIVEL_COMPRESION = 1 # zlib: el nivel 1 ya reduce casi todo lo que se puede y es el más rápido
+
+ANCHOS = (('B', 1, 0xFF), ('H', 2, 0xFFFF), ('I', 4, 0xFFFFFFFF), ('Q', 8, 0xFFFFFFFFFFFFFFFF))
+
+
+def _tipo_minimo(maximo):
+    """Código de array del entero sin signo más angosto que alcanza para maximo."""
+    for tipo, ancho, limite in ANCHOS:
+        if maximo <= limite and array(tipo).itemsize == ancho:
+            return tipo
+    return 'Q'
+
+
+def _convertir(valores, tipo):
+    """Array de enteros no negativos con otro código de tipo (el destino debe alcanzar para los
+    valores). En little endian se copian los bytes de cada posición con cortes de paso fijo,
+    sin recorrer los valores uno por uno."""
+    if valores.typecode == tipo:
+        return valores
+    if sys.byteorder != 'little':
+        return array(tipo, valores)
+    destino = array(tipo)
+    origen = valores.tobytes()
+    ancho_origen, ancho_destino = valores.itemsize, destino.itemsize
+    crudo = bytearray(len(valores) * ancho_destino) # los bytes altos que sobran quedan en cero
+    for k in range(min(ancho_origen, ancho_destino)):
+        crudo[k::ancho_destino] = origen[k::ancho_origen]
+    destino.frombytes(crudo)
+    return destino
+
+
+def _como_tabla(paises):
+    return paises if isinstance(paises, TablaPaises) else TablaPaises(paises)
+
+
+class FormatoCSV:
+    """Texto separado por comas con encabezado: legible y compatible con cualquier herramienta."""
+
+    nombre = 'csv'
+    usa_instantanea = True # analizar el texto es caro: conviene la instantánea binaria (ver instantanea)
+
+    def leer(self, nombre_archivo, motivos=None):
+        tabla = TablaPaises()
+        for bloque in leer_bloques(nombre_archivo, motivos=motivos):
+            tabla.extend(bloque)
+        return tabla
+
+    def escribir(self, nombre_archivo, paises):
+        if isinstance(paises, TablaPaises):
+            filas = paises.tuplas() # se escriben las columnas directamente, sin armar diccionarios
+        else:
+            filas = ((p['nombre'], p['poblacion'], p['superficie'], p['continente']) for p in paises)
+        persistencia.escribir_csv_atomico(nombre_archivo, CLAVES_ENCABEZADO, filas)
+
+    def anexar(self, nombre_archivo, paises):
+        """Agrega los países al final del archivo. Retorna False si hay que reescribirlo (por
+        ejemplo, si sus columnas no están en el orden de CLAVES_ENCABEZADO)."""
+        try:
+            with open(nombre_archivo, 'r', encoding='utf-8', newline='') as archivo:
+                encabezado = next(csv.reader(archivo), [])
+        except (OSError, UnicodeDecodeError, csv.Error):
+            return False
+        if [columna.strip() for columna in encabezado] != list(CLAVES_ENCABEZADO):
+            return False
+        filas = ((p['nombre'], p['poblacion'], p['superficie'], p['continente']) for p in paises)
+        return persistencia.anexar_filas_csv(nombre_archivo, filas)
+
+
+class FormatoColumnar:
+    """Columnas tipadas en binario (ver el comentario del módulo). Con nivel 0 no se comprime."""
+
+    nombre = 'columnar'
+    usa_instantanea = False # el archivo ya es tan rápido de cargar como la instantánea
+
+    def __init__(self, nivel=NIVEL_COMPRESION):
+        self.nivel = nivel
+
+    def _bloque(self, datos, tipo):
+        if tipo != 'utf8' and sys.byteorder != 'little':
+            datos = array(tipo, datos)
+            datos.byteswap()
+        datos = bytes(datos)
+        return zlib.compress(datos, self.nivel) if self.nivel else datos
+
+    @medir(filas=lambda argumentos, resultado: len(argumentos[2]))
+    def escribir(self, nombre_archivo, paises):
+        tabla = _como_tabla(paises)
+        nombres, fin_nombre, poblacion, superficie, codigo_continente = tabla.buffers()
+        largos = array('q', map(sub, fin_nombre, chain((0,), fin_nombre)))
+
+        columnas = []
+        bloques = []
+        for nombre, valores in (('largo_nombre', largos), ('poblacion', poblacion), ('superficie', superficie),
+                                ('continente', codigo_continente)):
+            tipo = _tipo_minimo(max(valores, default=0))
+            valores = _convertir(valores, tipo)
+            bloques.append(self._bloque(valores, tipo))
+            columnas.append({"nombre": nombre, "tipo": tipo, "bytes": len(bloques[-1])})
+        bloques.append(self._bloque(nombres, 'utf8'))
+        columnas.append({"nombre": "nombre", "tipo": "utf8", "bytes": len(bloques[-1])})
+
+        esquema = json.dumps({"continentes": tabla.continentes, "zlib": bool(self.nivel), "columnas": columnas},
+                             ensure_ascii=False).encode('utf-8')
+
+        def escribir(archivo):
+            archivo.write(ENCABEZADO.pack(MAGICO, VERSION, len(tabla), len(esquema)))
+            archivo.write(esquema)
+            for bloque in bloques:
+                archivo.write(bloque)
+
+        persistencia.escribir_atomico(nombre_archivo, escribir, binario=True)
+
+    @medir(filas=lambda argumentos, resultado: len(resultado))
+    def leer(self, nombre_archivo, motivos=None):
+        """Lanza ValueError si el archivo no es columnar o está dañado."""
+        with open(nombre_archivo, 'rb') as archivo:
+            contenido = archivo.read()
+        if len(contenido) < ENCABEZADO.size:
+            raise ValueError(f"'{nombre_archivo}' no es un archivo columnar de países (muy corto).")
+        magico, version, filas, largo_esquema = ENCABEZADO.unpack_from(contenido)
+        if magico != MAGICO or version != VERSION:
+            raise ValueError(f"'{nombre_archivo}' no es un archivo columnar de países (o es de otra versión).")
+
+        vista = memoryview(contenido)
+        try:
+            posicion = ENCABEZADO.size + largo_esquema
+            esquema = json.loads(bytes(vista[ENCABEZADO.size:posicion]).decode('utf-8'))
+            columnas = {}
+            for columna in esquema["columnas"]:
+                fin = posicion + columna["bytes"]
+                datos = vista[posicion:fin]
+                if esquema["zlib"]:
+                    datos = zlib.decompress(datos)
+                tipo = columna["tipo"]
+                if tipo == 'utf8':
+                    columnas[columna["nombre"]] = bytearray(datos)
+                else:
+                    valores = array(tipo)
+                    valores.frombytes(datos)
+                    if sys.byteorder != 'little':
+                        valores.byteswap()
+                    columnas[columna["nombre"]] = valores
+                posicion = fin
+            if posicion != len(contenido):
+                raise ValueError("el tamaño no coincide con el esquema")
+        except (KeyError, ValueError, TypeError, zlib.error) as error:
+            raise ValueError(f"El archivo columnar '{nombre_archivo}' está dañado: {error}")
+        finally:
+            vista.release()
+
+        try:
+            return _tabla_verificada(columnas, filas, esquema["continentes"])
+        except (KeyError, ValueError) as error:
+            raise ValueError(f"El archivo columnar '{nombre_archivo}' está dañado o incompleto ({error}).")
+
+    def filas(self, nombre_archivo):
+        for nombre, poblacion, superficie, continente in self.leer(nombre_archivo).tuplas():
+            yield nombre, str(poblacion), str(superficie), continente
+
+
+def _tabla_verificada(columnas, filas, continentes):
+    """TablaPaises con las columnas leídas, verificando que sean coherentes entre sí."""
+    largos = columnas["largo_nombre"]
+    fin_nombre = array('q', accumulate(largos))
+    poblacion = _convertir(columnas["poblacion"], 'q')
+    superficie = _convertir(columnas["superficie"], 'q')
+    codigos = _convertir(columnas["continente"], 'H')
+    if any(len(columna) != filas for columna in (largos, poblacion, superficie, codigos)):
+        raise ValueError("las columnas no tienen la misma cantidad de filas")
+    if filas:
+        if fin_nombre[-1] != len(columnas["nombre"]) or min(largos) == 0:
+            raise ValueError("nombres incompletos")
+        if min(poblacion) <= 0 or min(superficie) <= 0 or max(codigos) >= len(continentes):
+            raise ValueError("valores fuera de rango")
+    return TablaPaises.desde_buffers(columnas["nombre"], fin_nombre, poblacion, superficie, codigos, continentes)
+
+
+class FormatoParquet:
+    """Apache Parquet mediante pyarrow (opcional): para intercambiar datos con otras herramientas."""
+
+    nombre = 'parquet'
+    usa_instantanea = False
+
+    def _requerir(self):
+        if pyarrow is None:
+            raise ValueError("El formato parquet necesita pyarrow (pip install pyarrow).")
+
+    def leer(self, nombre_archivo, motivos=None):
+        """Las filas se validan con las reglas de la carga del CSV (el archivo puede venir de otra herramienta)."""
+        return TablaPaises(validar_filas(self.filas(nombre_archivo), (0, 1, 2, 3), {} if motivos is None else motivos))
+
+    def filas(self, nombre_archivo):
+        self._requerir()
+        try:
+            datos = pyarrow.parquet.read_table(nombre_archivo, columns=CLAVES_ENCABEZADO).to_pydict()
+        except (pyarrow.ArrowException, KeyError) as error:
+            raise ValueError(f"No se pudo leer '{nombre_archivo}' como Parquet: {error}")
+        texto = lambda valor: "" if valor is None else str(valor) # un valor nulo se rechaza como campo vacío
+        return zip(*([texto(valor) for valor in datos[clave]] for clave in CLAVES_ENCABEZADO))
+
+    def escribir(self, nombre_archivo, paises):
+        self._requerir()
+        tabla = _como_tabla(paises)
+        nombres, poblacion, superficie, continentes = zip(*tabla.tuplas()) if len(tabla) else ((), (), (), ())
+        tabla_arrow = pyarrow.table({
+            "nombre": pyarrow.array(nombres, pyarrow.string()),
+            "poblacion": pyarrow.array(poblacion, pyarrow.int64()),
+            "superficie": pyarrow.array(superficie, pyarrow.int64()),
+            "continente": pyarrow.array(continentes, pyarrow.string()).dictionary_encode(),
+        })
+        persistencia.escribir_atomico(nombre_archivo, lambda archivo: pyarrow.parquet.write_table(tabla_arrow, archivo),
+                                      binario=True)
+
+
+CSV = FormatoCSV()
+
+FORMATOS = {'csv': CSV, 'columnar': FormatoColumnar(), 'parquet': FormatoParquet()}
+
+EXTENSIONES = {'.pcol': 'columnar', '.parquet': 'parquet'} # cualquier otra extensión es CSV
+
+_elegidos = {} # nombre de archivo -> formato elegido explícitamente (prevalece sobre la extensión)
+
+
+def detectar_formato(nombre_archivo):
+    """Nombre del formato según la extensión del archivo (CSV si no es una conocida)."""
+    nombre = str(nombre_archivo).lower()
+    for extension, formato in EXTENSIONES.items():
+        if nombre.endswith(extension):
+            return formato
+    return 'csv'
+
+
+def formato(nombre):
+    """Objeto del formato por nombre. Lanza ValueError si no existe."""
+    if nombre not in FORMATOS:
+        raise ValueError(f"Formato de archivo no válido: '{nombre}'. Opciones: {', '.join(FORMATOS)}.")
+    return FORMATOS[nombre]
+
+
+def elegir_formato(nombre_archivo, nombre):
+    """Usa el formato indicado para leer y escribir el archivo, cualquiera sea su extensión."""
+    _elegidos[nombre_archivo] = formato(nombre)
+
+
+def formato_de(nombre_archivo):
+    """Objeto del formato con el que se lee y escribe el archivo."""
+    return _elegidos.get(nombre_archivo) or FORMATOS[detectar_formato(nombre_archivo)]
@@ -0,0 +1,67 @@
+"""Benchmark de los formatos de archivo (almacenamiento.py): tamaño, guardado y carga contra CSV.
+
+Uso: python benchmarks/bench_almacenamiento.py [--filas 1000000] [--sesgo 1.0] [--repeticiones 3]
+
+Guarda la misma tabla de --filas países sintéticos en CSV, en el formato columnar (con y
+sin compresión) y, si pyarrow está instalado, en Parquet; informa el tamaño de cada
+archivo y el mejor tiempo de guardado y de carga, y verifica que cada carga devuelva
+exactamente los mismos países. El CSV se carga validando fila por fila (sin instantánea)."""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import almacenamiento  # noqa: E402
+from datos_sinteticos import generar_paises  # noqa: E402
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+def medir(funcion, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--sesgo", type=float, default=1.0, help="ver datos_sinteticos (0 = valores uniformes)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    tabla = TablaPaises(generar_paises(args.filas, sesgo=args.sesgo))
+    esperadas = list(tabla.tuplas())
+
+    formatos = [("csv", almacenamiento.CSV, ".csv"),
+                ("columnar (zlib)", almacenamiento.FormatoColumnar(), ".pcol"),
+                ("columnar (sin comprimir)", almacenamiento.FormatoColumnar(nivel=0), ".pcol")]
+    if almacenamiento.pyarrow is not None:
+        formatos.append(("parquet (pyarrow)", almacenamiento.FORMATOS['parquet'], ".parquet"))
+    else:
+        print("pyarrow no está instalado: se omite Parquet.\n")
+
+    print(f"{'Formato':<26}{'Tamaño (MB)':>13}{'vs CSV':>8}{'Guardar (ms)':>14}{'Cargar (ms)':>13}{'Carga vs CSV':>14}")
+    base = None
+    with tempfile.TemporaryDirectory() as directorio:
+        for titulo, formato, extension in formatos:
+            ruta = os.path.join(directorio, "paises" + extension)
+            t_guardar, _ = medir(lambda: formato.escribir(ruta, tabla), args.repeticiones)
+            tamano = os.path.getsize(ruta)
+            t_cargar, cargada = medir(lambda: formato.leer(ruta), args.repeticiones)
+            assert list(cargada.tuplas()) == esperadas, titulo
+            if base is None:
+                base = (tamano, t_cargar)
+            print(f"{titulo:<26}{tamano / 1e6:>13.1f}{tamano / base[0]:>7.0%} {t_guardar * 1000:>13.0f}"
+                  f"{t_cargar * 1000:>13.0f}{base[1] / t_cargar:>13.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark de altas masivas con control de duplicados: recorrido de la lista contra índice de nombres.
+
+Uso: python benchmarks/bench_altas.py [--tamanos 1000,2000,4000,8000,16000] [--max-recorrido 16000]
+
+Con el recorrido cada alta revisa todos los países anteriores (O(n²) en total); con el
+índice cada control es O(1) y el tiempo por alta se mantiene constante (escala lineal)."""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos_sinteticos import generar_paises  # noqa: E402
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+def altas_con_recorrido(paises):
+    """Control de duplicados como lo hacía agregar_pais: recorriendo la lista en cada alta."""
+    lista_paises = []
+    for nuevo in paises:
+        existe = False
+        for pais in lista_paises:
+            if pais['nombre'] == nuevo['nombre']:
+                existe = True
+                break
+        if not existe:
+            lista_paises.append(nuevo)
+    return lista_paises
+
+
+def altas_con_indice(paises):
+    tabla = TablaPaises()
+    tabla.indice_de("")  # el índice existe desde el principio y se mantiene en cada alta
+    for nuevo in paises:
+        if tabla.indice_de(nuevo['nombre']) is None:
+            tabla.append(nuevo)
+    return tabla
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", default="1000,2000,4000,8000,16000,100000")
+    parser.add_argument("--max-recorrido", type=int, default=16000)
+    args = parser.parse_args()
+
+    print(f"{'Altas':>8}{'Recorrido (s)':>15}{'µs/alta':>9}{'Índice (s)':>12}{'µs/alta':>9}")
+    for n in (int(t) for t in args.tamanos.split(',')):
+        paises = generar_paises(n)
+
+        if n <= args.max_recorrido:
+            inicio = time.perf_counter()
+            altas_con_recorrido(paises)
+            t_recorrido = time.perf_counter() - inicio
+            recorrido_str = f"{t_recorrido:>15.3f}{t_recorrido / n * 1e6:>9.1f}"
+        else:
+            recorrido_str = f"{'omitido':>15}{'':>9}"
+
+        inicio = time.perf_counter()
+        altas_con_indice(paises)
+        t_indice = time.perf_counter() - inicio
+        print(f"{n:>8}{recorrido_str}{t_indice:>12.3f}{t_indice / n * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark de carga: lectura secuencial (carga_csv.leer_bloques) contra carga_paralela con 1 a 16 procesos.
+
+Uso: python benchmarks/bench_carga_paralela.py [--filas 1000000] [--procesos 1,2,4,8,16]
+
+Se escribe un CSV sintético en un directorio temporal (con algunas filas inválidas) y se
+verifica que todas las variantes carguen los mismos países e ignoren los mismos registros.
+La mejora depende de la cantidad de núcleos disponibles (se informa os.cpu_count())."""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import carga_paralela  # noqa: E402
+from carga_csv import CLAVES_ENCABEZADO, leer_bloques  # noqa: E402
+from datos_sinteticos import generar_paises  # noqa: E402
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+def escribir_csv(ruta, paises):
+    with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+        escritor_csv = csv.writer(archivo)
+        escritor_csv.writerow(CLAVES_ENCABEZADO)
+        for i, p in enumerate(paises):
+            if i % 1000 == 999:
+                escritor_csv.writerow([p['nombre'], "sin dato", p['superficie'], p['continente']])
+            else:
+                escritor_csv.writerow([p['nombre'], p['poblacion'], p['superficie'], p['continente']])
+
+
+def carga_secuencial(ruta, motivos):
+    tabla = TablaPaises()
+    for bloque in leer_bloques(ruta, motivos=motivos):
+        tabla.extend(bloque)
+    return tabla
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--procesos", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "paises.csv")
+        escribir_csv(ruta, generar_paises(args.filas))
+        print(f"Archivo: {args.filas} filas, {os.path.getsize(ruta) / 1e6:.1f} MB; núcleos: {os.cpu_count()}\n")
+
+        motivos_esperados = {}
+        inicio = time.perf_counter()
+        esperada = carga_secuencial(ruta, motivos_esperados)
+        t_secuencial = time.perf_counter() - inicio
+
+        print(f"{'Variante':<22}{'Tiempo (s)':>12}{'Filas/s':>14}{'Mejora':>9}")
+        print(f"{'secuencial':<22}{t_secuencial:>12.3f}{args.filas / t_secuencial:>14,.0f}{'1.0x':>9}")
+        for procesos in (int(p) for p in args.procesos.split(",")):
+            motivos = {}
+            inicio = time.perf_counter()
+            tabla = carga_paralela.cargar_en_paralelo(ruta, procesos, motivos=motivos)
+            tiempo = time.perf_counter() - inicio
+
+            assert list(tabla.tuplas()) == list(esperada.tuplas()) and motivos == motivos_esperados
+            titulo = f"{procesos} proceso(s)"
+            print(f"{titulo:<22}{tiempo:>12.3f}{args.filas / tiempo:>14,.0f}{t_secuencial / tiempo:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
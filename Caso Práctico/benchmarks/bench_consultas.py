@@ -0,0 +1,64 @@
+"""Benchmark de consultas compuestas: filtrar + ordenar todo + cortar contra consultas.consulta().
+
+Uso: python benchmarks/bench_consultas.py [--filas 1000000] [--repeticiones 5]
+
+La versión por pasos materializa el resultado de cada etapa (filtro, orden completo) y
+recién al final toma los primeros; la consulta resuelve los predicados juntos y el límite
+con un montículo de K elementos. Se mide sobre la tabla y sobre una lista de diccionarios."""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import consultas  # noqa: E402
+from datos_sinteticos import generar_paises  # noqa: E402
+from ordenamiento import ordenar_registros  # noqa: E402
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+CONSULTAS = [
+    ("Asia, 1M-100M hab., -superficie, 20", dict(continente="Asia", poblacion=(1_000_000, 100_000_000)),
+     "-superficie", 20),
+    ("superficie <= 1M, continente,-poblacion, 50", dict(superficie=(None, 1_000_000)), "continente,-poblacion", 50),
+    ("todos, -poblacion, 10", {}, "-poblacion", 10),
+    ("todos, nombre,-superficie, 10", {}, "nombre,-superficie", 10),
+]
+
+
+def medir(funcion, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    paises = generar_paises(args.filas)
+    tabla = TablaPaises(paises)
+    consultas.filtrar_indices(tabla, poblacion=(0, 0), superficie=(0, 0), continente="Asia") # índices ya construidos
+
+    print(f"{'Consulta':<46}{'Origen':>8}{'Por pasos (ms)':>16}{'Consulta (ms)':>15}")
+    for titulo, predicados, claves, cantidad in CONSULTAS:
+        for origen, datos, repeticiones in (("tabla", tabla, args.repeticiones), ("lista", paises, 1)):
+            t_pasos, esperado = medir(
+                lambda: list(ordenar_registros(consultas.filtrar(datos, **predicados), claves))[:cantidad], repeticiones)
+            t_consulta, obtenido = medir(
+                lambda: consultas.consulta(datos).donde(**predicados).ordenar_por(claves).limite(cantidad).resultado(),
+                repeticiones)
+            assert [p['nombre'] for p in obtenido] == [p['nombre'] for p in esperado]
+            print(f"{titulo:<46}{origen:>8}{t_pasos * 1000:>16.1f}{t_consulta * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark de filtros: recorrido fila por fila contra consultas.filtrar_indices.
+
+Uso: python benchmarks/bench_filtros.py [--filas 1000000] [--repeticiones 20]
+
+La primera consulta sobre cada columna incluye construir su ColumnaOrdenada; se informa
+aparte del tiempo de las consultas siguientes, que es el que ve el usuario en el menú."""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import consultas  # noqa: E402
+from datos_sinteticos import generar_paises  # noqa: E402
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+CONSULTAS = [
+    ("continente Oceania", dict(continente="Oceania")),
+    ("poblacion 1M-2M", dict(poblacion=(1_000_000, 2_000_000))),
+    ("superficie <= 50k", dict(superficie=(None, 50_000))),
+    ("Asia + poblacion 1M-100M + superficie <= 100k",
+     dict(continente="Asia", poblacion=(1_000_000, 100_000_000), superficie=(None, 100_000))),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    paises = generar_paises(args.filas)
+    tabla = TablaPaises(paises)
+
+    inicio = time.perf_counter()
+    consultas.filtrar_indices(tabla, poblacion=(0, 0), superficie=(0, 0), continente="Asia")
+    print(f"Construcción de columnas ordenadas y grupos por continente: {time.perf_counter() - inicio:.3f} s\n")
+
+    print(f"{'Consulta':<48}{'Recorrido (ms)':>16}{'Índices (ms)':>14}{'Filas':>9}")
+    for titulo, predicados in CONSULTAS:
+        inicio = time.perf_counter()
+        esperado = consultas.filtrar(paises, **predicados)  # lista de diccionarios: recorrido completo
+        t_recorrido = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        for _ in range(args.repeticiones):
+            indices = consultas.filtrar_indices(tabla, **predicados)
+        t_indices = (time.perf_counter() - inicio) / args.repeticiones
+
+        assert len(indices) == len(esperado)
+        print(f"{titulo:<48}{t_recorrido * 1000:>16.1f}{t_indices * 1000:>14.2f}{len(indices):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark del guardado según los cambios hechos (seguimiento de cambios de TablaPaises).
+
+Uso: python benchmarks/bench_guardado.py [--filas 1000000] [--cambios 10] [--repeticiones 3]
+
+Carga un CSV sintético de --filas países y mide guardar_datos_csv (el guardado al salir del
+menú) en tres situaciones: sin cambios (no escribe nada), con --cambios altas (agrega esas
+filas al final del CSV) y con --cambios modificaciones (reescribe el CSV completo, que era
+lo que hacía siempre). Después de cada guardado verifica que el CSV, vuelto a cargar, tenga
+exactamente los países de la tabla en memoria, y que cambios_desde devuelva los cambiados."""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Gestion_Info_Paises import cargar_datos_csv, guardar_datos_csv  # noqa: E402
+from datos_sinteticos import escribir_csv, generar_paises  # noqa: E402
+
+
+def cargar(ruta):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return cargar_datos_csv(ruta, usar_instantanea=False)
+
+
+def guardar(ruta, tabla):
+    """Tiempo de guardar_datos_csv y si escribió algo."""
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        escribio = guardar_datos_csv(ruta, tabla)
+    return time.perf_counter() - inicio, escribio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--cambios", type=int, default=10, help="altas o modificaciones antes de cada guardado")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "paises.csv")
+        escribir_csv(ruta, generar_paises(args.filas))
+        tabla = cargar(ruta)
+        agregados = 0
+
+        def altas():
+            nonlocal agregados
+            for _ in range(args.cambios):
+                tabla.append({"nombre": f"Nuevo {agregados:07d}", "poblacion": agregados + 1,
+                              "superficie": 10, "continente": "Oceania"})
+                agregados += 1
+
+        def modificaciones():
+            for i in range(args.cambios):
+                tabla[i * (len(tabla) // args.cambios)]['poblacion'] += 1
+
+        print(f"{args.filas:,} países, {args.cambios} cambios por guardado, {os.path.getsize(ruta) / 1e6:.1f} MB\n")
+        print(f"{'Guardado':<22}{'Tiempo (ms)':>13}{'Escribió':>10}{'Cambios':>9}")
+        for titulo, cambiar in (("sin cambios", None), ("altas", altas), ("modificaciones", modificaciones)):
+            mejor = None
+            for _ in range(args.repeticiones):
+                version = tabla.version
+                if cambiar:
+                    cambiar()
+                cambiados = len(tabla.cambios_desde(version))
+                assert cambiados == (args.cambios if cambiar else 0), titulo
+                tiempo, escribio = guardar(ruta, tabla)
+                assert escribio == bool(cambiar) and not tabla.modificada, titulo
+                mejor = tiempo if mejor is None else min(mejor, tiempo)
+            print(f"{titulo:<22}{mejor * 1000:>13.1f}{'sí' if escribio else 'no':>10}{cambiados:>9}")
+            assert list(cargar(ruta).tuplas()) == list(tabla.tuplas()), titulo
+
+
+if __name__ == "__main__":
+    main()
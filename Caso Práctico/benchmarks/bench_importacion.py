@@ -0,0 +1,77 @@
+"""Benchmark de importación masiva (importacion.py) contra agregar los países uno por uno.
+
+Uso: python benchmarks/bench_importacion.py [--filas 100000] [--importar 100000] [--individual 2000]
+
+Sobre una tabla de --filas países se importa un CSV con --importar filas (la mitad países
+nuevos y la mitad existentes, con algunas filas inválidas) con cada política de duplicados,
+incluida la escritura del CSV. Como referencia se agregan --individual países con
+agregar_registro, que valida y registra cada alta por separado en el registro de cambios."""
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importacion  # noqa: E402
+from Gestion_Info_Paises import agregar_registro, guardar_datos_csv, registrar_cambios  # noqa: E402
+from carga_csv import CLAVES_ENCABEZADO  # noqa: E402
+from datos_sinteticos import generar_paises  # noqa: E402
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+def escribir_origen(ruta, existentes, cantidad):
+    """CSV a importar: la mitad de los países ya existen (con otra población), la otra mitad son nuevos."""
+    with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+        escritor_csv = csv.writer(archivo)
+        escritor_csv.writerow(CLAVES_ENCABEZADO)
+        for i, p in enumerate(generar_paises(cantidad, semilla=11)):
+            nombre = existentes[i]['nombre'] if i % 2 == 0 else f"Importado {i:07d}"
+            if i % 500 == 499:
+                escritor_csv.writerow([nombre, "sin dato", p['superficie'], p['continente']])
+            else:
+                escritor_csv.writerow([nombre, p['poblacion'], p['superficie'], p['continente']])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--importar", type=int, default=100_000)
+    parser.add_argument("--individual", type=int, default=2000)
+    args = parser.parse_args()
+
+    base = list(generar_paises(args.filas))
+    with tempfile.TemporaryDirectory() as directorio:
+        origen = os.path.join(directorio, "importar.csv")
+        destino = os.path.join(directorio, "paises.csv")
+        escribir_origen(origen, base, min(args.importar, 2 * args.filas))
+
+        print(f"{'Variante':<34}{'Tiempo (s)':>12}{'Filas/s':>14}")
+        for politica in importacion.POLITICAS:
+            tabla = TablaPaises(base)
+            with contextlib.redirect_stdout(io.StringIO()):
+                guardar_datos_csv(destino, tabla)
+                inicio = time.perf_counter()
+                cambios, informe = importacion.importar(tabla, origen, politica)
+                registrar_cambios(destino, tabla, cambios)
+                tiempo = time.perf_counter() - inicio
+            print(f"{'importar (' + politica + ')':<34}{tiempo:>12.3f}{informe['leidos'] / tiempo:>14,.0f}")
+
+        tabla = TablaPaises(base)
+        with contextlib.redirect_stdout(io.StringIO()):
+            guardar_datos_csv(destino, tabla)
+            inicio = time.perf_counter()
+            for i, p in enumerate(generar_paises(args.individual, semilla=13)):
+                agregar_registro(tabla, destino, f"Individual {i:07d}", p['poblacion'], p['superficie'],
+                                 p['continente'])
+            tiempo = time.perf_counter() - inicio
+        print(f"{'agregar_registro uno por uno':<34}{tiempo:>12.3f}{args.individual / tiempo:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark de inicio: carga del CSV contra carga desde la instantánea binaria (instantanea.py).
+
+Uso: python benchmarks/bench_instantanea.py [--filas 1000000]
+
+Se mide la carga dentro del proceso (cargar_datos_csv) y el arranque completo en frío de
+un proceso nuevo que carga los datos y termina ('list --limit 0'), con y sin instantánea."""
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+DIRECTORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRECTORIO)
+
+import instantanea  # noqa: E402
+from Gestion_Info_Paises import cargar_datos_csv  # noqa: E402
+from carga_csv import CLAVES_ENCABEZADO  # noqa: E402
+from datos_sinteticos import generar_paises  # noqa: E402
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def arranque(ruta, *opciones):
+    """Tiempo de un proceso nuevo que carga el archivo y termina sin mostrar filas."""
+    comando = [sys.executable, os.path.join(DIRECTORIO, "Gestion_Info_Paises.py"), "--archivo", ruta,
+               *opciones, "list", "--format", "csv", "--limit", "0"]
+    inicio = time.perf_counter()
+    subprocess.run(comando, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "paises.csv")
+        with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+            escritor_csv = csv.writer(archivo)
+            escritor_csv.writerow(CLAVES_ENCABEZADO)
+            escritor_csv.writerows((p['nombre'], p['poblacion'], p['superficie'], p['continente'])
+                                   for p in generar_paises(args.filas))
+
+        t_csv, esperada = medir(lambda: cargar_datos_csv(ruta, usar_instantanea=False))
+        t_primera, _ = medir(lambda: cargar_datos_csv(ruta))  # lee el CSV y escribe la instantánea
+        t_instantanea, tabla = medir(lambda: cargar_datos_csv(ruta))
+        assert list(tabla.tuplas()) == list(esperada.tuplas())
+        tamano = os.path.getsize(instantanea.ruta_instantanea(ruta))
+
+        print(f"Filas: {args.filas}; CSV {os.path.getsize(ruta) / 1e6:.1f} MB; instantánea {tamano / 1e6:.1f} MB\n")
+        print(f"{'Carga en el proceso':<44}{'Tiempo (ms)':>12}")
+        print(f"{'CSV (sin instantánea)':<44}{t_csv * 1000:>12.1f}")
+        print(f"{'CSV + escritura de la instantánea':<44}{t_primera * 1000:>12.1f}")
+        print(f"{'instantánea válida':<44}{t_instantanea * 1000:>12.1f}")
+
+        print(f"\n{'Arranque en frío (proceso nuevo)':<44}{'Tiempo (ms)':>12}")
+        print(f"{'intérprete solo':<44}{arranque_vacio() * 1000:>12.1f}")
+        print(f"{'con CSV':<44}{arranque(ruta, '--sin-instantanea') * 1000:>12.1f}")
+        print(f"{'con instantánea':<44}{arranque(ruta) * 1000:>12.1f}")
+
+
+def arranque_vacio():
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark de memoria: lista de diccionarios contra TablaPaises (almacenamiento columnar).
+
+Uso: python benchmarks/bench_memoria.py [--filas 1000000]
+
+Mide con tracemalloc los bytes asignados para guardar las mismas filas en cada formato."""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carga_csv import validar_fila  # noqa: E402
+from datos_sinteticos import generar_paises  # noqa: E402
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+def medir_asignado(construir):
+    """Bytes que quedan asignados después de construir la estructura (que se mantiene viva)."""
+    gc.collect()
+    tracemalloc.start()
+    estructura = construir()
+    asignado, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return estructura, asignado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.filas
+
+    # Los datos de origen son las cadenas tal como se leen del CSV; ambas estructuras se
+    # construyen validándolas con la misma función que usa la carga.
+    origen = [(p["nombre"], str(p["poblacion"]), str(p["superficie"]), p["continente"]) for p in generar_paises(n)]
+
+    def como_diccionarios():
+        return [validar_fila(*fila) for fila in origen]
+
+    def como_tabla():
+        tabla = TablaPaises()
+        for fila in origen:
+            tabla.append(validar_fila(*fila))
+        return tabla
+
+    lista, bytes_lista = medir_asignado(como_diccionarios)
+    del lista
+    tabla, bytes_tabla = medir_asignado(como_tabla)
+
+    print(f"Filas: {n}")
+    print(f"{'Lista de diccionarios':<24}{bytes_lista / 2**20:>10.1f} MiB  {bytes_lista / n:>7.1f} bytes/fila")
+    print(f"{'TablaPaises':<24}{bytes_tabla / 2**20:>10.1f} MiB  {bytes_tabla / n:>7.1f} bytes/fila")
+    print(f"Reducción: {bytes_lista / bytes_tabla:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
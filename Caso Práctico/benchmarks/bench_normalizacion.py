@@ -0,0 +1,89 @@
+"""Benchmark de las claves normalizadas de nombres y de los continentes internados.
+
+Uso: python benchmarks/bench_normalizacion.py [--filas 300000] [--acentos 0.05] [--consultas 100000]
+
+Compara normalizar el nombre de cada fila cada vez que se lo necesita (como al buscar
+sin claves precalculadas) contra las claves de indices.ClavesNombres, calculadas una sola
+vez para toda la columna. Mide también la construcción de los índices de nombres y de
+búsqueda (que comparten esas claves), las búsquedas exactas por nombre y la validación de
+filas con los continentes ya normalizados e internados."""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from busqueda import IndiceBusqueda  # noqa: E402
+from carga_csv import validar_fila  # noqa: E402
+from datos_sinteticos import generar_paises  # noqa: E402
+from indices import ClavesNombres, IndiceNombres  # noqa: E402
+from normalizacion import normalizar  # noqa: E402
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+def medir(funcion, repeticiones=3):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=300_000)
+    parser.add_argument("--acentos", type=float, default=0.05, help="fracción de nombres con acentos")
+    parser.add_argument("--consultas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    azar = random.Random(1234)
+    paises = generar_paises(args.filas)
+    for pais in paises:
+        if azar.random() < args.acentos:
+            pais["nombre"] = pais["nombre"].replace("Pais", "País")
+    tabla = TablaPaises(paises)
+    nombres = [azar.choice(paises)["nombre"].upper() for _ in range(args.consultas)]
+
+    print(f"{'Operación':<44}{'Tiempo (ms)':>14}")
+
+    def fila(titulo, segundos):
+        print(f"{titulo:<44}{segundos * 1000:>14.1f}")
+
+    t, esperadas = medir(lambda: [normalizar(tabla.nombre(i)) for i in range(len(tabla))])
+    fila("claves: normalizar cada nombre", t)
+    t, claves = medir(lambda: ClavesNombres(tabla).lista())
+    fila("claves: ClavesNombres (una vez)", t)
+    assert claves == esperadas
+
+    claves_tabla = ClavesNombres(tabla)
+    t, _ = medir(lambda: [normalizar(tabla.nombre(i)) for i in range(0, len(tabla), 3)])
+    fila("clave de una fila: normalizando (1/3 filas)", t)
+    t, _ = medir(lambda: [claves_tabla.clave(i) for i in range(0, len(tabla), 3)])
+    fila("clave de una fila: precalculada (1/3 filas)", t)
+
+    tabla.descartar_auxiliares()
+    t, indice = medir(lambda: (tabla.descartar_auxiliares(), IndiceNombres(tabla))[1], 1)
+    fila("índice de nombres: construcción", t)
+    t, filas = medir(lambda: [indice.buscar(nombre) for nombre in nombres])
+    fila(f"índice de nombres: {args.consultas} búsquedas", t)
+    assert all(f is not None for f in filas)
+    t, _ = medir(lambda: (tabla.descartar_auxiliares(), IndiceBusqueda(tabla))[1], 1)
+    fila("índice de búsqueda: construcción", t)
+
+    crudas = [(p["nombre"], str(p["poblacion"]), str(p["superficie"]), azar.choice((" asia", "Asia ", "asia")))
+              for p in paises]
+    t, validas = medir(lambda: [validar_fila(*cruda) for cruda in crudas])
+    fila("validar_fila (continentes memorizados)", t)
+    t, _ = medir(lambda: [c.strip().title() for *_, c in crudas])
+    fila("solo strip().title() de cada continente", t)
+    distintas = len({id(p["continente"]) for p in validas})
+    print(f"\nCadenas de continente distintas entre {len(validas):,} filas válidas: {distintas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark: ordenamiento por inserción original contra el motor de ordenamiento nuevo.
+
+Uso: python benchmarks/bench_ordenamiento.py [--tamanos 1000,100000,1000000] [--max-insercion 20000]
+
+El ordenamiento por inserción es O(n²): por encima de --max-insercion no se ejecuta y se
+informa una estimación extrapolada cuadráticamente desde el mayor tamaño medido."""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos_sinteticos import generar_paises  # noqa: E402
+from ordenamiento import ordenar_registros  # noqa: E402
+
+
+def ordenar_por_insercion(lista_paises, clave, opcion_orden):
+    """Copia de la rutina original de ordenar_paises (sin la impresión), como referencia."""
+    n = len(lista_paises)
+    resultados_ordenados = lista_paises
+    for i in range(1, n):
+        pais_actual = resultados_ordenados[i]
+        valor_actual = pais_actual[clave]
+        j = i - 1
+        while j >= 0:
+            valor_comparacion = resultados_ordenados[j][clave]
+            if opcion_orden == 'd':
+                debe_moverse = valor_comparacion < valor_actual
+            else:
+                debe_moverse = valor_comparacion > valor_actual
+            if debe_moverse:
+                resultados_ordenados[j + 1] = resultados_ordenados[j]
+                j -= 1
+            else:
+                break
+        resultados_ordenados[j + 1] = pais_actual
+    return resultados_ordenados
+
+
+def medir(funcion, *argumentos):
+    inicio = time.perf_counter()
+    funcion(*argumentos)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", default="1000,100000,1000000")
+    parser.add_argument("--max-insercion", type=int, default=20000)
+    args = parser.parse_args()
+
+    tamanos = [int(t) for t in args.tamanos.split(',')]
+    referencia = None  # (n, segundos) del mayor tamaño medido con inserción
+
+    print(f"{'Filas':>10} {'Inserción (s)':>16} {'Motor 1 clave (s)':>18} {'Motor 2 claves (s)':>19}")
+    for n in tamanos:
+        paises = generar_paises(n)
+
+        if n <= args.max_insercion:
+            t_insercion = medir(ordenar_por_insercion, list(paises), 'poblacion', 'd')
+            referencia = (n, t_insercion)
+            insercion_str = f"{t_insercion:.4f}"
+        elif referencia:
+            n_ref, t_ref = referencia
+            insercion_str = f"~{t_ref * (n / n_ref) ** 2:.0f} (est.)"
+        else:
+            insercion_str = "omitido"
+
+        t_motor = medir(ordenar_registros, paises, '-poblacion')
+        t_multiple = medir(ordenar_registros, paises, 'continente,-poblacion')
+        print(f"{n:>10} {insercion_str:>16} {t_motor:>18.4f} {t_multiple:>19.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark de índices ordenados: ordenar cada vez contra indices.ColumnaOrdenada mantenida.
+
+Uso: python benchmarks/bench_ranking.py [--filas 1000000] [--operaciones 1000]
+
+Se mide ordenar toda la tabla, pedir los 10 países más poblados de un continente, y el
+costo de mantener los índices al agregar y modificar países."""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import consultas  # noqa: E402
+from datos_sinteticos import generar_paises  # noqa: E402
+from indices import CAMPOS_ORDENABLES, columna_ordenada  # noqa: E402
+from ordenamiento import ordenar_indices  # noqa: E402
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+def medir(funcion, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--operaciones", type=int, default=1000)
+    args = parser.parse_args()
+
+    tabla = TablaPaises(generar_paises(args.filas))
+    poblacion = tabla.poblacion
+    asia = tabla.codigo_existente("Asia")
+
+    def ordenar_todo(descendente):
+        return sorted(range(len(tabla)), key=poblacion.__getitem__, reverse=descendente)
+
+    def top_ordenando():
+        filas = [i for i in range(len(tabla)) if tabla.codigo_continente[i] == asia]
+        return sorted(filas, key=poblacion.__getitem__, reverse=True)[:10]
+
+    t_construccion, _ = medir(lambda: [columna_ordenada(tabla, campo) for campo in CAMPOS_ORDENABLES])
+    print(f"Construcción de los índices ({', '.join(CAMPOS_ORDENABLES)}): {t_construccion:.3f} s\n")
+
+    print(f"{'Operación':<40}{'Ordenando (ms)':>16}{'Índice (ms)':>14}")
+    for titulo, descendente in (("ordenar por población (asc)", False), ("ordenar por población (desc)", True)):
+        t_orden, esperado = medir(lambda: ordenar_todo(descendente))
+        t_indice, obtenido = medir(lambda: ordenar_indices(tabla, ('poblacion', 'd' if descendente else 'a')))
+        assert list(obtenido) == esperado
+        print(f"{titulo:<40}{t_orden * 1000:>16.1f}{t_indice * 1000:>14.1f}")
+
+    t_orden, esperado = medir(top_ordenando)
+    t_indice, obtenido = medir(lambda: consultas.ranking(tabla, 'poblacion', 10, continente="Asia"), 100)
+    assert list(obtenido.indices) == esperado
+    print(f"{'10 más poblados de Asia':<40}{t_orden * 1000:>16.1f}{t_indice * 1000:>14.3f}")
+
+    azar = random.Random(7)
+    inicio = time.perf_counter()
+    for k in range(args.operaciones):
+        tabla.append({"nombre": f"Nuevo {k}", "poblacion": azar.randint(1_000, 1_500_000_000),
+                      "superficie": azar.randint(1, 17_100_000), "continente": "Asia"})
+    t_altas = (time.perf_counter() - inicio) / args.operaciones
+
+    inicio = time.perf_counter()
+    for _ in range(args.operaciones):
+        tabla[azar.randrange(len(tabla))]['poblacion'] = azar.randint(1_000, 1_500_000_000)
+    t_cambios = (time.perf_counter() - inicio) / args.operaciones
+
+    assert list(ordenar_indices(tabla, 'poblacion')) == ordenar_todo(False)
+    print(f"\nAlta con los 3 índices mantenidos: {t_altas * 1e6:.0f} µs por país")
+    print(f"Modificación de población con índice: {t_cambios * 1e6:.0f} µs por cambio")
+
+
+if __name__ == "__main__":
+    main()
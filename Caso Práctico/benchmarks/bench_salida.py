@@ -0,0 +1,60 @@
+"""Benchmark de salida: un print por fila (mostrar_paises anterior) contra salida.escribir_paises.
+
+Uso: python benchmarks/bench_salida.py [--filas 1000000]
+
+La salida se escribe en os.devnull, así que se mide el costo de formatear y de las
+llamadas de escritura, no el del terminal. Se informan filas por segundo de cada formato."""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import salida  # noqa: E402
+from datos_sinteticos import generar_paises  # noqa: E402
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+def mostrar_paises_por_fila(paises):
+    """Versión anterior de mostrar_paises: un print y dos reemplazos por fila."""
+    print("-" * 75)
+    print(f"{'Nombre':<20}{'Población':<18}{'Superficie (km²)':<20}{'Continente'}")
+    print("-" * 75)
+    for p in paises:
+        poblacion_str = f"{p['poblacion']:,}".replace(",", ".")
+        superficie_str = f"{p['superficie']:,}".replace(",", ".")
+        print(f"{p['nombre']:<20}{poblacion_str:<18}{superficie_str:<20}{p['continente']}")
+    print("-" * 75)
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    tabla = TablaPaises(generar_paises(args.filas))
+
+    with open(os.devnull, 'w', encoding='utf-8') as destino:
+        with contextlib.redirect_stdout(destino):
+            t_anterior = medir(lambda: mostrar_paises_por_fila(tabla))
+        tiempos = [(f"escribir_paises '{formato}'",
+                    medir(lambda: salida.escribir_paises(tabla, formato, destino=destino)))
+                   for formato in ('tabla', 'csv', 'tsv', 'jsonl')]
+
+    print(f"{'Método':<32}{'Tiempo (s)':>12}{'Filas/s':>14}{'Mejora':>9}")
+    print(f"{'print por fila (tabla)':<32}{t_anterior:>12.3f}{args.filas / t_anterior:>14,.0f}{'1.0x':>9}")
+    for titulo, tiempo in tiempos:
+        print(f"{titulo:<32}{tiempo:>12.3f}{args.filas / tiempo:>14,.0f}{t_anterior / tiempo:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
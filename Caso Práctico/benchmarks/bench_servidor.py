@@ -0,0 +1,187 @@
+"""Prueba de carga del servidor (servidor.py) con muchos clientes simultáneos.
+
+Uso: python benchmarks/bench_servidor.py [--filas 100000] [--clientes 50] [--pedidos 200]
+                                         [--escrituras 0.1] [--calientes 5] [--direccion unix:RUTA]
+
+Sin --direccion arma un CSV sintético de --filas países en un directorio temporal y levanta
+el servidor en el mismo proceso (con el bloqueo del archivo tomado, como el subcomando serve).
+Cada cliente abre su propia conexión y envía --pedidos pedidos: lecturas variadas (get,
+search, filter, stats, top) y una fracción --escrituras de incrementos de población sobre
+--calientes países, hechos como lectura-modificación-escritura con versión: si otro cliente
+modificó el país en el medio, el servidor responde un conflicto y el cliente reintenta.
+
+Informa pedidos por segundo, latencias p50/p95/p99 por operación y la cantidad de
+conflictos, y verifica que no se perdió ningún incremento: en memoria, y (con el servidor
+propio) al volver a cargar el CSV compactado al cerrar. Verifica también que otro proceso
+no puede tomar el bloqueo mientras el servidor lo tiene."""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import servidor  # noqa: E402
+from Gestion_Info_Paises import cargar_datos_csv, escritor_csv  # noqa: E402
+from bloqueo import ArchivoBloqueado, BloqueoArchivo  # noqa: E402
+from datos_sinteticos import CONTINENTES, escribir_csv, generar_paises  # noqa: E402
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def pedido_de_lectura(azar, filas):
+    """(operación, datos) de una lectura al azar."""
+    tipo = azar.randrange(5)
+    if tipo == 0:
+        return 'get', {"nombre": f"pais {azar.randrange(filas):07d}"}
+    if tipo == 1:
+        return 'search', {"texto": f"{azar.randrange(filas):07d}"[2:], "limite": 20}
+    if tipo == 2:
+        minimo = azar.randrange(0, 1_000_000_000, 1_000_000)
+        return 'filter', {"continente": azar.choice(CONTINENTES), "poblacion": [minimo, minimo + 50_000_000],
+                          "por": "-superficie", "limite": 20}
+    if tipo == 3:
+        return 'stats', {"campo": azar.choice(('poblacion', 'superficie', 'densidad')),
+                         "continente": azar.choice(CONTINENTES + [None])}
+    return 'top', {"campo": azar.choice(('poblacion', 'densidad')), "cantidad": 10}
+
+
+async def incrementar(cliente, nombre, cantidad):
+    """Suma 'cantidad' a la población del país con versionado optimista. Retorna los conflictos."""
+    conflictos = 0
+    while True:
+        leido = await cliente.pedir('get', nombre=nombre)
+        pais = leido["resultado"]
+        respuesta = await cliente.pedir('update', nombre=nombre, version=pais["version"],
+                                        campos={"poblacion": pais["pais"]["poblacion"] + cantidad})
+        if respuesta["ok"]:
+            return conflictos
+        if respuesta["tipo"] != "conflicto":
+            raise RuntimeError(respuesta["error"])
+        conflictos += 1
+
+
+async def cliente_de_carga(direccion, numero, args, calientes, latencias, incrementos):
+    azar = random.Random(numero)
+    cliente = await servidor.ClientePaises.conectar(direccion)
+    conflictos = 0
+    try:
+        for _ in range(args.pedidos):
+            inicio = time.perf_counter()
+            if azar.random() < args.escrituras:
+                nombre = azar.choice(calientes)
+                conflictos += await incrementar(cliente, nombre, 1)
+                incrementos[nombre] += 1
+                operacion = 'update (get + update)'
+            else:
+                operacion, datos = pedido_de_lectura(azar, args.filas)
+                respuesta = await cliente.pedir(operacion, **datos)
+                if not respuesta["ok"]:
+                    raise RuntimeError(respuesta["error"])
+            latencias.setdefault(operacion, []).append(time.perf_counter() - inicio)
+    finally:
+        await cliente.cerrar()
+    return conflictos
+
+
+async def poblaciones(direccion, nombres):
+    cliente = await servidor.ClientePaises.conectar(direccion)
+    try:
+        return {nombre: (await cliente.pedir('get', nombre=nombre))["resultado"]["pais"]["poblacion"]
+                for nombre in nombres}
+    finally:
+        await cliente.cerrar()
+
+
+async def carga(direccion, args):
+    """Ejecuta los clientes contra el servidor. Retorna (duración, latencias, conflictos, incrementos)."""
+    calientes = [f"Pais {i:07d}" for i in range(min(args.calientes, args.filas))]
+    latencias = {}
+    incrementos = dict.fromkeys(calientes, 0)
+    iniciales = await poblaciones(direccion, calientes)
+
+    inicio = time.perf_counter()
+    conflictos = await asyncio.gather(*(cliente_de_carga(direccion, numero, args, calientes, latencias, incrementos)
+                                        for numero in range(args.clientes)))
+    duracion = time.perf_counter() - inicio
+
+    finales = await poblaciones(direccion, calientes)
+    perdidos = {n: iniciales[n] + incrementos[n] - finales[n] for n in calientes if iniciales[n] + incrementos[n] != finales[n]}
+    assert not perdidos, f"incrementos perdidos: {perdidos}"
+    esperadas = {n: iniciales[n] + incrementos[n] for n in calientes}
+    return duracion, latencias, sum(conflictos), esperadas
+
+
+def informar(args, duracion, latencias, conflictos):
+    total = sum(len(valores) for valores in latencias.values())
+    print(f"{args.clientes} clientes, {total} pedidos en {duracion:.2f} s: {total / duracion:,.0f} pedidos/s, "
+          f"{conflictos} conflictos de versión (reintentados)\n")
+    print(f"{'Operación':<24}{'Pedidos':>9}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}")
+    for operacion, valores in sorted(latencias.items()):
+        print(f"{operacion:<24}{len(valores):>9}" + "".join(f"{percentil(valores, p) * 1000:>11.2f}" for p in (50, 95, 99)))
+
+
+async def con_servidor_propio(ruta, args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        tabla = cargar_datos_csv(ruta, usar_instantanea=False)
+    servidor_paises = servidor.ServidorPaises(tabla, ruta, escritor_csv)
+    servidor_paises.preparar()
+    direccion = servidor.direccion_por_defecto(ruta)
+    atendiendo = await servidor.iniciar(servidor_paises, direccion)
+    try:
+        resultado = await carga(direccion, args)
+    finally:
+        atendiendo.close()
+        await atendiendo.wait_closed()
+        await servidor_paises.cerrar() # compacta el CSV con todos los cambios
+    print(f"Escrituras aplicadas por el servidor: {servidor_paises.escrituras}")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--pedidos", type=int, default=200, help="pedidos por cliente")
+    parser.add_argument("--escrituras", type=float, default=0.1, help="fracción de pedidos que son incrementos")
+    parser.add_argument("--calientes", type=int, default=5, help="países sobre los que se concentran las escrituras")
+    parser.add_argument("--direccion", help="servidor ya levantado (subcomando serve) en lugar de uno propio")
+    args = parser.parse_args()
+
+    if args.direccion:
+        duracion, latencias, conflictos, _ = asyncio.run(carga(args.direccion, args))
+        informar(args, duracion, latencias, conflictos)
+        print("\nSin incrementos perdidos (verificado con get).")
+        return
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "paises.csv")
+        escribir_csv(ruta, generar_paises(args.filas))
+        with BloqueoArchivo(ruta, "bench_servidor"):
+            try:
+                BloqueoArchivo(ruta, "segundo escritor").adquirir()
+                raise AssertionError("se tomó el bloqueo dos veces")
+            except ArchivoBloqueado:
+                pass
+            duracion, latencias, conflictos, esperadas = asyncio.run(con_servidor_propio(ruta, args))
+        informar(args, duracion, latencias, conflictos)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            recargada = cargar_datos_csv(ruta, usar_instantanea=False)
+        for nombre, poblacion in esperadas.items():
+            assert recargada.valor(recargada.indice_de(nombre), 'poblacion') == poblacion, nombre
+        print("\nSin incrementos perdidos (verificado en memoria y al recargar el CSV). "
+              "Un segundo escritor no pudo tomar el bloqueo.")
+
+
+if __name__ == "__main__":
+    main()
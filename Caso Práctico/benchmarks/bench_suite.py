@@ -0,0 +1,190 @@
+"""Suite de benchmarks: mide todas las operaciones públicas en varios tamaños y compara con una línea base.
+
+Uso: python benchmarks/bench_suite.py [--tamanos 1000,10000,100000] [--sesgo 0] [--malformadas 0.01]
+                                      [--repeticiones 3] [--salida resultados.json]
+                                      [--base linea_base.json] [--guardar-base] [--umbral 0.25]
+
+Para cada tamaño se genera un CSV sintético (datos_sinteticos.py) y se mide la carga (CSV e
+instantánea), el guardado, las búsquedas, cada filtro, cada clave de ordenamiento en los dos
+sentidos y cada estadística. Cada operación se mide en frío (sin los índices que la tabla
+guarda de consultas anteriores) y se toma el mejor de --repeticiones intentos.
+
+Los resultados se comparan con una línea base (por defecto benchmarks/linea_base.json): se
+informa cada operación que tarde más de (1 + umbral) veces lo registrado en la base (y al
+menos --minimo-ms más, para no confundir ruido con regresiones) y el programa termina con
+código 1 si hubo alguna. Con --salida los resultados se escriben además en otro archivo JSON.
+
+Los tiempos dependen de la máquina, así que la base no se guarda en el repositorio (está en
+.gitignore): la primera ejecución la crea con sus resultados y las siguientes se comparan
+con ella. Después de un cambio que mejore o empeore los tiempos a propósito, --guardar-base
+la reemplaza con los resultados nuevos (desde Caso Práctico):
+
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --guardar-base"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linea_base.json")
+
+import consultas  # noqa: E402
+import estadisticas  # noqa: E402
+from Gestion_Info_Paises import cargar_datos_csv, escribir_datos_csv  # noqa: E402
+from busqueda import buscar_paises  # noqa: E402
+from datos_sinteticos import escribir_csv, generar_paises  # noqa: E402
+from indices import grupos_continente  # noqa: E402
+from ordenamiento import ordenar_registros  # noqa: E402
+
+VERSION_RESULTADOS = 1
+
+CLAVES_ORDEN = ('nombre', 'poblacion', 'superficie', 'densidad', 'continente')
+
+
+def operaciones(ruta, directorio, filas):
+    """Lista de (nombre, función(tabla)) con las operaciones a medir."""
+    medio = f"Pais {filas // 2:07d}"
+    copia = os.path.join(directorio, "guardado.csv")
+    lista = [
+        ("carga CSV", lambda tabla: cargar_datos_csv(ruta, usar_instantanea=False)),
+        ("carga instantánea", lambda tabla: cargar_datos_csv(ruta)),
+        # escribir_datos_csv y no guardar_datos_csv: la tabla no tiene cambios y este no escribiría nada
+        ("guardado CSV", lambda tabla: escribir_datos_csv(copia, tabla)),
+        ("búsqueda exacta", lambda tabla: buscar_paises(tabla, medio)),
+        ("búsqueda por prefijo", lambda tabla: buscar_paises(tabla, medio[:-2], limite=50)),
+        ("búsqueda aproximada", lambda tabla: buscar_paises(tabla, "Pias" + medio[4:], True, 50)),
+        ("filtro continente", lambda tabla: consultas.filtrar(tabla, continente="Asia")),
+        ("filtro población", lambda tabla: consultas.filtrar(tabla, poblacion=(1_000_000, 50_000_000))),
+        ("filtro superficie", lambda tabla: consultas.filtrar(tabla, superficie=(None, 100_000))),
+        ("filtro densidad", lambda tabla: consultas.filtrar(tabla, densidad=(100, 1_000))),
+        ("filtro combinado", lambda tabla: consultas.filtrar(tabla, continente="Asia", poblacion=(1_000_000, None),
+                                                             superficie=(None, 1_000_000))),
+    ]
+    for clave in CLAVES_ORDEN:
+        lista.append((f"orden {clave}", lambda tabla, clave=clave: ordenar_registros(tabla, clave)))
+        lista.append((f"orden -{clave}", lambda tabla, clave=clave: ordenar_registros(tabla, [(clave, 'd')])))
+    lista += [
+        ("orden continente,-poblacion", lambda tabla: ordenar_registros(tabla, "continente,-poblacion")),
+        ("resumen población", lambda tabla: estadisticas.motor_estadisticas(tabla).resumen('poblacion')),
+        ("resumen superficie", lambda tabla: estadisticas.motor_estadisticas(tabla).resumen('superficie')),
+        ("resumen densidad", lambda tabla: estadisticas.motor_estadisticas(tabla).resumen('densidad')),
+        ("resumen por continente", lambda tabla: estadisticas.motor_estadisticas(tabla).resumen_por_continente('poblacion')),
+        ("conteo por continente", lambda tabla: grupos_continente(tabla).conteo()),
+        ("ranking 10 más poblados", lambda tabla: consultas.ranking(tabla, 'poblacion', 10)),
+        ("ranking 10 menores de Asia", lambda tabla: consultas.ranking(tabla, 'superficie', 10, False, "Asia")),
+    ]
+    return lista
+
+
+def medir_tamano(filas, args, directorio):
+    """Mediciones {operación: {"segundos", "filas_por_segundo"}} para un tamaño de tabla."""
+    ruta = os.path.join(directorio, f"paises_{filas}.csv")
+    escribir_csv(ruta, generar_paises(filas, args.semilla, args.sesgo), args.malformadas, args.semilla)
+
+    resultados = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        tabla = cargar_datos_csv(ruta) # genera también la instantánea
+        for nombre, operacion in operaciones(ruta, directorio, filas):
+            mejor = None
+            for _ in range(args.repeticiones):
+                tabla.descartar_auxiliares() # en frío: sin índices de consultas anteriores
+                inicio = time.perf_counter()
+                operacion(tabla)
+                duracion = time.perf_counter() - inicio
+                mejor = duracion if mejor is None else min(mejor, duracion)
+            resultados[nombre] = {"segundos": mejor, "filas_por_segundo": filas / mejor if mejor > 0 else 0.0}
+    return resultados
+
+
+def comparar(resultados, base, umbral, minimo):
+    """Lista de (tamaño, operación, segundos base, segundos actuales) que empeoraron más que el umbral."""
+    regresiones = []
+    for tamano, operaciones_tamano in resultados.items():
+        for nombre, datos in operaciones_tamano.items():
+            anterior = base.get(tamano, {}).get(nombre)
+            if anterior is None:
+                continue
+            antes, ahora = anterior["segundos"], datos["segundos"]
+            if ahora > antes * (1 + umbral) and ahora - antes > minimo:
+                regresiones.append((tamano, nombre, antes, ahora))
+    return regresiones
+
+
+def guardar(documento, ruta):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(documento, archivo, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", default="1000,10000,100000")
+    parser.add_argument("--sesgo", type=float, default=0.0)
+    parser.add_argument("--malformadas", type=float, default=0.01)
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", help="archivo JSON donde escribir los resultados")
+    parser.add_argument("--base", default=LINEA_BASE,
+                        help="resultados JSON anteriores contra los que comparar (se crea si no existe)")
+    parser.add_argument("--guardar-base", action="store_true",
+                        help="reemplaza la base con los resultados de esta ejecución en lugar de comparar")
+    parser.add_argument("--umbral", type=float, default=0.25, help="empeoramiento relativo tolerado (0.25 = 25%%)")
+    parser.add_argument("--minimo-ms", type=float, default=1.0, help="diferencia absoluta mínima para una regresión")
+    args = parser.parse_args()
+
+    tamanos = [int(t) for t in args.tamanos.split(",")]
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        for filas in tamanos:
+            resultados[str(filas)] = medir_tamano(filas, args, directorio)
+
+    nombres = list(resultados[str(tamanos[0])])
+    print(f"{'Operación (ms)':<30}" + "".join(f"{filas:>12,}" for filas in tamanos))
+    for nombre in nombres:
+        print(f"{nombre:<30}" + "".join(f"{resultados[str(filas)][nombre]['segundos'] * 1000:>12.2f}"
+                                          for filas in tamanos))
+
+    documento = {
+        "version": VERSION_RESULTADOS,
+        "metadatos": {"fecha": datetime.datetime.now().isoformat(timespec='seconds'),
+                      "python": platform.python_version(), "plataforma": platform.platform(),
+                      "nucleos": os.cpu_count()},
+        "parametros": {"sesgo": args.sesgo, "malformadas": args.malformadas, "semilla": args.semilla,
+                       "repeticiones": args.repeticiones},
+        "resultados": resultados,
+    }
+    if args.salida:
+        guardar(documento, args.salida)
+        print(f"\nResultados guardados en '{args.salida}'.")
+
+    if args.guardar_base or not os.path.exists(args.base):
+        guardar(documento, args.base)
+        print(f"\nLínea base {'actualizada' if args.guardar_base else 'creada'} en '{args.base}'; "
+              "las próximas ejecuciones se comparan con ella.")
+        return 0
+
+    with open(args.base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    if base.get("parametros") != documento["parametros"]:
+        print("\nAtención: la base se midió con otros parámetros (sesgo, malformadas, semilla o repeticiones).")
+    regresiones = comparar(resultados, base["resultados"], args.umbral, args.minimo_ms / 1000)
+    if not regresiones:
+        print(f"\nSin regresiones respecto de '{args.base}' (umbral {args.umbral:.0%}).")
+        return 0
+    print(f"\nRegresiones respecto de '{args.base}' (umbral {args.umbral:.0%}):")
+    for tamano, nombre, antes, ahora in regresiones:
+        print(f"  {nombre} ({int(tamano):,} filas): {antes * 1000:.2f} ms -> {ahora * 1000:.2f} ms "
+              f"({ahora / antes - 1:+.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
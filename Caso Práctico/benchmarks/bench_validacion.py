@@ -0,0 +1,96 @@
+"""Benchmark del validador compilado de filas (carga_csv.compilar_validador) contra validar fila por fila.
+
+Uso: python benchmarks/bench_validacion.py [--filas 1000000] [--malformadas 0.01] [--repeticiones 3]
+
+La referencia es la validación anterior: una llamada a validar_fila por fila, que a su vez
+llama a una función por campo (validar_entero_desde_archivo -> es_entero_positivo), y
+motivo_rechazo para las rechazadas. El validador compilado revisa todos los campos en una
+sola expresión por fila. Se mide sobre las filas ya leídas (solo validación), con el
+informe de rechazos con muestras y con archivo de rechazos, y la lectura completa del CSV."""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from carga_csv import InformeRechazos, leer_bloques, motivo_rechazo, validar_fila, validar_filas  # noqa: E402
+from datos_sinteticos import escribir_csv, generar_paises  # noqa: E402
+
+
+def validar_por_campo(filas, motivos):
+    """Validación de referencia (la de antes del validador compilado)."""
+    for fila in filas:
+        if len(fila) < 4:
+            if fila:
+                motivos["faltan columnas"] = motivos.get("faltan columnas", 0) + 1
+            continue
+        pais = validar_fila(fila[0], fila[1], fila[2], fila[3])
+        if pais is None:
+            motivo = motivo_rechazo(fila[0], fila[1], fila[2], fila[3])
+            motivos[motivo] = motivos.get(motivo, 0) + 1
+            continue
+        yield pais
+
+
+def medir(funcion, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--malformadas", type=float, default=0.01)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "paises.csv")
+        rechazos = os.path.join(directorio, "rechazos.csv")
+        invalidas = escribir_csv(ruta, generar_paises(args.filas), args.malformadas)
+        with open(ruta, encoding='utf-8', newline='') as archivo:
+            filas = list(csv.reader(archivo))[1:]
+        print(f"{args.filas:,} filas, {invalidas:,} inválidas\n")
+
+        def por_campo():
+            motivos = {}
+            return sum(1 for _ in validar_por_campo(filas, motivos)), motivos
+
+        def compilado(archivo_rechazos=None):
+            informe = InformeRechazos(archivo_rechazos=archivo_rechazos)
+            informe.iniciar(['nombre', 'poblacion', 'superficie', 'continente'])
+            try:
+                return sum(1 for _ in validar_filas(filas, (0, 1, 2, 3), informe=informe)), informe.motivos
+            finally:
+                informe.cerrar()
+
+        variantes = [("validar_fila por campo", por_campo),
+                     ("compilado + muestras", compilado),
+                     ("compilado + archivo de rechazos", lambda: compilado(rechazos))]
+
+        print(f"{'Validación':<34}{'Tiempo (ms)':>13}{'Filas/s':>14}{'Mejora':>9}")
+        base = esperado = None
+        for titulo, funcion in variantes:
+            tiempo, resultado = medir(funcion, args.repeticiones)
+            if base is None:
+                base, esperado = tiempo, resultado
+            assert resultado == esperado, titulo
+            print(f"{titulo:<34}{tiempo * 1000:>13.0f}{args.filas / tiempo:>14,.0f}{base / tiempo:>8.2f}x")
+
+        tiempo, _ = medir(lambda: sum(len(bloque) for bloque in leer_bloques(ruta)), args.repeticiones)
+        print(f"\n{'leer_bloques (CSV + validación)':<34}{tiempo * 1000:>13.0f}{args.filas / tiempo:>14,.0f}")
+        with open(rechazos, encoding='utf-8') as archivo:
+            print(f"Archivo de rechazos: {sum(1 for _ in archivo) - 1:,} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Generador de países sintéticos para los benchmarks (mismo esquema que paises.csv).
+
+Uso: python benchmarks/datos_sinteticos.py salida.csv [--filas 100000] [--sesgo 1.0] [--malformadas 0.01]
+
+Con sesgo 0 (por defecto) los continentes son equiprobables y población y superficie son
+uniformes. Con sesgo > 0 los continentes siguen una ley de Zipf (el peso del k-ésimo es
+1 / k^sesgo) y población y superficie tienen cola pesada (Pareto): muchos países chicos
+y pocos muy grandes, como en los datos reales. Los datos son reproducibles con la semilla."""
+
+import argparse
+import csv
+import random
+
+
+CONTINENTES = ['Africa', 'America', 'Asia', 'Europa', 'Oceania']
+
+POBLACION_MAXIMA = 1_500_000_000
+SUPERFICIE_MAXIMA = 17_100_000
+
+# Filas inválidas que puede generar escribir_csv (una por cada motivo de rechazo de la carga)
+MALFORMADAS = (
+    lambda p: ["", p['poblacion'], p['superficie'], p['continente']],             # nombre vacío
+    lambda p: [p['nombre'], "sin dato", p['superficie'], p['continente']],        # población no válida
+    lambda p: [p['nombre'], p['poblacion'], -p['superficie'], p['continente']],   # superficie no válida
+    lambda p: [p['nombre'], p['poblacion'], p['superficie'], ""],                 # continente vacío
+    lambda p: [p['nombre'], p['poblacion']],                                      # faltan columnas
+)
+
+
+def _cola_pesada(azar, sesgo, maximo):
+    # Pareto con índice 1/sesgo y mínimo en la millonésima parte del máximo; los valores que lo superan se recortan
+    return min(maximo, max(1, int(maximo / 1_000_000 * azar.paretovariate(1 / sesgo))))
+
+
+def generar_paises(cantidad, semilla=1234, sesgo=0.0):
+    """Genera una lista de diccionarios país con valores pseudoaleatorios reproducibles."""
+    azar = random.Random(semilla)
+    paises = []
+    if not sesgo:
+        for i in range(cantidad):
+            paises.append({
+                "nombre": f"Pais {i:07d}",
+                "poblacion": azar.randint(1_000, POBLACION_MAXIMA),
+                "superficie": azar.randint(1, SUPERFICIE_MAXIMA),
+                "continente": azar.choice(CONTINENTES),
+            })
+        return paises
+
+    pesos = [1 / (k + 1) ** sesgo for k in range(len(CONTINENTES))]
+    continentes = azar.choices(CONTINENTES, weights=pesos, k=cantidad)
+    for i in range(cantidad):
+        paises.append({
+            "nombre": f"Pais {i:07d}",
+            "poblacion": max(1_000, _cola_pesada(azar, sesgo, POBLACION_MAXIMA)),
+            "superficie": _cola_pesada(azar, sesgo, SUPERFICIE_MAXIMA),
+            "continente": continentes[i],
+        })
+    return paises
+
+
+def escribir_csv(ruta, paises, malformadas=0.0, semilla=1234):
+    """Escribe los países en un CSV con el encabezado de paises.csv, reemplazando una fracción
+    'malformadas' de las filas (elegidas al azar) por filas inválidas de los distintos tipos.
+    Retorna la cantidad de filas inválidas escritas."""
+    azar = random.Random(semilla)
+    invalidas = 0
+    with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+        escritor_csv = csv.writer(archivo)
+        escritor_csv.writerow(['nombre', 'poblacion', 'superficie', 'continente'])
+        for p in paises:
+            if malformadas and azar.random() < malformadas:
+                escritor_csv.writerow(MALFORMADAS[invalidas % len(MALFORMADAS)](p))
+                invalidas += 1
+            else:
+                escritor_csv.writerow([p['nombre'], p['poblacion'], p['superficie'], p['continente']])
+    return invalidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("salida")
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--sesgo", type=float, default=0.0)
+    parser.add_argument("--malformadas", type=float, default=0.0, help="fracción de filas inválidas (0 a 1)")
+    parser.add_argument("--semilla", type=int, default=1234)
+    args = parser.parse_args()
+
+    invalidas = escribir_csv(args.salida, generar_paises(args.filas, args.semilla, args.sesgo), args.malformadas,
+                             args.semilla)
+    print(f"{args.salida}: {args.filas} filas ({invalidas} inválidas)")
+
+
+if __name__ == "__main__":
+    main()
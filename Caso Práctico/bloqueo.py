@@ -0,0 +1,114 @@
+"""Bloqueo consultivo del archivo de países para que dos procesos no lo modifiquen a la vez.
+
+Cada proceso carga su propia copia del CSV y persiste sus cambios en el registro y al
+compactar; si dos procesos modifican el mismo archivo, la compactación de uno reescribe
+el CSV con su copia y pierde los cambios del otro. Por eso el menú, los subcomandos que
+modifican datos y el servidor toman un bloqueo exclusivo sobre '<csv>.lock' antes de
+cargar los datos y lo conservan hasta terminar. Las consultas de solo lectura no lo toman.
+
+El bloqueo es del sistema operativo (fcntl.flock en sistemas tipo Unix, msvcrt.locking en
+Windows): se libera solo si el proceso termina, aunque sea de forma abrupta. En el archivo
+se anota quién lo tiene, para informarlo al que no lo consigue.
+"""
+
+import os
+import time
+
+try:
+    import fcntl # sistemas tipo Unix
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt # Windows
+except ImportError:
+    msvcrt = None
+
+
+INTERVALO_REINTENTO = 0.05 # Segundos entre intentos mientras se espera el bloqueo
+
+
+class ArchivoBloqueado(Exception):
+    """Otro proceso tiene el bloqueo del archivo."""
+
+
+def ruta_bloqueo(nombre_archivo):
+    """Ruta del archivo de bloqueo asociado al archivo CSV."""
+    return nombre_archivo + ".lock"
+
+
+def _intentar(descriptor):
+    """Intenta tomar el bloqueo sin esperar. Retorna True si lo consiguió."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt is not None:
+            os.lseek(descriptor, 0, os.SEEK_SET)
+            msvcrt.locking(descriptor, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+class BloqueoArchivo:
+    """Bloqueo exclusivo de un archivo de países. Se usa con 'with' o con adquirir()/liberar()."""
+
+    def __init__(self, nombre_archivo, descripcion="proceso", espera=0.0):
+        self.ruta = ruta_bloqueo(nombre_archivo)
+        self.descripcion = descripcion # se anota en el archivo de bloqueo (por ejemplo 'menú' o 'servidor')
+        self.espera = espera
+        self._descriptor = None
+
+    def adquirir(self, espera=None):
+        """Toma el bloqueo, esperando como mucho 'espera' segundos (0 = sin esperar).
+        Lanza ArchivoBloqueado si otro proceso lo sigue teniendo."""
+        if self._descriptor is not None:
+            return self
+        espera = self.espera if espera is None else espera
+        descriptor = os.open(self.ruta, os.O_RDWR | os.O_CREAT, 0o644)
+        limite = time.monotonic() + espera
+        while not _intentar(descriptor):
+            if time.monotonic() >= limite:
+                titular = self._titular(descriptor)
+                os.close(descriptor)
+                raise ArchivoBloqueado(f"El archivo está siendo modificado por otro proceso ({titular}). "
+                                       "Espere a que termine o use el servidor (subcomando serve).")
+            time.sleep(INTERVALO_REINTENTO)
+
+        # El bloqueo es sobre el primer byte: la descripción se escribe después de él.
+        os.ftruncate(descriptor, 1)
+        os.lseek(descriptor, 1, os.SEEK_SET)
+        os.write(descriptor, f"pid {os.getpid()}, {self.descripcion}".encode('utf-8'))
+        self._descriptor = descriptor
+        return self
+
+    def liberar(self):
+        """Libera el bloqueo (el archivo .lock queda: borrarlo abriría una carrera entre procesos)."""
+        if self._descriptor is None:
+            return
+        descriptor, self._descriptor = self._descriptor, None
+        try:
+            os.ftruncate(descriptor, 0)
+            if fcntl is not None:
+                fcntl.flock(descriptor, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(descriptor, 0, os.SEEK_SET)
+                msvcrt.locking(descriptor, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(descriptor)
+
+    def activo(self):
+        return self._descriptor is not None
+
+    def _titular(self, descriptor):
+        try:
+            os.lseek(descriptor, 1, os.SEEK_SET)
+            texto = os.read(descriptor, 200).decode('utf-8', 'replace').strip()
+        except OSError:
+            texto = ""
+        return texto or "titular desconocido"
+
+    def __enter__(self):
+        return self.adquirir()
+
+    def __exit__(self, *excepcion):
+        self.liberar()
@@ -0,0 +1,180 @@
+"""Índice de búsqueda por nombre (subcadena y prefijo) basado en trigramas.
+
+Cada nombre normalizado (sin acentos ni mayúsculas, ver normalizacion.normalizar) se
+descompone en trigramas; el índice invertido guarda, para cada trigrama, el array de filas
+que lo contienen. Una consulta de 3 o más caracteres solo revisa las filas que contienen
+todos sus trigramas (empezando por el trigrama menos frecuente), en lugar de recorrer
+toda la tabla. Las consultas de 1 o 2 caracteres recorren las claves ya normalizadas.
+Las claves se toman de indices.ClavesNombres, que normaliza cada nombre una sola vez.
+
+El índice se construye la primera vez que se busca y se actualiza al agregar países.
+"""
+
+from array import array
+
+from indices import claves_nombres
+from instrumentacion import medir
+from normalizacion import normalizar
+from tabla_paises import VistaPaises
+
+
+# Orden de los resultados: primero la coincidencia exacta, luego los que empiezan con el
+# texto, los que tienen una palabra que empieza con el texto, el resto de las subcadenas
+# y por último las coincidencias aproximadas (un error de tipeo).
+EXACTA, PREFIJO, PREFIJO_PALABRA, SUBCADENA, APROXIMADA = range(5)
+
+
+def trigramas(clave):
+    """Conjunto de trigramas de una clave normalizada."""
+    return {clave[i:i + 3] for i in range(len(clave) - 2)}
+
+
+def distancia_maxima_uno(a, b):
+    """True si a y b difieren en a lo sumo una edición (inserción, borrado o sustitución)."""
+    if a == b:
+        return True
+    largo_a, largo_b = len(a), len(b)
+    if abs(largo_a - largo_b) > 1:
+        return False
+    if largo_a > largo_b:
+        a, b, largo_a, largo_b = b, a, largo_b, largo_a
+
+    i = 0
+    while i < largo_a and a[i] == b[i]:
+        i += 1
+    if largo_a == largo_b:
+        return a[i + 1:] == b[i + 1:] # sustitución en la posición i
+    return a[i:] == b[i + 1:]         # inserción en b en la posición i
+
+
+def clasificar(consulta, clave):
+    """Categoría de la coincidencia de la consulta dentro de la clave, o None si no coincide."""
+    if clave == consulta:
+        return EXACTA
+    if clave.startswith(consulta):
+        return PREFIJO
+    posicion = clave.find(consulta)
+    if posicion < 0:
+        return None
+    if clave[posicion - 1] == ' ':
+        return PREFIJO_PALABRA
+    return SUBCADENA
+
+
+def coincide_aproximado(consulta, clave):
+    """Coincidencia con un error de tipeo: contra el nombre completo o el comienzo de alguna palabra."""
+    if distancia_maxima_uno(consulta, clave):
+        return True
+    largo = len(consulta)
+    inicios = [0] + [i + 1 for i, c in enumerate(clave) if c == ' ']
+    for inicio in inicios:
+        for extra in (-1, 0, 1):
+            if distancia_maxima_uno(consulta, clave[inicio:inicio + largo + extra]):
+                return True
+    return False
+
+
+class IndiceBusqueda:
+    """Índice invertido de trigramas sobre los nombres normalizados de una TablaPaises."""
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.claves = claves_nombres(tabla).lista() # nombre normalizado de cada fila
+        self.postings = {}     # trigrama -> array('q') de filas
+        for i, clave in enumerate(self.claves):
+            self._indexar(i, clave)
+
+    # Mantenimiento (lo llama la tabla, ver TablaPaises.auxiliar)
+
+    def fila_agregada(self, i):
+        clave = claves_nombres(self.tabla).clave(i)
+        self.claves.append(clave)
+        self._indexar(i, clave)
+
+    def _indexar(self, i, clave):
+        postings = self.postings
+        for trigrama in trigramas(clave):
+            filas = postings.get(trigrama)
+            if filas is None:
+                postings[trigrama] = array('q', (i,))
+            else:
+                filas.append(i)
+
+    def fila_actualizada(self, i, campo, anterior):
+        return True # el nombre no se modifica: el índice sigue siendo válido
+
+    # Consultas
+
+    def _candidatos(self, consulta):
+        """Filas que pueden contener la consulta (todas, si es demasiado corta para usar trigramas)."""
+        grupos = trigramas(consulta)
+        if not grupos:
+            return range(len(self.claves))
+
+        listas = []
+        for trigrama in grupos:
+            filas = self.postings.get(trigrama)
+            if filas is None:
+                return ()
+            listas.append(filas)
+
+        listas.sort(key=len)
+        candidatos = set(listas[0])
+        for filas in listas[1:]:
+            if len(candidatos) < 32:
+                break # pocos candidatos: se verifican directamente con la clave
+            candidatos.intersection_update(filas)
+        return candidatos
+
+    def _candidatos_aproximados(self, consulta):
+        """Filas que pueden estar a una edición de la consulta.
+
+        Una edición altera a lo sumo tres trigramas de la consulta, así que cualquier nombre
+        que coincida conserva al menos uno de cuatro trigramas cualesquiera: alcanza con unir
+        las filas de los cuatro trigramas menos frecuentes."""
+        grupos = trigramas(consulta)
+        if len(grupos) < 4:
+            return range(len(self.claves))
+        listas = sorted((self.postings.get(trigrama, ()) for trigrama in grupos), key=len)
+        candidatos = set()
+        for filas in listas[:4]:
+            candidatos.update(filas)
+        return candidatos
+
+    def buscar(self, texto, tolerar_errores=False, limite=None):
+        """Índices de filas cuyo nombre contiene el texto, ordenados por relevancia.
+
+        Si tolerar_errores es True también se incluyen nombres a una edición de distancia
+        (al final del ranking)."""
+        consulta = normalizar(texto)
+        if not consulta:
+            return []
+
+        claves = self.claves
+        encontrados = []
+        for i in self._candidatos(consulta):
+            categoria = clasificar(consulta, claves[i])
+            if categoria is not None:
+                encontrados.append((categoria, len(claves[i]), claves[i], i))
+
+        if tolerar_errores:
+            vistos = {i for _, _, _, i in encontrados}
+            for i in self._candidatos_aproximados(consulta):
+                if i not in vistos and coincide_aproximado(consulta, claves[i]):
+                    encontrados.append((APROXIMADA, len(claves[i]), claves[i], i))
+
+        encontrados.sort()
+        if limite is not None:
+            encontrados = encontrados[:limite]
+        return [i for _, _, _, i in encontrados]
+
+
+def indice_busqueda(tabla):
+    """IndiceBusqueda de la tabla, construido en la primera búsqueda."""
+    return tabla.auxiliar('busqueda', IndiceBusqueda)
+
+
+@medir()
+def buscar_paises(tabla, texto, tolerar_errores=False, limite=None):
+    """VistaPaises con los países cuyo nombre coincide con el texto, ordenados por relevancia."""
+    return VistaPaises(tabla, indice_busqueda(tabla).buscar(texto, tolerar_errores, limite))
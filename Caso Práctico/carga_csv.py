@@ -0,0 +1,324 @@
+"""Lectura por bloques (streaming) del archivo CSV de países.
+
+Los registros se validan fila por fila y se entregan en bloques de tamaño configurable,
+de modo que quien los consume (la carga completa, un filtro o una estadística) nunca
+necesita tener todo el archivo en memoria al mismo tiempo.
+
+Las reglas de cada campo se declaran en ESQUEMA y se compilan (una vez por orden de
+columnas del encabezado) en una función que valida y convierte todos los campos de la fila
+en una sola pasada, sin una llamada por campo. Las filas rechazadas se registran en un
+InformeRechazos: cantidades por motivo y por campo, las primeras filas como muestra (línea,
+campo y motivo) y, si se pide, todas en un archivo de rechazos.
+"""
+
+import csv
+import sys
+
+from tabla_paises import MAXIMO_ENTERO
+
+
+CLAVES_ENCABEZADO = ['nombre', 'poblacion', 'superficie', 'continente']
+
+TAMANO_BLOQUE = 5000 # Cantidad de registros válidos por bloque entregado
+
+MAXIMO_CONTINENTES = 1024 # Textos de continente distintos que se recuerdan ya normalizados
+
+_continentes = {} # texto leído -> continente normalizado (internado)
+
+MUESTRAS_RECHAZO = 20 # Filas rechazadas que el informe guarda completas (el resto solo se cuenta)
+
+# Campos de una fila: (campo, regla, motivo de rechazo). Si una fila tiene varios campos
+# inválidos se cuenta con el motivo del primero en este orden.
+ESQUEMA = (
+    ('nombre', 'texto', "nombre vacío"),
+    ('continente', 'continente', "continente vacío"),
+    ('poblacion', 'entero_positivo', "población no válida"),
+    ('superficie', 'entero_positivo', "superficie no válida"),
+)
+
+# Regla -> (expresión que convierte el texto {t} en el valor, condición que el valor {v} debe cumplir)
+REGLAS = {
+    'texto': ("{t}.strip().title()", "{v}"),
+    'continente': ("_continentes.get({t}) or normalizar_continente({t})", "{v}"),
+    'entero_positivo': ("int({t}) if {t}.isdecimal() else 0", f"0 < {{v}} <= {MAXIMO_ENTERO}"),
+}
+
+
+# Validaciones
+
+def es_entero_positivo(valor_str):
+    """Verifica si una cadena puede ser un entero positivo (> 0)
+ y en caso afirmativo retorna el valor como entero; si no, retorna False para ser evaluado en la llamada."""
+
+    if not valor_str.isdecimal(): # isdigit acepta '²', que int() no convierte
+        return False
+
+    valor = int(valor_str)
+
+    if valor <= 0 or valor > MAXIMO_ENTERO: # más grande no entra en las columnas de la tabla
+        return False
+
+    return valor
+
+
+def validar_entero_desde_archivo(valor_str):
+    """Función auxiliar para validar las cantidades leídas en el archivo."""
+    valor = es_entero_positivo(valor_str)
+
+    if valor is False:
+            return None
+    else:
+        return valor
+
+
+def normalizar_continente(texto):
+    """Continente con el formato del programa ('  asia ' -> 'Asia').
+
+    Hay pocos continentes y se repiten en todas las filas: el resultado de cada texto leído
+    se recuerda, y se interna (sys.intern) para que todas las filas compartan la misma cadena
+    y las comparaciones entre continentes se resuelvan por identidad."""
+    continente = _continentes.get(texto)
+    if continente is None:
+        continente = sys.intern(texto.strip().title())
+        if len(_continentes) < MAXIMO_CONTINENTES: # un archivo con basura no hace crecer el diccionario
+            _continentes[texto] = continente
+    return continente
+
+
+def validar_fila(nombre, poblacion_str, superficie_str, continente):
+    """Valida los campos de una fila del archivo y retorna el diccionario del país, o None si es inválida."""
+    if nombre is None or poblacion_str is None or superficie_str is None or continente is None:
+        return None # fila con menos columnas que el encabezado
+
+    nombre = nombre.strip().title()
+    continente = normalizar_continente(continente)
+    poblacion = validar_entero_desde_archivo(poblacion_str)
+    superficie = validar_entero_desde_archivo(superficie_str)
+
+    if poblacion is None or superficie is None or not nombre or not continente:
+        return None
+
+    return {
+        "nombre": nombre,
+        "poblacion": poblacion,
+        "superficie": superficie,
+        "continente": continente
+    }
+
+
+def motivo_rechazo(nombre, poblacion_str, superficie_str, continente):
+    """Motivo por el que validar_fila rechaza la fila (solo se calcula para las filas rechazadas)."""
+    if nombre is None or poblacion_str is None or superficie_str is None or continente is None:
+        return "faltan columnas"
+    if not nombre.strip():
+        return "nombre vacío"
+    if not continente.strip():
+        return "continente vacío"
+    if validar_entero_desde_archivo(poblacion_str) is None:
+        return "población no válida"
+    return "superficie no válida"
+
+
+def posiciones_encabezado(encabezado):
+    """Posición de cada clave de CLAVES_ENCABEZADO en la fila de encabezado, o None si falta alguna."""
+    encabezado = [columna.strip() for columna in encabezado]
+    for k in CLAVES_ENCABEZADO:
+        if k not in encabezado:
+            return None
+    return tuple(encabezado.index(k) for k in CLAVES_ENCABEZADO)
+
+
+# Lectura por bloques
+
+class InformeRechazos:
+    """Filas rechazadas al validar: cantidades por motivo y por campo, las primeras
+    'muestras' filas completas y, si se indica archivo_rechazos, todas las filas en un CSV
+    (línea, campo, motivo, errores y las columnas originales) que puede corregirse e importarse."""
+
+    def __init__(self, motivos=None, muestras=MUESTRAS_RECHAZO, archivo_rechazos=None, conservar_filas=False):
+        self.motivos = {} if motivos is None else motivos # motivo -> filas (el primer campo inválido de cada fila)
+        self.campos = {}       # campo -> filas en las que es inválido (una fila puede contar en varios)
+        self.muestras = []     # [{"linea", "campo", "motivo", "errores", "fila"}], las primeras 'muestras'
+        self.maximo_muestras = muestras
+        self.archivo_rechazos = archivo_rechazos
+        self.filas = [] if conservar_filas else None # todas las filas rechazadas (carga en paralelo)
+        self._archivo = None
+        self._escritor = None
+
+    @property
+    def total(self):
+        return sum(self.motivos.values())
+
+    def iniciar(self, encabezado):
+        """Abre el archivo de rechazos (si se pidió) con el encabezado del CSV leído."""
+        if self.archivo_rechazos and self._archivo is None:
+            self._archivo = open(self.archivo_rechazos, 'w', encoding='utf-8', newline='')
+            self._escritor = csv.writer(self._archivo)
+            self._escritor.writerow(['linea', 'campo', 'motivo', 'errores'] + [columna.strip() for columna in encabezado])
+
+    def rechazar(self, linea, fila, errores):
+        """Registra una fila rechazada; errores es la lista [(campo, motivo)] de sus campos inválidos."""
+        campo, motivo = errores[0]
+        self.motivos[motivo] = self.motivos.get(motivo, 0) + 1
+        for campo_invalido, _ in errores:
+            self.campos[campo_invalido] = self.campos.get(campo_invalido, 0) + 1
+        if len(self.muestras) < self.maximo_muestras or self._escritor is not None or self.filas is not None:
+            detalle = "; ".join(f"{c}: {m}" for c, m in errores)
+            self._guardar(linea, campo, motivo, detalle, list(fila))
+
+    def _guardar(self, linea, campo, motivo, detalle, fila):
+        if len(self.muestras) < self.maximo_muestras:
+            self.muestras.append({"linea": linea, "campo": campo, "motivo": motivo, "errores": detalle, "fila": fila})
+        if self._escritor is not None:
+            self._escritor.writerow([linea, campo, motivo, detalle] + fila)
+        if self.filas is not None:
+            self.filas.append((linea, campo, motivo, detalle, fila))
+
+    def combinar(self, otro, desplazamiento=0):
+        """Suma el informe de otra parte del archivo, cuyas líneas empiezan 'desplazamiento'
+        líneas más adelante. Para el archivo de rechazos el otro debe tener conservar_filas."""
+        for motivo, cantidad in otro.motivos.items():
+            self.motivos[motivo] = self.motivos.get(motivo, 0) + cantidad
+        for campo, cantidad in otro.campos.items():
+            self.campos[campo] = self.campos.get(campo, 0) + cantidad
+        filas = otro.filas
+        if filas is None:
+            filas = [(m["linea"], m["campo"], m["motivo"], m["errores"], m["fila"]) for m in otro.muestras]
+        for linea, campo, motivo, detalle, fila in filas:
+            self._guardar(None if linea is None else linea + desplazamiento, campo, motivo, detalle, fila)
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = self._escritor = None
+
+    def a_diccionario(self):
+        """Resumen del informe (para mostrarlo o guardarlo como JSON)."""
+        return {"rechazados": self.total, "motivos": dict(self.motivos), "campos": dict(self.campos),
+                "muestras": self.muestras}
+
+    def __getstate__(self): # viaja entre procesos sin el archivo abierto
+        estado = self.__dict__.copy()
+        estado["_archivo"] = estado["_escritor"] = None
+        return estado
+
+
+_validadores = {} # posiciones de las columnas -> función compilada
+
+
+def compilar_validador(posiciones):
+    """Función validar(filas, informe) que genera los países válidos de filas (listas de textos
+    con las columnas en 'posiciones', ver posiciones_encabezado) y registra las rechazadas en
+    el informe. Se arma como código Python a partir de ESQUEMA y REGLAS y se compila una vez."""
+    validador = _validadores.get(posiciones)
+    if validador is not None:
+        return validador
+
+    posicion = dict(zip(CLAVES_ENCABEZADO, posiciones))
+    largo_minimo = max(posiciones) + 1
+    lineas = [
+        "def validar(filas, informe):",
+        "    rechazar = informe.rechazar",
+        "    for numero, fila in enumerate(filas, 1):",
+        f"        if len(fila) < {largo_minimo}:",
+        "            if fila:  # las líneas en blanco no cuentan como registros",
+        "                faltan = [(campo, 'faltan columnas') for campo, i in POSICIONES if i >= len(fila)]",
+        "                rechazar(getattr(filas, 'line_num', numero), fila, faltan)",
+        "            continue",
+    ]
+    for campo, regla, _ in ESQUEMA:
+        conversion, _ = REGLAS[regla]
+        lineas.append(f"        t_{campo} = fila[{posicion[campo]}]")
+        lineas.append(f"        v_{campo} = " + conversion.format(t=f"t_{campo}"))
+    condiciones = [REGLAS[regla][1].format(v=f"v_{campo}") for campo, regla, _ in ESQUEMA]
+    lineas.append(f"        if {' and '.join(condiciones)}:")
+    lineas.append("            yield {" + ", ".join(f"'{campo}': v_{campo}" for campo in CLAVES_ENCABEZADO) + "}")
+    lineas.append("        else:")
+    errores = ", ".join(f"({campo!r}, {motivo!r}, {condicion})"
+                        for (campo, _, motivo), condicion in zip(ESQUEMA, condiciones))
+    lineas.append(f"            errores = [(c, m) for c, m, valido in ({errores},) if not valido]")
+    lineas.append("            rechazar(getattr(filas, 'line_num', numero), fila, errores)")
+
+    espacio = {"_continentes": _continentes, "normalizar_continente": normalizar_continente,
+               "POSICIONES": sorted(posicion.items(), key=lambda item: item[1])}
+    exec(compile("\n".join(lineas), f"<validador {posiciones}>", "exec"), espacio)
+    validador = _validadores[posiciones] = espacio["validar"]
+    return validador
+
+
+def validar_filas(filas, posiciones, motivos=None, informe=None):
+    """Generador de los países válidos entre las filas leídas con csv.reader (posiciones: ver
+    posiciones_encabezado). Cada fila ignorada se cuenta en el diccionario motivos o, si se
+    pasa, se registra en el informe (InformeRechazos, que tiene sus propios motivos)."""
+    if informe is None:
+        informe = InformeRechazos(motivos, muestras=0)
+    return compilar_validador(tuple(posiciones))(filas, informe)
+
+
+def validar_archivo(nombre_archivo, muestras=MUESTRAS_RECHAZO, archivo_rechazos=None):
+    """Valida el archivo sin cargarlo. Retorna (válidos, informe) con la cantidad de filas
+    válidas y el InformeRechazos (y escribe las rechazadas en archivo_rechazos, si se indica)."""
+    informe = InformeRechazos(muestras=muestras, archivo_rechazos=archivo_rechazos)
+    try:
+        validos = sum(len(bloque) for bloque in leer_bloques(nombre_archivo, informe=informe))
+    finally:
+        informe.cerrar()
+    return validos, informe
+
+
+def leer_bloques(nombre_archivo, tamano_bloque=TAMANO_BLOQUE, al_informar=None, motivos=None, informe=None):
+    """Generador que entrega listas de hasta tamano_bloque países válidos.
+
+    Después de cada bloque llama a al_informar(cargados, ignorados) con los totales
+    acumulados hasta ese momento, para poder informar el avance y los registros
+    ignorados sin esperar al final del archivo. Si se pasa un diccionario motivos,
+    en él queda la cantidad de registros ignorados por cada motivo; con un informe
+    (InformeRechazos) quedan además la línea, el campo y el motivo de cada uno."""
+    if informe is None:
+        informe = InformeRechazos(motivos, muestras=0)
+    motivos = informe.motivos
+    cargados = 0
+
+    with open(nombre_archivo, 'r', encoding='utf-8', newline='') as archivo:
+        lector_csv = csv.reader(archivo)
+        encabezado = next(lector_csv, None)
+
+        if encabezado is None:
+            if al_informar:
+                al_informar(0, 0)
+            return
+
+        # Se ubica la posición de cada clave una sola vez, en lugar de revisarlas en cada fila.
+        posiciones = posiciones_encabezado(encabezado)
+        informe.iniciar(encabezado)
+
+        if posiciones is None:
+            # Sin alguna de las claves ninguna fila puede cargarse: todas se ignoran.
+            ignorados = sum(1 for _ in lector_csv)
+            motivos["encabezado incompleto"] = ignorados
+            if al_informar:
+                al_informar(0, ignorados)
+            return
+
+        bloque = []
+        for pais in validar_filas(lector_csv, posiciones, informe=informe):
+            bloque.append(pais)
+            if len(bloque) >= tamano_bloque:
+                cargados += len(bloque)
+                yield bloque
+                if al_informar:
+                    al_informar(cargados, sum(motivos.values()))
+                bloque = []
+
+        if bloque:
+            cargados += len(bloque)
+            yield bloque
+
+    if al_informar:
+        al_informar(cargados, sum(motivos.values()))
+
+
+def iterar_paises(nombre_archivo, tamano_bloque=TAMANO_BLOQUE, al_informar=None):
+    """Generador que entrega los países válidos de a uno, leyendo el archivo por bloques."""
+    for bloque in leer_bloques(nombre_archivo, tamano_bloque, al_informar):
+        yield from bloque
@@ -0,0 +1,161 @@
+"""Carga del CSV de países repartida entre varios procesos.
+
+El archivo (sin el encabezado) se divide en rangos de bytes de igual tamaño cuyos límites
+se corren hasta el siguiente salto de línea, así cada proceso lee filas completas. Cada
+proceso valida las filas de su rango con las mismas reglas que la carga secuencial (ver
+carga_csv.validar_filas) y devuelve una TablaPaises, que viaja al proceso principal como
+unos pocos buffers en lugar de un diccionario por país. Las tablas se unen en el orden
+original del archivo y los informes de rechazos de cada rango se combinan, corrigiendo los
+números de línea con las líneas de los rangos anteriores.
+
+Como los rangos se cortan en los saltos de línea, un campo entre comillas que contenga un
+salto de línea (o un límite de rango que caiga dentro de uno) no se puede repartir: cada
+proceso revisa si su rango tiene alguno (solo cuando hay comillas en el texto) y, si algún
+rango lo tiene, el archivo se vuelve a leer con la carga secuencial (carga_csv.leer_bloques).
+"""
+
+import csv
+import io
+import os
+
+from carga_csv import InformeRechazos, leer_bloques, posiciones_encabezado, validar_filas
+from tabla_paises import TablaPaises
+
+
+TAMANO_MINIMO_RANGO = 1024 * 1024 # Bytes mínimos por proceso; con archivos chicos no conviene repartir
+
+
+def salto_entre_comillas(texto):
+    """True si el texto (líneas completas de un CSV) tiene un campo entre comillas con un salto
+    de línea, o uno abierto que no se cierra antes del final del texto."""
+    if '"' not in texto: # sin comillas ningún campo puede ocupar más de una línea
+        return False
+    lector_csv = csv.reader(io.StringIO(texto, newline=''))
+    ultima = []
+    filas = 0
+    for ultima in lector_csv:
+        filas += 1
+    # Una fila de varias líneas deja menos filas que líneas; un campo abierto en la última línea
+    # termina con el salto de línea que el lector tomó como parte del campo.
+    return filas < lector_csv.line_num or any('\n' in campo or '\r' in campo for campo in ultima)
+
+
+def rangos_de_lineas(nombre_archivo, partes):
+    """Lee el encabezado y divide el resto del archivo en hasta 'partes' rangos (inicio, fin)
+    de bytes alineados a comienzos de línea. Retorna (encabezado, rangos); rangos es None si
+    el encabezado tiene un campo entre comillas con un salto de línea."""
+    tamano = os.path.getsize(nombre_archivo)
+    with open(nombre_archivo, 'rb') as archivo:
+        primera_linea = archivo.readline()
+        if not primera_linea:
+            return None, []
+        if salto_entre_comillas(primera_linea.decode('utf-8')):
+            return None, None
+        encabezado = next(csv.reader([primera_linea.decode('utf-8')]), [])
+
+        inicio_datos = archivo.tell()
+        largo_datos = tamano - inicio_datos
+        partes = max(1, min(partes, largo_datos // TAMANO_MINIMO_RANGO))
+
+        limites = [inicio_datos]
+        for k in range(1, partes):
+            archivo.seek(inicio_datos + largo_datos * k // partes)
+            archivo.readline() # se avanza hasta el comienzo de la línea siguiente
+            posicion = archivo.tell()
+            if limites[-1] < posicion < tamano:
+                limites.append(posicion)
+        limites.append(tamano)
+
+    return encabezado, [(inicio, fin) for inicio, fin in zip(limites, limites[1:]) if fin > inicio]
+
+
+def cargar_rango(trabajo):
+    """Valida las filas de un rango de bytes del archivo (se ejecuta en un proceso aparte).
+    Retorna (tabla, informe, lineas): los países válidos, el InformeRechazos del rango (con
+    líneas contadas desde el comienzo del rango) y la cantidad de líneas leídas. Retorna None
+    si el rango tiene un campo entre comillas con un salto de línea (ver salto_entre_comillas)."""
+    nombre_archivo, inicio, fin, posiciones, muestras, conservar_filas = trabajo
+    with open(nombre_archivo, 'rb') as archivo:
+        archivo.seek(inicio)
+        texto = archivo.read(fin - inicio).decode('utf-8')
+    if salto_entre_comillas(texto):
+        return None
+
+    tabla = TablaPaises()
+    informe = InformeRechazos(muestras=muestras, conservar_filas=conservar_filas)
+    lector_csv = csv.reader(io.StringIO(texto, newline=''))
+    agregar = tabla.append
+    for pais in validar_filas(lector_csv, posiciones, informe=informe):
+        agregar(pais)
+    return tabla, informe, lector_csv.line_num
+
+
+def cargar_en_paralelo(nombre_archivo, procesos=None, al_informar=None, motivos=None, informe=None):
+    """Carga el archivo con varios procesos (por defecto, uno por núcleo) y retorna una TablaPaises.
+
+    al_informar(cargados, ignorados) se llama a medida que se unen los rangos, y en el
+    diccionario motivos (si se pasa) queda la cantidad de registros ignorados por motivo; con
+    un informe (InformeRechazos) quedan además sus líneas, como en carga_csv.leer_bloques.
+    Si algún campo entre comillas tiene un salto de línea, carga el archivo en forma secuencial."""
+    if informe is None:
+        informe = InformeRechazos(motivos, muestras=0)
+    motivos = informe.motivos
+    if not procesos or procesos < 1:
+        procesos = os.cpu_count() or 1
+
+    tabla = TablaPaises()
+    encabezado, rangos = rangos_de_lineas(nombre_archivo, procesos)
+    if rangos is None:
+        return _cargar_secuencial(nombre_archivo, al_informar, informe)
+    if encabezado is None:
+        if al_informar:
+            al_informar(0, 0)
+        return tabla
+
+    posiciones = posiciones_encabezado(encabezado)
+    if posiciones is None:
+        # Sin alguna de las claves ninguna fila puede cargarse (igual que en la carga secuencial).
+        with open(nombre_archivo, 'r', encoding='utf-8', newline='') as archivo:
+            ignorados = sum(1 for _ in csv.reader(archivo)) - 1
+        motivos["encabezado incompleto"] = ignorados
+        if al_informar:
+            al_informar(0, ignorados)
+        return tabla
+
+    # Con archivo de rechazos cada proceso devuelve todas sus filas rechazadas; si no, solo las muestras.
+    conservar_filas = informe.archivo_rechazos is not None
+    trabajos = [(nombre_archivo, inicio, fin, posiciones, informe.maximo_muestras, conservar_filas)
+                for inicio, fin in rangos]
+    if len(trabajos) <= 1:
+        resultados = list(map(cargar_rango, trabajos)) # un solo rango: no vale la pena crear procesos
+    else:
+        # Se importa recién aquí: concurrent.futures (y multiprocessing) demoran el inicio del programa.
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(procesos, len(trabajos))) as ejecutor:
+            resultados = list(ejecutor.map(cargar_rango, trabajos)) # map respeta el orden
+    if None in resultados: # un campo con saltos de línea (quizás cortado entre dos rangos)
+        return _cargar_secuencial(nombre_archivo, al_informar, informe)
+
+    informe.iniciar(encabezado)
+    _unir(tabla, resultados, informe, al_informar)
+
+    if al_informar:
+        al_informar(len(tabla), sum(motivos.values()))
+    return tabla
+
+
+def _cargar_secuencial(nombre_archivo, al_informar, informe):
+    tabla = TablaPaises()
+    for bloque in leer_bloques(nombre_archivo, al_informar=al_informar, informe=informe):
+        tabla.extend(bloque)
+    return tabla
+
+
+def _unir(tabla, resultados, informe, al_informar):
+    lineas = 1 # el encabezado
+    for parcial, informe_parcial, lineas_parcial in resultados:
+        tabla.anexar_tabla(parcial)
+        informe.combinar(informe_parcial, lineas)
+        lineas += lineas_parcial
+        if al_informar:
+            al_informar(len(tabla), informe.total)
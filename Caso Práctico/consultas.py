@@ -0,0 +1,339 @@
+"""Filtros y estadísticas sobre cualquier iterable de países.
+
+Todas las funciones recorren los países una sola vez y no usan len() ni índices, por lo
+que aceptan tanto la lista cargada en memoria como el generador de carga_csv.iterar_paises:
+un informe puntual sobre un archivo grande se calcula sin construir la lista completa.
+
+Sobre una TablaPaises, filtrar_indices resuelve varios predicados a la vez usando las
+columnas ordenadas (búsqueda binaria) en lugar de recorrer las filas, y ranking recorre
+el índice ordenado desde un extremo en lugar de ordenar toda la tabla.
+
+consulta() combina filtros, orden y límite en una sola operación perezosa:
+
+    consulta(paises).donde(continente="Asia", poblacion=(1e6, 1e8)).ordenar_por("-superficie").limite(20)
+
+Nada se calcula hasta recorrer la consulta (o pedir resultado()/indices()). Los predicados
+se resuelven juntos empezando por el más selectivo (filtrar_indices), un límite con orden
+se resuelve con un montículo (heapq) que guarda solo los K primeros en lugar de ordenar
+todo, y sin orden el límite corta el recorrido. No se copian filas: sobre una TablaPaises
+se trabaja con índices y sobre una lista se encadenan generadores.
+"""
+
+import heapq
+from array import array
+from itertools import islice
+
+from indices import CAMPOS_ORDENABLES, columna_ordenada, grupos_continente
+from instrumentacion import medir
+from ordenamiento import normalizar_claves, ordenar_indices, ordenar_registros
+from tabla_paises import CAMPOS_DERIVADOS, CAMPOS_NUMERICOS, TablaPaises, VistaPaises, valor_registro
+
+
+# Filtros (generadores)
+
+def filtrar_continente(paises, continente):
+    """Entrega los países del continente indicado."""
+    for pais in paises:
+        if pais["continente"] == continente:
+            yield pais
+
+
+def filtrar_rango(paises, clave, minimo, maximo):
+    """Entrega los países cuyo valor en clave está entre minimo y maximo (inclusive)."""
+    valor = valor_registro(clave)
+    for pais in paises:
+        if minimo <= valor(pais) <= maximo:
+            yield pais
+
+
+# Filtros por lotes sobre la tabla columnar
+
+def _rangos_derivados(derivados):
+    """Valida los rangos de columnas derivadas pasados por nombre (densidad=(minimo, maximo))."""
+    for campo in derivados:
+        if campo not in CAMPOS_DERIVADOS:
+            raise TypeError(f"Campo de filtro desconocido: '{campo}'")
+    return list(derivados.items())
+
+
+@medir()
+def filtrar_indices(tabla, poblacion=None, superficie=None, continente=None, **derivados):
+    """Índices (en orden de la tabla) de las filas que cumplen todos los predicados indicados.
+
+    poblacion, superficie y las columnas derivadas (densidad=...) son pares (minimo, maximo),
+    inclusive; cualquiera de los dos extremos puede ser None. continente es el texto exacto
+    del continente. Los predicados se combinan con Y. No se copian filas: el resultado es un
+    array de índices."""
+    rangos = []
+    for campo, rango in [('poblacion', poblacion), ('superficie', superficie)] + _rangos_derivados(derivados):
+        if rango is not None:
+            minimo, maximo = rango
+            ordenada = columna_ordenada(tabla, campo)
+            inicio, fin = ordenada.tramo(minimo, maximo)
+            rangos.append((fin - inicio, campo, minimo, maximo, ordenada, inicio, fin))
+
+    codigo = None
+    if continente is not None:
+        codigo = tabla.codigo_existente(continente)
+        if codigo is None:
+            return array('q')
+        grupo = grupos_continente(tabla).filas_de(continente) # filas del continente, en orden de la tabla
+
+    if not rangos:
+        if codigo is None:
+            return array('q', range(len(tabla)))
+        return array('q', grupo)
+
+    # El predicado con menos filas (un rango o el continente) define los candidatos;
+    # el resto solo se evalúa sobre ellos.
+    rangos.sort(key=lambda r: r[0])
+    if codigo is not None and len(grupo) <= rangos[0][0]:
+        candidatos = grupo
+        codigo = None # ya se cumple por construcción
+    else:
+        _, _, _, _, ordenada, inicio, fin = rangos.pop(0)
+        candidatos = ordenada.permutacion[inicio:fin]
+
+    for _, campo, minimo, maximo, _, _, _ in rangos:
+        valores = tabla.columna(campo)
+        minimo = float('-inf') if minimo is None else minimo
+        maximo = float('inf') if maximo is None else maximo
+        candidatos = [i for i in candidatos if minimo <= valores[i] <= maximo]
+
+    if codigo is not None:
+        codigos = tabla.codigo_continente
+        candidatos = [i for i in candidatos if codigos[i] == codigo]
+
+    return array('q', sorted(candidatos))
+
+
+@medir()
+def filtrar(paises, poblacion=None, superficie=None, continente=None, **derivados):
+    """Filtra por cualquier combinación de predicados (ver Consulta). Con una TablaPaises
+    devuelve una VistaPaises; con cualquier otro iterable devuelve una lista."""
+    return consulta(paises).donde(continente, poblacion, superficie, **derivados).resultado()
+
+
+# Consultas compuestas: filtros + orden + límite
+
+class Consulta:
+    """Consulta perezosa sobre una TablaPaises o cualquier iterable de países.
+
+    donde(), ordenar_por(), desde() y limite() solo anotan el pedido y devuelven la misma
+    consulta (para encadenarlos); el trabajo se hace al recorrerla o al pedir resultado()."""
+
+    def __init__(self, paises):
+        self.paises = paises
+        self.continente = None
+        self.rangos = {}       # campo -> (minimo, maximo), inclusive; None = sin extremo
+        self.pasos = None      # [(campo, descendente)], ver ordenamiento.normalizar_claves
+        self.desplazamiento = 0
+        self.cantidad = None
+        self.vacia = False     # predicados contradictorios (dos continentes distintos)
+
+    def donde(self, continente=None, poblacion=None, superficie=None, **derivados):
+        """Agrega predicados; se combinan con Y con los anteriores (dos rangos del mismo campo
+        se intersecan). Los rangos son pares (minimo, maximo) y cualquier extremo puede ser None;
+        las columnas derivadas se filtran por nombre: donde(densidad=(100, None))."""
+        if continente is not None:
+            if self.continente is not None and self.continente != continente:
+                self.vacia = True
+            self.continente = continente
+        for campo, rango in [('poblacion', poblacion), ('superficie', superficie)] + _rangos_derivados(derivados):
+            if rango is None:
+                continue
+            minimo, maximo = rango
+            if campo in self.rangos:
+                anterior_min, anterior_max = self.rangos[campo]
+                minimo = anterior_min if minimo is None else minimo if anterior_min is None else max(minimo, anterior_min)
+                maximo = anterior_max if maximo is None else maximo if anterior_max is None else min(maximo, anterior_max)
+            self.rangos[campo] = (minimo, maximo)
+        return self
+
+    def ordenar_por(self, claves):
+        """Orden del resultado: mismas claves que ordenamiento.normalizar_claves ('-superficie',
+        'continente,-poblacion', ...). Lanza ValueError ante una clave desconocida."""
+        self.pasos = normalizar_claves(claves)
+        return self
+
+    def desde(self, desplazamiento):
+        """Saltea los primeros 'desplazamiento' países del resultado."""
+        if desplazamiento < 0:
+            raise ValueError("El desplazamiento no puede ser negativo.")
+        self.desplazamiento = desplazamiento
+        return self
+
+    def limite(self, cantidad):
+        """Entrega como máximo 'cantidad' países (None = sin límite)."""
+        if cantidad is not None and cantidad < 0:
+            raise ValueError("La cantidad no puede ser negativa.")
+        self.cantidad = cantidad
+        return self
+
+    # Ejecución
+
+    def _fin(self):
+        return None if self.cantidad is None else self.desplazamiento + self.cantidad
+
+    def indices(self):
+        """Índices de las filas del resultado, en orden (solo sobre una TablaPaises)."""
+        tabla = self.paises
+        fin = self._fin()
+        if self.vacia or fin == 0:
+            return array('q')
+
+        if self.continente is None and not self.rangos:
+            candidatos = range(len(tabla))
+            if self.pasos is None:
+                return array('q', candidatos[self.desplazamiento:fin])
+            if len(self.pasos) == 1 and self.pasos[0][0] in CAMPOS_ORDENABLES:
+                # Tabla completa por un campo con índice: se recorre el índice y se corta en el límite.
+                campo, descendente = self.pasos[0]
+                if fin is None:
+                    ordenados = columna_ordenada(tabla, campo).ordenados(descendente)
+                    return ordenados[self.desplazamiento:] if self.desplazamiento else ordenados
+                filas = columna_ordenada(tabla, campo).recorrer(descendente)
+                return array('q', islice(filas, self.desplazamiento, fin))
+        else:
+            candidatos = filtrar_indices(tabla, continente=self.continente, **self.rangos)
+            if self.pasos is None:
+                return candidatos[self.desplazamiento:fin]
+
+        primeros = None
+        if fin is not None and fin < len(candidatos):
+            primeros = _primeros(candidatos, self.pasos, fin, tabla.funcion_valor)
+        if primeros is None:
+            primeros = ordenar_indices(tabla, self.pasos, candidatos)
+        return array('q', islice(primeros, self.desplazamiento, fin))
+
+    def __iter__(self):
+        if isinstance(self.paises, TablaPaises):
+            return iter(VistaPaises(self.paises, self.indices()))
+        return self._recorrer()
+
+    def _recorrer(self):
+        """Tubería de generadores para listas y otros iterables de diccionarios."""
+        fin = self._fin()
+        if self.vacia or fin == 0:
+            return iter(())
+        filas = iter(self.paises)
+        if self.continente is not None:
+            filas = filtrar_continente(filas, self.continente)
+        for campo, (minimo, maximo) in self.rangos.items():
+            filas = filtrar_rango(filas, campo, float('-inf') if minimo is None else minimo,
+                                  float('inf') if maximo is None else maximo)
+        if self.pasos is not None:
+            primeros = None if fin is None else _primeros(filas, self.pasos, fin, valor_registro)
+            filas = ordenar_registros(list(filas), self.pasos, en_lugar=True) if primeros is None else primeros
+        return islice(filas, self.desplazamiento, fin)
+
+    @medir("consultas.Consulta", filas=lambda argumentos, resultado: len(argumentos[0].paises)
+           if hasattr(argumentos[0].paises, '__len__') else len(resultado))
+    def resultado(self):
+        """VistaPaises (con una TablaPaises) o lista con los países del resultado."""
+        if isinstance(self.paises, TablaPaises):
+            return VistaPaises(self.paises, self.indices())
+        return list(self._recorrer())
+
+
+def consulta(paises):
+    """Nueva Consulta sobre una TablaPaises o cualquier iterable de países."""
+    return Consulta(paises)
+
+
+def _primeros(filas, pasos, cantidad, valor):
+    """Los 'cantidad' primeros elementos de filas según pasos, con un montículo de tamaño
+    'cantidad' (heapq) en lugar de ordenar todo; el resultado es el mismo que el de un
+    ordenamiento estable. valor(campo) da la función elemento -> valor. Retorna None si el
+    criterio no se puede expresar como una sola clave (un texto descendente junto a otra clave ascendente)."""
+    descendentes = {descendente for _, descendente in pasos}
+    if len(descendentes) == 1:
+        seleccionar = heapq.nlargest if descendentes.pop() else heapq.nsmallest
+        if len(pasos) == 1:
+            return seleccionar(cantidad, filas, key=valor(pasos[0][0]))
+        funciones = [valor(campo) for campo, _ in pasos]
+        return seleccionar(cantidad, filas, key=lambda fila: tuple(funcion(fila) for funcion in funciones))
+
+    if any(descendente and campo not in CAMPOS_NUMERICOS for campo, descendente in pasos):
+        return None
+    # Sentidos mezclados: los campos numéricos descendentes se invierten de signo.
+    funciones = [(valor(campo), descendente) for campo, descendente in pasos]
+    return heapq.nsmallest(cantidad, filas,
+                           key=lambda fila: tuple(-funcion(fila) if descendente else funcion(fila)
+                                                  for funcion, descendente in funciones))
+
+
+# Rankings (los K mayores o menores)
+
+@medir()
+def ranking(paises, campo, cantidad, mayores=True, continente=None):
+    """Los 'cantidad' países con mayor (o menor, si mayores es False) valor del campo,
+    opcionalmente solo de un continente. Los empates conservan el orden original.
+
+    Con una TablaPaises se recorre el índice ordenado del campo desde el extremo pedido y se
+    corta al juntar los países necesarios (resultado: VistaPaises). Con cualquier otro
+    iterable se usa heapq, que tampoco ordena todo (resultado: lista)."""
+    if isinstance(paises, TablaPaises):
+        filas = columna_ordenada(paises, campo).recorrer(descendente=mayores)
+        if continente is not None:
+            codigo = paises.codigo_existente(continente)
+            if codigo is None:
+                return VistaPaises(paises, array('q'))
+            grupo = grupos_continente(paises).filas_de(continente)
+            if len(grupo) * 64 < len(paises):
+                # Continente muy chico frente a la tabla: conviene elegir directamente entre sus filas.
+                seleccionar = heapq.nlargest if mayores else heapq.nsmallest
+                return VistaPaises(paises, array('q', seleccionar(cantidad, grupo, key=paises.funcion_valor(campo))))
+            codigos = paises.codigo_continente
+            filas = (i for i in filas if codigos[i] == codigo)
+        return VistaPaises(paises, array('q', islice(filas, cantidad)))
+
+    if continente is not None:
+        paises = filtrar_continente(paises, continente)
+    seleccionar = heapq.nlargest if mayores else heapq.nsmallest
+    return seleccionar(cantidad, paises, key=valor_registro(campo))
+
+
+# Estadísticas (una sola pasada)
+
+@medir()
+def promedio(paises, clave):
+    """Promedio de una clave numérica, o None si no hay países."""
+    valor = valor_registro(clave)
+    suma_total = 0
+    cantidad = 0
+    for pais in paises:
+        suma_total += valor(pais)
+        cantidad += 1
+
+    if cantidad == 0:
+        return None
+    return suma_total / cantidad
+
+
+@medir()
+def extremos(paises, clave):
+    """Retorna (pais_minimo, pais_maximo) según la clave, o (None, None) si no hay países."""
+    valor = valor_registro(clave)
+    pais_min = None
+    pais_max = None
+    for pais in paises:
+        if pais_min is None:
+            pais_min = pais_max = pais
+            continue
+        if valor(pais) > valor(pais_max):
+            pais_max = pais
+        if valor(pais) < valor(pais_min):
+            pais_min = pais
+    return pais_min, pais_max
+
+
+@medir()
+def conteo_por_continente(paises):
+    """Diccionario continente -> cantidad de países, en orden de aparición."""
+    conteo_continentes = {}
+    for pais in paises:
+        continente = pais.get("continente")
+        if continente:
+            conteo_continentes[continente] = conteo_continentes.get(continente, 0) + 1
+    return conteo_continentes
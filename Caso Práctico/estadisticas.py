@@ -0,0 +1,252 @@
+"""Motor de estadísticas agregadas de una TablaPaises, calculadas en una sola pasada y cacheadas.
+
+Para cada columna numérica (incluidas las derivadas, como la densidad) se acumulan
+cantidad, suma, promedio y suma de los cuadrados de los desvíos (para la varianza, ver
+Acumulador), mínimo y máximo (con la fila donde se alcanzan) y los valores ordenados para
+los percentiles, tanto para el total como para cada continente. El resumen de un
+continente incluye su participación en el total de la columna. Las filas se recorren una
+única vez para repartirlas por continente; los agregados de cada grupo se calculan
+después sobre arrays tipados con funciones del intérprete (sum, min, max).
+
+Las filas de cada continente se toman de indices.GruposContinente. El motor queda
+guardado en la tabla (ver TablaPaises.auxiliar) y se mantiene con los cambios sin
+recalcular: al agregar un país se actualizan los agregados en O(1) y el valor se inserta
+en los valores ordenados (bisect + inserción en el array: O(n) por el corrimiento de
+memoria, sin comparaciones en Python); al modificar un valor se corrigen igual suma,
+varianza y percentiles. Solo si cambia el continente o deja de valer un mínimo/máximo se
+descarta y se recalcula en la próxima consulta.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from operator import mul
+
+from indices import grupos_continente
+from instrumentacion import filas_tabla, medir
+from tabla_paises import CAMPOS_DERIVADOS, CAMPOS_NUMERICOS, COLUMNAS_DERIVADAS
+
+
+PERCENTILES = (25, 50, 75, 90)
+
+TOTAL = -1 # clave del grupo que reúne a todos los países (nunca es un código de continente)
+
+
+class Acumulador:
+    """Estadísticas de una columna dentro de un grupo.
+
+    La varianza se lleva con el método de Welford (promedio y suma de los cuadrados de los
+    desvíos, m2, actualizados en cada alta o cambio) en lugar de suma de cuadrados menos
+    cuadrado de la suma, que con decimales (la densidad) pierde casi toda la precisión."""
+
+    __slots__ = ('cantidad', 'suma', 'promedio', 'm2', 'minimo', 'fila_minimo',
+                 'maximo', 'fila_maximo', 'valores', 'ordenado')
+
+    def __init__(self, tipo='q'):
+        self.cantidad = 0
+        self.suma = 0
+        self.promedio = 0.0
+        self.m2 = 0.0
+        self.minimo = self.maximo = None
+        self.fila_minimo = self.fila_maximo = None
+        self.valores = array(tipo) # 'q' para las columnas guardadas, 'd' para las derivadas
+        self.ordenado = True
+
+    @classmethod
+    def desde_valores(cls, valores, filas):
+        """Acumulador de un grupo completo: valores[k] es el valor de la fila filas[k]."""
+        acumulador = cls(valores.typecode)
+        if not valores:
+            return acumulador
+        n = acumulador.cantidad = len(valores)
+        if valores.typecode == 'd': # dos pasadas: los desvíos ya están centrados y no se cancelan
+            acumulador.suma = sum(valores)
+            promedio = acumulador.promedio = acumulador.suma / n
+            desvios = array('d', map(promedio.__rsub__, valores)) # valor - promedio
+            acumulador.m2 = sum(map(mul, desvios, desvios))
+        else: # con enteros la suma de cuadrados es exacta y basta una pasada
+            suma = acumulador.suma = sum(valores)
+            acumulador.promedio = suma / n
+            acumulador.m2 = (n * sum(map(mul, valores, valores)) - suma * suma) / n
+        acumulador.minimo = min(valores)
+        acumulador.fila_minimo = filas[valores.index(acumulador.minimo)]
+        acumulador.maximo = max(valores)
+        acumulador.fila_maximo = filas[valores.index(acumulador.maximo)]
+        acumulador.valores = valores
+        acumulador.ordenado = False # se ordena recién al pedir el primer percentil
+        return acumulador
+
+    def agregar(self, valor, fila):
+        self.cantidad += 1
+        self.suma += valor
+        self._sumar_desvio(valor)
+        if self.minimo is None or valor < self.minimo:
+            self.minimo, self.fila_minimo = valor, fila
+        if self.maximo is None or valor > self.maximo:
+            self.maximo, self.fila_maximo = valor, fila
+        if self.ordenado:
+            insort(self.valores, valor)
+        else:
+            self.valores.append(valor)
+
+    def reemplazar(self, anterior, nuevo, fila):
+        """Corrige el acumulador cuando el valor de una fila cambia. Retorna False si
+        ya no se puede saber el mínimo o el máximo sin recorrer el grupo."""
+        if (fila == self.fila_maximo and nuevo < anterior) or (fila == self.fila_minimo and nuevo > anterior):
+            return False
+
+        self.suma += nuevo - anterior
+        self._quitar_desvio(anterior)
+        self._sumar_desvio(nuevo)
+        if nuevo < self.minimo:
+            self.minimo, self.fila_minimo = nuevo, fila
+        if nuevo > self.maximo:
+            self.maximo, self.fila_maximo = nuevo, fila
+
+        self._ordenar()
+        del self.valores[bisect_left(self.valores, anterior)]
+        insort(self.valores, nuevo)
+        return True
+
+    def _sumar_desvio(self, valor): # Welford: self.cantidad ya incluye el valor
+        delta = valor - self.promedio
+        self.promedio += delta / self.cantidad
+        self.m2 += delta * (valor - self.promedio)
+
+    def _quitar_desvio(self, valor): # inverso de _sumar_desvio (la cantidad no cambia al reemplazar)
+        if self.cantidad == 1:
+            self.promedio = self.m2 = 0.0
+            return
+        promedio = (self.promedio * self.cantidad - valor) / (self.cantidad - 1)
+        self.m2 -= (valor - promedio) * (valor - self.promedio)
+        self.promedio = promedio
+
+    def _ordenar(self):
+        if not self.ordenado:
+            self.valores = array(self.valores.typecode, sorted(self.valores))
+            self.ordenado = True
+
+    def percentil(self, p):
+        """Percentil p (0-100) con interpolación lineal entre los valores vecinos."""
+        self._ordenar()
+        valores = self.valores
+        if not valores:
+            return None
+        posicion = (len(valores) - 1) * p / 100
+        inferior = int(posicion)
+        fraccion = posicion - inferior
+        if fraccion == 0:
+            return float(valores[inferior])
+        return valores[inferior] + (valores[inferior + 1] - valores[inferior]) * fraccion
+
+    def resumen(self, tabla):
+        """Diccionario con todas las métricas del acumulador."""
+        if self.cantidad == 0:
+            return {"cantidad": 0}
+        n = self.cantidad
+        varianza = max(self.m2 / n, 0.0) # el redondeo puede dar apenas menos de 0
+        return {
+            "cantidad": n,
+            "suma": self.suma,
+            "promedio": self.suma / n,
+            "minimo": self.minimo,
+            "pais_minimo": tabla.nombre(self.fila_minimo),
+            "maximo": self.maximo,
+            "pais_maximo": tabla.nombre(self.fila_maximo),
+            "varianza": varianza,
+            "desvio": varianza ** 0.5,
+            "percentiles": {p: self.percentil(p) for p in PERCENTILES},
+        }
+
+
+class MotorEstadisticas:
+    """Estadísticas por columna numérica y por continente, calculadas en una pasada."""
+
+    @medir("estadisticas.MotorEstadisticas (cálculo)", filas=filas_tabla)
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.columnas = CAMPOS_NUMERICOS
+
+        # Las filas de cada continente salen de la partición de la tabla (una sola pasada, compartida).
+        filas_por_codigo = grupos_continente(tabla).filas
+
+        self.grupos = {} # código de continente (o TOTAL) -> {columna: Acumulador}
+        columnas = {campo: tabla.columna(campo) for campo in self.columnas}
+        self.grupos[TOTAL] = {campo: Acumulador.desde_valores(array(columna.typecode, columna), range(len(tabla)))
+                              for campo, columna in columnas.items()}
+        for codigo, filas in filas_por_codigo.items():
+            self.grupos[codigo] = {
+                campo: Acumulador.desde_valores(array(columna.typecode, map(columna.__getitem__, filas)), filas)
+                for campo, columna in columnas.items()
+            }
+
+    def _nuevo_grupo(self):
+        return {campo: Acumulador(self.tabla.columna(campo).typecode) for campo in self.columnas}
+
+    # Mantenimiento (lo llama la tabla, ver TablaPaises.auxiliar)
+
+    def fila_agregada(self, fila):
+        codigo = self.tabla.codigo_continente[fila]
+        grupo = self.grupos.get(codigo)
+        if grupo is None:
+            grupo = self.grupos[codigo] = self._nuevo_grupo()
+        for campo in self.columnas:
+            valor = self.tabla.columna(campo)[fila]
+            self.grupos[TOTAL][campo].agregar(valor, fila)
+            grupo[campo].agregar(valor, fila)
+
+    def fila_actualizada(self, fila, campo, anterior):
+        if campo not in self.columnas:
+            return False # cambio de continente: la fila pasa a otro grupo, se recalcula todo
+        nuevo = self.tabla.columna(campo)[fila]
+        codigo = self.tabla.codigo_continente[fila]
+        return (self.grupos[TOTAL][campo].reemplazar(anterior, nuevo, fila)
+                and self.grupos[codigo][campo].reemplazar(anterior, nuevo, fila))
+
+    # Consultas
+
+    @medir(filas=filas_tabla)
+    def resumen(self, campo, continente=None):
+        """Métricas de la columna para todos los países o para un continente (vacío si no existe).
+
+        Para un continente se agrega 'participacion': la fracción (0 a 1) del total de la
+        columna que le corresponde (por ejemplo, de la población mundial). Para una columna
+        derivada la suma no tiene sentido y se informa en cambio el cociente de las sumas de
+        sus columnas en el continente (la densidad del continente entero)."""
+        if continente is None:
+            grupo = self.grupos[TOTAL]
+        else:
+            codigo = self.tabla.codigo_existente(continente)
+            grupo = self.grupos.get(codigo) if codigo is not None else None
+            if grupo is None:
+                return {"cantidad": 0}
+        datos = grupo[campo].resumen(self.tabla)
+        if campo in CAMPOS_DERIVADOS and grupo[campo].cantidad:
+            funcion, primero, segundo = COLUMNAS_DERIVADAS[campo]
+            datos["agregado"] = funcion(grupo[primero].suma, grupo[segundo].suma)
+        elif continente is not None and grupo[campo].cantidad:
+            total = self.grupos[TOTAL][campo].suma
+            datos["participacion"] = grupo[campo].suma / total if total else 0.0
+        return datos
+
+    @medir(filas=filas_tabla)
+    def resumen_por_continente(self, campo):
+        """Diccionario continente -> métricas de la columna, en orden alfabético de continente."""
+        resultado = {}
+        for continente in sorted(self.tabla.continentes):
+            datos = self.resumen(campo, continente)
+            if datos["cantidad"]:
+                resultado[continente] = datos
+        return resultado
+
+    def conteo_por_continente(self):
+        """Diccionario continente -> cantidad de países, en orden de aparición."""
+        conteo = {}
+        for codigo, grupo in self.grupos.items():
+            if codigo != TOTAL and grupo[self.columnas[0]].cantidad:
+                conteo[self.tabla.continentes[codigo]] = grupo[self.columnas[0]].cantidad
+        return conteo
+
+
+def motor_estadisticas(tabla):
+    """MotorEstadisticas de la tabla (se calcula una vez y se mantiene con los cambios)."""
+    return tabla.auxiliar('estadisticas', MotorEstadisticas)
@@ -0,0 +1,230 @@
+"""Importación masiva de países desde otro archivo CSV, JSON Lines, columnar o Parquet (o desde un flujo abierto).
+
+Las filas se validan con las mismas reglas que la carga del CSV (carga_csv.validar_fila) y
+los países que ya existen (por nombre, sin distinguir mayúsculas ni acentos) se resuelven
+según la política de duplicados:
+ - 'omitir': se conserva el país existente y se ignora la fila importada.
+ - 'sobrescribir': la fila importada reemplaza población, superficie y continente.
+ - 'combinar': solo se toman los campos que la fila trae con valor; los vacíos o ausentes
+   conservan el valor existente (por ejemplo, para importar solo poblaciones).
+
+La importación tiene dos pasos: primero se lee y valida todo el origen y se arma el lote
+de altas y modificaciones; después el lote se aplica a la tabla de una vez y se devuelve
+la lista de cambios, para que quien llama la persista con una sola escritura. En el primer
+paso cada fila se comprueba también contra los límites de las columnas de la tabla
+(números de 64 bits, ver carga_csv, y MAXIMO_CODIGOS continentes distintos): la fila que no
+entra se rechaza ahí, y el segundo paso no puede fallar con el lote aplicado a medias.
+"""
+
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+
+import almacenamiento
+import persistencia
+from carga_csv import (CLAVES_ENCABEZADO, motivo_rechazo, normalizar_continente, validar_entero_desde_archivo,
+                       validar_fila)
+from instrumentacion import medir
+from normalizacion import normalizar
+from tabla_paises import MAXIMO_CODIGOS
+
+
+POLITICAS = ('omitir', 'sobrescribir', 'combinar')
+
+FORMATOS = ('csv', 'jsonl', 'columnar', 'parquet') # los dos últimos, solo desde un archivo (ver almacenamiento)
+
+MUESTRAS_RECHAZO = 20 # Filas rechazadas que se detallan en el informe (el resto solo se cuenta por motivo)
+
+LOTE_GRANDE = 1000 # Altas a partir de las cuales conviene descartar los índices y reconstruirlos después
+
+CAMPOS_DATOS = ('poblacion', 'superficie', 'continente') # campos que una importación puede modificar
+
+
+def detectar_formato(origen):
+    """Formato según la extensión del archivo: .jsonl/.ndjson/.json es JSON Lines, .pcol columnar,
+    .parquet Parquet; cualquier otro, CSV."""
+    nombre = origen if isinstance(origen, str) else getattr(origen, 'name', '')
+    extension = os.path.splitext(str(nombre))[1].lower()
+    return 'jsonl' if extension in ('.jsonl', '.ndjson', '.json') else almacenamiento.detectar_formato(nombre)
+
+
+def _abrir(origen):
+    if origen == '-':
+        return contextlib.nullcontext(sys.stdin)
+    if isinstance(origen, str):
+        return open(origen, 'r', encoding='utf-8', newline='')
+    return contextlib.nullcontext(origen) # flujo ya abierto: lo cierra quien lo abrió
+
+
+# Lectura: cada registro es un diccionario campo -> texto (o None), o el motivo de rechazo
+
+def _registros_csv(archivo):
+    """Genera (número de línea, registro) de un CSV con encabezado. Las columnas que faltan
+    en el encabezado o en la fila quedan en None."""
+    lector_csv = csv.reader(archivo)
+    encabezado = next(lector_csv, None)
+    if encabezado is None:
+        return
+    encabezado = [columna.strip() for columna in encabezado]
+    posiciones = {clave: encabezado.index(clave) for clave in CLAVES_ENCABEZADO if clave in encabezado}
+
+    for fila in lector_csv:
+        if not fila:
+            continue # las líneas en blanco no cuentan como registros
+        yield lector_csv.line_num, {clave: fila[i] if i < len(fila) else None for clave, i in posiciones.items()}
+
+
+def _registros_jsonl(archivo):
+    """Genera (número de línea, registro) de un archivo con un objeto JSON por línea."""
+    for numero, linea in enumerate(archivo, start=1):
+        if not linea.strip():
+            continue
+        try:
+            objeto = json.loads(linea)
+        except ValueError:
+            yield numero, "JSON inválido"
+            continue
+        if not isinstance(objeto, dict):
+            yield numero, "JSON inválido"
+            continue
+        yield numero, {clave: None if objeto[clave] is None else str(objeto[clave])
+                       for clave in CLAVES_ENCABEZADO if clave in objeto}
+
+
+def _leer(origen, formato):
+    """Genera (número de línea o fila, registro) del origen según su formato."""
+    if formato in ('csv', 'jsonl'):
+        with _abrir(origen) as archivo:
+            yield from (_registros_csv if formato == 'csv' else _registros_jsonl)(archivo)
+        return
+    if not isinstance(origen, str) or origen == '-':
+        raise ValueError(f"El formato {formato} solo se puede importar desde un archivo.")
+    for numero, fila in enumerate(almacenamiento.formato(formato).filas(origen), start=1):
+        yield numero, dict(zip(CLAVES_ENCABEZADO, fila))
+
+
+# Validación
+
+def _validar_completo(registro):
+    """(campos, None) con los datos validados de la fila completa, o (None, motivo)."""
+    valores = [registro.get(clave) for clave in CLAVES_ENCABEZADO]
+    pais = validar_fila(*valores)
+    if pais is None:
+        return None, motivo_rechazo(*valores)
+    return {campo: pais[campo] for campo in CAMPOS_DATOS}, None
+
+
+def _validar_presentes(registro):
+    """Para 'combinar': (campos, None) con los campos que la fila trae con valor, o (None, motivo)."""
+    campos = {}
+    for campo, motivo in (('poblacion', "población no válida"), ('superficie', "superficie no válida")):
+        texto = registro.get(campo)
+        if texto is None or not texto.strip():
+            continue
+        valor = validar_entero_desde_archivo(texto)
+        if valor is None:
+            return None, motivo
+        campos[campo] = valor
+    continente = normalizar_continente(registro.get('continente') or '')
+    if continente:
+        campos['continente'] = continente
+    if not campos:
+        return None, "sin datos para combinar"
+    return campos, None
+
+
+@medir(filas=lambda argumentos, resultado: resultado[1]["leidos"])
+def importar(tabla, origen, politica='omitir', formato=None):
+    """Importa en la tabla los países de origen (ruta de archivo, '-' para la entrada estándar
+    o un archivo ya abierto). Retorna (cambios, informe).
+
+    cambios es la lista de entradas de registro (ver persistencia) del lote aplicado.
+    informe tiene las cantidades leídas, agregadas, actualizadas, sin cambios, omitidas y
+    rechazadas, los rechazos por motivo, el detalle (línea, motivo) de los primeros
+    MUESTRAS_RECHAZO rechazos, y el tiempo y las filas por segundo."""
+    if politica not in POLITICAS:
+        raise ValueError(f"Política de duplicados no válida: '{politica}'. Opciones: {', '.join(POLITICAS)}.")
+    formato = formato or detectar_formato(origen)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de importación no válido: '{formato}'. Opciones: {', '.join(FORMATOS)}.")
+
+    inicio = time.perf_counter()
+    informe = {"leidos": 0, "agregados": 0, "actualizados": 0, "sin_cambios": 0, "omitidos": 0,
+               "rechazados": 0, "motivos": {}, "rechazos": []}
+
+    def rechazar(numero, motivo):
+        informe["rechazados"] += 1
+        informe["motivos"][motivo] = informe["motivos"].get(motivo, 0) + 1
+        if len(informe["rechazos"]) < MUESTRAS_RECHAZO:
+            informe["rechazos"].append((numero, motivo))
+
+    # Paso 1: leer, validar y resolver duplicados (contra la tabla y dentro del mismo origen).
+    altas = {}          # nombre normalizado -> país nuevo, en orden de aparición
+    modificaciones = {} # fila existente -> campos importados
+    continentes = set(tabla.continentes) # los de la tabla más los que agrega el lote
+    for numero, registro in _leer(origen, formato):
+        informe["leidos"] += 1
+        if isinstance(registro, str):
+            rechazar(numero, registro)
+            continue
+
+        nombre = (registro.get('nombre') or '').strip().title()
+        if not nombre:
+            rechazar(numero, "nombre vacío")
+            continue
+
+        clave = normalizar(nombre)
+        fila = tabla.indice_de(nombre)
+        nuevo = altas.get(clave)
+        existe = fila is not None or nuevo is not None
+
+        if existe and politica == 'omitir':
+            informe["omitidos"] += 1
+            continue
+        if existe and politica == 'combinar':
+            campos, motivo = _validar_presentes(registro)
+        else:
+            campos, motivo = _validar_completo(registro)
+        if motivo is not None:
+            rechazar(numero, motivo)
+            continue
+        continente = campos.get('continente')
+        if continente is not None and continente not in continentes:
+            if len(continentes) >= MAXIMO_CODIGOS:
+                rechazar(numero, "demasiados continentes")
+                continue
+            continentes.add(continente)
+
+        if not existe:
+            altas[clave] = {"nombre": nombre, **campos}
+        elif nuevo is not None:
+            nuevo.update(campos) # el país se repite en el origen: se resuelve sobre la primera aparición
+        else:
+            modificaciones.setdefault(fila, {}).update(campos)
+
+    # Paso 2: aplicar el lote (todas las filas ya entran en la tabla).
+    if len(altas) >= LOTE_GRANDE:
+        tabla.descartar_auxiliares()
+
+    cambios = []
+    for fila, campos in modificaciones.items():
+        distintos = {campo: valor for campo, valor in campos.items() if tabla.valor(fila, campo) != valor}
+        if not distintos:
+            informe["sin_cambios"] += 1
+            continue
+        for campo, valor in distintos.items():
+            tabla.actualizar(fila, campo, valor)
+        cambios.append(persistencia.cambio_modificacion(tabla.nombre(fila), distintos))
+        informe["actualizados"] += 1
+
+    for pais in altas.values():
+        tabla.append(pais)
+        cambios.append(persistencia.cambio_alta(pais))
+    informe["agregados"] = len(altas)
+
+    informe["segundos"] = time.perf_counter() - inicio
+    informe["filas_por_segundo"] = informe["leidos"] / informe["segundos"] if informe["segundos"] > 0 else 0.0
+    return cambios, informe
@@ -0,0 +1,373 @@
+"""Índices auxiliares sobre las columnas de una TablaPaises."""
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import compress, islice
+from operator import eq
+
+from normalizacion import normalizar
+
+
+# Un nombre no tiene como clave su propio texto en minúsculas si tiene caracteres no ASCII
+# (acentos), caracteres de control (tabulaciones, saltos), espacios dobles o espacios en los
+# extremos.
+_IMPRIMIBLES = bytes(range(0x20, 0x7f))
+_NO_IMPRIMIBLE = re.compile(rb'[^\x20-\x7e]')
+
+CAMPOS_ORDENABLES = ('poblacion', 'superficie', 'densidad', 'nombre') # campos con índice ordenado mantenido
+
+
+class ColumnaOrdenada:
+    """Índice ordenado de un campo: la permutación de filas que ordena la tabla por ese campo.
+
+    Las filas quedan en orden de (valor, fila), así que los empates conservan el orden de
+    la tabla. Un rango [minimo, maximo] se resuelve con dos búsquedas binarias (bisect) y
+    se devuelve como un tramo de la permutación, sin recorrer ni copiar filas. Se recorre
+    en los dos sentidos sin volver a ordenar.
+
+    Para los campos numéricos se guardan además los valores ya ordenados (valores), así la
+    búsqueda binaria compara enteros de un array; para el nombre se busca usando el nombre
+    de cada fila como clave, sin duplicar las cadenas.
+
+    El índice se mantiene con los cambios de la tabla (ver TablaPaises.auxiliar): un país
+    nuevo o un valor modificado se ubica con bisect y se inserta en el array (O(log n)
+    comparaciones más el desplazamiento del array), en lugar de reordenar todo."""
+
+    def __init__(self, tabla, campo):
+        self.campo = campo
+        self.valor = tabla.funcion_valor(campo) # fila -> valor
+        self.permutacion = array('q', sorted(range(len(tabla)), key=self.valor))
+        self.valores = None
+        if campo != 'nombre': # columna numérica (guardada o derivada)
+            columna = tabla.columna(campo)
+            self.valores = array(columna.typecode, map(columna.__getitem__, self.permutacion))
+
+    def __len__(self):
+        return len(self.permutacion)
+
+    def _buscar(self, bisect, valor, inicio=0, fin=None):
+        """Posición de valor en la permutación según la función bisect (bisect_left o bisect_right)."""
+        if fin is None:
+            fin = len(self.permutacion)
+        if self.valores is not None:
+            return bisect(self.valores, valor, inicio, fin)
+        return bisect(self.permutacion, valor, inicio, fin, key=self.valor)
+
+    def tramo(self, minimo=None, maximo=None):
+        """Posiciones (inicio, fin) dentro de la permutación de los valores entre minimo y maximo."""
+        inicio = 0 if minimo is None else self._buscar(bisect_left, minimo)
+        fin = len(self.permutacion) if maximo is None else self._buscar(bisect_right, maximo)
+        return inicio, max(inicio, fin)
+
+    def indices_en_rango(self, minimo=None, maximo=None):
+        """Índices de filas (en orden del valor) cuyo valor está en el rango."""
+        inicio, fin = self.tramo(minimo, maximo)
+        return self.permutacion[inicio:fin]
+
+    def recorrer(self, descendente=False):
+        """Genera los índices de filas en orden del valor. En orden descendente los empates
+        siguen en el orden de la tabla (igual que un ordenamiento estable con reverse=True)."""
+        permutacion = self.permutacion
+        if not descendente:
+            yield from permutacion
+            return
+        valor = self.valor
+        fin = len(permutacion)
+        while fin > 0:
+            actual = valor(permutacion[fin - 1])
+            inicio = fin - 1
+            if inicio > 0 and valor(permutacion[inicio - 1]) == actual:
+                inicio = self._buscar(bisect_left, actual, 0, inicio) # tramo de empates
+            yield from permutacion[inicio:fin]
+            fin = inicio
+
+    def ordenados(self, descendente=False):
+        """Array con todos los índices de filas en orden del valor."""
+        if not descendente:
+            return array('q', self.permutacion)
+
+        # Se invierte la permutación completa y después se vuelve a invertir cada tramo de
+        # empates, para que dentro de él las filas queden en el orden de la tabla.
+        resultado = self.permutacion[::-1]
+        valores = self.valores[::-1] if self.valores is not None else list(map(self.valor, resultado))
+        empates = compress(range(len(valores) - 1), map(eq, valores, islice(valores, 1, None)))
+        inicio = anterior = None
+        for k in empates: # k: posición cuyo valor es igual al de la siguiente
+            if anterior is None or k != anterior + 1:
+                if inicio is not None:
+                    resultado[inicio:anterior + 2] = resultado[inicio:anterior + 2][::-1]
+                inicio = k
+            anterior = k
+        if inicio is not None:
+            resultado[inicio:anterior + 2] = resultado[inicio:anterior + 2][::-1]
+        return resultado
+
+    # Mantenimiento (lo llama la tabla, ver TablaPaises.auxiliar)
+
+    def _insertar(self, posicion, fila, valor):
+        self.permutacion.insert(posicion, fila)
+        if self.valores is not None:
+            self.valores.insert(posicion, valor)
+
+    def fila_agregada(self, fila):
+        # La fila nueva es la última de la tabla: va después de todos sus empates.
+        valor = self.valor(fila)
+        self._insertar(self._buscar(bisect_right, valor), fila, valor)
+
+    def fila_actualizada(self, fila, campo, anterior):
+        if campo != self.campo:
+            return True
+        if self.valores is None:
+            return False # el nombre no se modifica; por las dudas se reconstruye
+        # Entre los empates de un valor las filas están ordenadas por número de fila.
+        inicio = self._buscar(bisect_left, anterior)
+        posicion = bisect_left(self.permutacion, fila, inicio, self._buscar(bisect_right, anterior, inicio))
+        del self.permutacion[posicion]
+        del self.valores[posicion]
+
+        nuevo = self.valor(fila)
+        inicio = self._buscar(bisect_left, nuevo)
+        self._insertar(bisect_left(self.permutacion, fila, inicio, self._buscar(bisect_right, nuevo, inicio)),
+                       fila, nuevo)
+        return True
+
+
+def columna_ordenada(tabla, campo):
+    """ColumnaOrdenada del campo, construida una vez y mantenida con los cambios de la tabla."""
+    return tabla.auxiliar(('orden', campo), lambda t: ColumnaOrdenada(t, campo))
+
+
+class GruposContinente:
+    """Partición de la tabla por continente: para cada código de continente, el array de sus
+    filas en orden de la tabla. La cantidad de países de un continente es el largo de su
+    array (O(1)) y filtrar por continente es copiar ese array, sin recorrer la tabla.
+
+    Se mantiene con los cambios de la tabla (ver TablaPaises.auxiliar): un país nuevo se
+    agrega al final de su grupo y un cambio de continente mueve la fila de grupo."""
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.filas = {} # código de continente -> array('q') de filas
+        for fila, codigo in enumerate(tabla.codigo_continente): # única pasada por las filas
+            grupo = self.filas.get(codigo)
+            if grupo is None:
+                grupo = self.filas[codigo] = array('q')
+            grupo.append(fila)
+
+    def filas_de(self, continente):
+        """Array con las filas del continente (vacío si ningún país lo tiene). No copiar: se comparte."""
+        return self.filas.get(self.tabla.codigo_existente(continente), array('q'))
+
+    def cantidad(self, continente):
+        return len(self.filas_de(continente))
+
+    def conteo(self):
+        """Diccionario continente -> cantidad de países, en orden de aparición."""
+        continentes = self.tabla.continentes
+        return {continentes[codigo]: len(filas) for codigo, filas in sorted(self.filas.items()) if filas}
+
+    def continentes(self):
+        """Continentes con al menos un país, en orden alfabético."""
+        return sorted(self.conteo())
+
+    # Mantenimiento (lo llama la tabla, ver TablaPaises.auxiliar)
+
+    def _grupo(self, codigo):
+        grupo = self.filas.get(codigo)
+        if grupo is None:
+            grupo = self.filas[codigo] = array('q')
+        return grupo
+
+    def fila_agregada(self, fila):
+        self._grupo(self.tabla.codigo_continente[fila]).append(fila) # la fila nueva es la última
+
+    def fila_actualizada(self, fila, campo, anterior):
+        if campo != 'continente':
+            return True
+        viejo = self.filas[self.tabla.codigo_existente(anterior)]
+        del viejo[bisect_left(viejo, fila)]
+        insort(self._grupo(self.tabla.codigo_continente[fila]), fila)
+        return True
+
+
+def grupos_continente(tabla):
+    """GruposContinente de la tabla, construido una vez y mantenido con los cambios."""
+    return tabla.auxiliar('continentes', GruposContinente)
+
+
+class ClavesNombres:
+    """Nombre normalizado (ver normalizacion.normalizar) de cada fila, calculado una sola vez.
+
+    Para un nombre ASCII sin espacios de más la clave es el mismo texto en minúsculas, con los
+    mismos bytes de largo: las claves de toda la columna se obtienen con un único
+    bytearray.lower() y usan las posiciones de fin de los nombres de la tabla. Solo los
+    nombres con acentos o espacios de más se normalizan uno por uno y se guardan aparte.
+
+    Los países agregados se incorporan recién cuando se pide su clave (la tabla solo agrega
+    filas al final; eliminar o reordenar descarta la estructura)."""
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        nombres, self._fines = tabla.buffers()[:2]
+        self._texto = nombres.lower()
+        self._especiales = {} # fila -> clave, para los nombres que no son solo minúsculas
+        self.cantidad = len(self._fines)
+        filas = set()
+        texto = self._texto
+        if texto.translate(None, _IMPRIMIBLES): # hay algún byte fuera del ASCII imprimible
+            for coincidencia in _NO_IMPRIMIBLE.finditer(texto):
+                filas.add(bisect_right(self._fines, coincidencia.start()))
+        posicion = texto.find(b'  ')
+        while posicion >= 0:
+            filas.add(bisect_right(self._fines, posicion))
+            posicion = texto.find(b'  ', posicion + 1)
+        # Espacios al principio o al final del nombre (la carga los quita, pero append no)
+        texto = texto + b'\0' # un nombre vacío al final apunta una posición más allá
+        inicios = array('q', [0]) + self._fines[:-1]
+        for posiciones in (inicios, map((-1).__add__, self._fines)):
+            extremos = bytes(map(texto.__getitem__, posiciones))
+            fila = extremos.find(b' ')
+            while fila >= 0:
+                filas.add(fila)
+                fila = extremos.find(b' ', fila + 1)
+        for fila in filas:
+            self._especiales[fila] = normalizar(tabla.nombre(fila))
+
+    def _completar(self):
+        """Incorpora las filas agregadas a la tabla desde la última vez."""
+        for fila in range(self.cantidad, len(self._fines)):
+            inicio = self._fines[fila - 1] if fila else 0
+            minusculas = self.tabla.buffers()[0][inicio:self._fines[fila]].lower()
+            self._texto += minusculas
+            clave = normalizar(self.tabla.nombre(fila))
+            if clave.encode('utf-8') != minusculas:
+                self._especiales[fila] = clave
+        self.cantidad = len(self._fines)
+
+    def clave(self, fila):
+        """Nombre normalizado de la fila."""
+        if fila >= self.cantidad:
+            self._completar()
+        especial = self._especiales.get(fila)
+        if especial is not None:
+            return especial
+        return self._texto[self._fines[fila - 1] if fila else 0:self._fines[fila]].decode('ascii')
+
+    def lista(self):
+        """Lista con la clave de cada fila."""
+        self._completar()
+        tramos = map(slice, array('q', [0]) + self._fines[:-1], self._fines)
+        if not self._especiales: # todo ASCII: las posiciones en bytes sirven también en el texto
+            return list(map(self._texto.decode('ascii').__getitem__, tramos))
+        claves = list(map(bytearray.decode, map(self._texto.__getitem__, tramos)))
+        for fila, clave in self._especiales.items():
+            claves[fila] = clave
+        return claves
+
+    # Mantenimiento (lo llama la tabla, ver TablaPaises.auxiliar)
+
+    def fila_agregada(self, fila):
+        return True # se incorpora al pedir su clave
+
+    def fila_actualizada(self, fila, campo, anterior):
+        return True # el nombre no se modifica
+
+    def bytes_ocupados(self):
+        return len(self._texto) + sum(len(clave) for clave in self._especiales.values())
+
+
+def claves_nombres(tabla):
+    """ClavesNombres de la tabla, calculadas una vez y compartidas por los índices de nombres."""
+    return tabla.auxiliar('claves', ClavesNombres)
+
+
+class IndiceNombres:
+    """Índice hash de nombre normalizado -> índice de fila, con direccionamiento abierto.
+
+    Guarda solo dos arrays de enteros (fila y hash de cada casillero) en lugar de un
+    diccionario con una cadena por país, para no perder el ahorro de memoria de la tabla
+    columnar. Si el hash coincide se compara con la clave ya calculada de la fila (ver
+    ClavesNombres), sin volver a normalizar su nombre."""
+
+    VACIO = -1
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.cantidad = 0
+        self._reservar(max(8, 2 * len(tabla)))
+        # Carga inicial: la capacidad ya alcanza y las claves se comparan contra la lista.
+        claves = claves_nombres(tabla).lista()
+        mascara, filas, hashes, vacio = self._mascara, self._filas, self._hashes, self.VACIO
+        for i, clave in enumerate(claves):
+            hash_clave = hash(clave)
+            posicion = hash_clave & mascara
+            while True:
+                fila = filas[posicion]
+                if fila == vacio:
+                    filas[posicion] = i
+                    hashes[posicion] = hash_clave
+                    self.cantidad += 1
+                    break
+                if hashes[posicion] == hash_clave and claves[fila] == clave:
+                    break # nombre repetido: se conserva la primera fila
+                posicion = (posicion + 1) & mascara
+
+    def _reservar(self, minimo):
+        capacidad = 8
+        while capacidad < minimo:
+            capacidad *= 2
+        self._mascara = capacidad - 1
+        self._filas = array('q', [self.VACIO]) * capacidad
+        self._hashes = array('q', bytes(8 * capacidad))
+
+    def _casillero(self, clave, hash_clave):
+        """Posición donde está la clave, o el primer casillero vacío de su secuencia de prueba."""
+        mascara = self._mascara
+        posicion = hash_clave & mascara
+        filas = self._filas
+        hashes = self._hashes
+        while True:
+            fila = filas[posicion]
+            if fila == self.VACIO:
+                return posicion
+            if hashes[posicion] == hash_clave and claves_nombres(self.tabla).clave(fila) == clave:
+                return posicion
+            posicion = (posicion + 1) & mascara
+
+    def buscar(self, nombre):
+        """Índice de la fila con ese nombre (sin importar mayúsculas ni acentos), o None."""
+        clave = normalizar(nombre)
+        fila = self._filas[self._casillero(clave, hash(clave))]
+        return None if fila == self.VACIO else fila
+
+    def _crecer(self):
+        """Duplica la capacidad reubicando cada fila con el hash guardado (las claves son distintas
+        entre sí, así que no hace falta compararlas)."""
+        anteriores = [(fila, hash_clave) for fila, hash_clave in zip(self._filas, self._hashes)
+                      if fila != self.VACIO]
+        self._reservar(4 * (self.cantidad + 1))
+        mascara, filas, hashes = self._mascara, self._filas, self._hashes
+        for fila, hash_clave in anteriores:
+            posicion = hash_clave & mascara
+            while filas[posicion] != self.VACIO:
+                posicion = (posicion + 1) & mascara
+            filas[posicion] = fila
+            hashes[posicion] = hash_clave
+
+    def _agregar_clave(self, clave, fila):
+        if 2 * (self.cantidad + 1) > len(self._filas):
+            self._crecer()
+        hash_clave = hash(clave)
+        posicion = self._casillero(clave, hash_clave)
+        if self._filas[posicion] == self.VACIO:
+            self._filas[posicion] = fila
+            self._hashes[posicion] = hash_clave
+            self.cantidad += 1
+
+    def agregar(self, nombre, fila):
+        """Registra la fila bajo su nombre. Si el nombre ya estaba, conserva la primera fila."""
+        self._agregar_clave(normalizar(nombre), fila)
+
+    def bytes_ocupados(self):
+        return self._filas.itemsize * len(self._filas) + self._hashes.itemsize * len(self._hashes)
@@ -0,0 +1,159 @@
+"""Instantánea binaria de la tabla cargada, para no volver a leer y validar el CSV en cada inicio.
+
+El archivo '<csv>.snap' guarda las columnas de la TablaPaises tal como están en memoria
+(arrays de enteros y los nombres UTF-8 concatenados) detrás de un encabezado fijo con el
+tamaño, la fecha de modificación (mtime) y un hash del contenido del CSV del que salió.
+Al iniciar, si el CSV no cambió, las columnas se copian directamente desde el archivo
+mapeado en memoria (mmap) sin analizar ninguna fila; si cambió, se carga el CSV como
+siempre y se vuelve a generar la instantánea.
+
+La carga no es de copia cero: la tabla se modifica (altas, bajas, reordenamientos) y
+necesita arrays propios, así que cada columna se copia del mmap con una sola llamada a
+array.frombytes (una copia de memoria, sin convertir valores) y el archivo se cierra al
+terminar. Lo que se ahorra es leer, separar y validar cada fila del CSV.
+
+La validación es en dos pasos: si coinciden tamaño y mtime la instantánea se usa sin
+leer el CSV; si solo coincide el tamaño (archivo copiado o tocado) se compara el hash y,
+si coincide, se reescribe el encabezado con el mtime nuevo para no volver a calcularlo
+en los inicios siguientes.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from instrumentacion import medir
+from tabla_paises import TablaPaises
+
+
+MAGICO = b'PAISNAP1'
+VERSION = 1
+
+# mágico, versión, orden de bytes (1 = little endian), tamaño del CSV, mtime (ns), hash del CSV,
+# filas, bytes de nombres, bytes de metadatos
+ENCABEZADO = struct.Struct('<8sHHQq16sQQQ')
+
+
+def ruta_instantanea(nombre_archivo):
+    """Ruta de la instantánea asociada al archivo CSV."""
+    return nombre_archivo + ".snap"
+
+
+def hash_archivo(nombre_archivo):
+    """Hash (BLAKE2b de 16 bytes) del contenido del archivo, leído por bloques."""
+    resumen = hashlib.blake2b(digest_size=16)
+    with open(nombre_archivo, 'rb') as archivo:
+        while True:
+            bloque = archivo.read(1024 * 1024)
+            if not bloque:
+                break
+            resumen.update(bloque)
+    return resumen.digest()
+
+
+@medir()
+def guardar(nombre_archivo, tabla, motivos=None, estado=None):
+    """Escribe la instantánea de la tabla cargada desde nombre_archivo (de forma atómica).
+
+    estado es el os.stat del CSV tomado antes de cargarlo: si el CSV cambió mientras tanto
+    no se escribe nada, porque la tabla ya no corresponde al archivo. Retorna True si se guardó."""
+    actual = os.stat(nombre_archivo)
+    if estado is not None and (estado.st_size, estado.st_mtime_ns) != (actual.st_size, actual.st_mtime_ns):
+        return False
+
+    nombres, fin_nombre, poblacion, superficie, codigo_continente = tabla.buffers()
+    metadatos = json.dumps({"continentes": tabla.continentes, "motivos": motivos or {}},
+                           ensure_ascii=False).encode('utf-8')
+    encabezado = ENCABEZADO.pack(MAGICO, VERSION, sys.byteorder == 'little', actual.st_size,
+                                 actual.st_mtime_ns, hash_archivo(nombre_archivo), len(tabla),
+                                 len(nombres), len(metadatos))
+
+    ruta = ruta_instantanea(nombre_archivo)
+    temporal = ruta + ".tmp"
+    try:
+        with open(temporal, 'wb') as archivo:
+            archivo.write(encabezado)
+            for columna in (fin_nombre, poblacion, superficie, codigo_continente):
+                columna.tofile(archivo)
+            archivo.write(nombres)
+            archivo.write(metadatos)
+        os.replace(temporal, ruta)
+    except OSError:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        return False # la instantánea es solo una caché: si no se puede escribir se sigue sin ella
+    return True
+
+
+@medir(filas=lambda argumentos, resultado: len(resultado[0]) if resultado else 0)
+def cargar(nombre_archivo):
+    """Retorna (tabla, motivos) desde la instantánea si sigue siendo válida para el CSV, o None.
+    Las columnas de la tabla son copias (no vistas del mmap), ver el docstring del módulo."""
+    ruta = ruta_instantanea(nombre_archivo)
+    try:
+        estado = os.stat(nombre_archivo)
+        archivo = open(ruta, 'rb')
+    except OSError:
+        return None
+
+    with archivo:
+        if os.fstat(archivo.fileno()).st_size < ENCABEZADO.size:
+            return None
+        with mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            campos = ENCABEZADO.unpack_from(mapa)
+            (magico, version, little_endian, tamano, mtime_ns, hash_csv,
+             filas, largo_nombres, largo_metadatos) = campos
+
+            if magico != MAGICO or version != VERSION or bool(little_endian) != (sys.byteorder == 'little'):
+                return None
+            if tamano != estado.st_size:
+                return None
+            if mtime_ns != estado.st_mtime_ns and hash_archivo(nombre_archivo) != hash_csv:
+                return None
+            if len(mapa) != ENCABEZADO.size + 26 * filas + largo_nombres + largo_metadatos:
+                return None # instantánea incompleta
+
+            vista = memoryview(mapa)
+            try:
+                posicion = ENCABEZADO.size
+                columnas = []
+                for codigo_tipo in ('q', 'q', 'q', 'H'):
+                    columna = array(codigo_tipo)
+                    fin = posicion + columna.itemsize * filas
+                    columna.frombytes(vista[posicion:fin]) # copia de memoria del buffer, sin analizar filas
+                    columnas.append(columna)
+                    posicion = fin
+                nombres = bytearray(vista[posicion:posicion + largo_nombres])
+                posicion += largo_nombres
+                metadatos = json.loads(bytes(vista[posicion:posicion + largo_metadatos]).decode('utf-8'))
+            finally:
+                vista.release()
+
+    if mtime_ns != estado.st_mtime_ns: # el hash coincidió: el CSV solo se tocó o se copió
+        _actualizar_mtime(ruta, campos, estado.st_mtime_ns)
+
+    fin_nombre, poblacion, superficie, codigo_continente = columnas
+    tabla = TablaPaises.desde_buffers(nombres, fin_nombre, poblacion, superficie, codigo_continente,
+                                      metadatos["continentes"])
+    return tabla, metadatos["motivos"]
+
+
+def _actualizar_mtime(ruta, campos, mtime_ns):
+    """Reescribe en su lugar el encabezado de la instantánea con el mtime actual del CSV."""
+    campos = campos[:4] + (mtime_ns,) + campos[5:]
+    try:
+        with open(ruta, 'r+b') as archivo:
+            archivo.write(ENCABEZADO.pack(*campos))
+    except OSError:
+        pass # si no se puede, el próximo inicio vuelve a comparar el hash
+
+
+def descartar(nombre_archivo):
+    """Elimina la instantánea (si existe)."""
+    ruta = ruta_instantanea(nombre_archivo)
+    if os.path.exists(ruta):
+        os.remove(ruta)
@@ -0,0 +1,255 @@
+"""Instrumentación opcional: tiempo, filas procesadas, filas por segundo y memoria de cada operación.
+
+Las funciones a medir se marcan con el decorador medir(); el decorador solo las anota en
+un registro y devuelve la misma función, así que mientras la instrumentación está apagada
+no se agrega ningún costo. activar() reemplaza recién entonces cada función registrada
+(en su módulo y en los módulos del programa que la importaron por nombre) por una versión
+que mide cada llamada.
+
+Se activa con la variable de entorno PAISES_PERFIL (cualquier valor salvo '' o '0';
+'memoria' mide además la memoria pico con tracemalloc, que hace más lento al programa) o
+con las opciones --perfil/--perfil-memoria. Al terminar se muestra un resumen por
+operación en stderr y, si se indicó PAISES_TRAZA o --traza ARCHIVO, se escribe una traza
+en formato Chrome (se abre en chrome://tracing o https://ui.perfetto.dev).
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource # memoria máxima del proceso (solo en sistemas tipo Unix)
+except ImportError:
+    resource = None
+
+
+VARIABLE_PERFIL = "PAISES_PERFIL"
+VARIABLE_TRAZA = "PAISES_TRAZA"
+
+_REGISTRADAS = [] # (función, nombre de la operación, cálculo de filas)
+
+_estado = None # diccionario con las mediciones mientras la instrumentación está activa
+
+
+# Cantidad de filas procesadas por una llamada
+
+def filas_entrada(argumentos, resultado):
+    """Largo del primer argumento que tenga largo (la tabla o la lista de países)."""
+    for argumento in argumentos:
+        if not isinstance(argumento, (str, bytes)) and hasattr(argumento, '__len__'):
+            return len(argumento)
+    return filas_resultado(argumentos, resultado)
+
+
+def filas_resultado(argumentos, resultado):
+    """Largo del resultado (o el resultado mismo si es un número de filas)."""
+    if isinstance(resultado, int) and not isinstance(resultado, bool):
+        return resultado
+    if hasattr(resultado, '__len__') and not isinstance(resultado, (str, dict)):
+        return len(resultado)
+    return None
+
+
+def filas_tabla(argumentos, resultado):
+    """Largo de la tabla de un objeto auxiliar (el primer argumento es self, con atributo tabla)."""
+    return len(argumentos[0].tabla)
+
+
+def medir(nombre=None, filas=filas_entrada):
+    """Decorador: registra la función para medirla cuando se active la instrumentación.
+
+    nombre es el nombre de la operación en el resumen (por defecto, 'módulo.función') y
+    filas(argumentos, resultado) calcula cuántas filas procesó una llamada."""
+    def registrar(funcion):
+        operacion = nombre or funcion.__qualname__
+        if nombre is None and funcion.__module__ != '__main__':
+            operacion = f"{funcion.__module__}.{operacion}"
+        _REGISTRADAS.append((funcion, operacion, filas))
+        return funcion
+    return registrar
+
+
+def activa():
+    """True si la instrumentación está activa."""
+    return _estado is not None
+
+
+# Activación
+
+def configurar(perfil=False, memoria=False, traza=None):
+    """Activa la instrumentación si la piden las opciones o las variables de entorno."""
+    valor = os.environ.get(VARIABLE_PERFIL, "").strip().lower()
+    memoria = memoria or valor == 'memoria'
+    traza = traza or os.environ.get(VARIABLE_TRAZA) or None
+    if perfil or memoria or traza or valor not in ('', '0'):
+        activar(memoria, traza)
+
+
+def activar(memoria=False, traza=None):
+    """Envuelve las funciones registradas y programa el resumen (y la traza) para la salida del programa."""
+    global _estado
+    if _estado is not None:
+        return
+    if memoria:
+        import tracemalloc
+        tracemalloc.start()
+    _estado = {"operaciones": {}, "eventos": [] if traza else None, "memoria": memoria, "traza": traza,
+               "inicio": time.perf_counter(), "pila": threading.local()}
+
+    modulos = _modulos_del_programa()
+    for funcion, nombre, filas in _REGISTRADAS:
+        _reemplazar(funcion, _envolver(funcion, nombre, filas), modulos)
+    atexit.register(_finalizar)
+
+
+def _modulos_del_programa():
+    """Módulos cargados desde la carpeta del programa (incluido el script principal)."""
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    modulos = []
+    for modulo in list(sys.modules.values()):
+        ruta = getattr(modulo, '__file__', None)
+        if ruta and os.path.dirname(os.path.abspath(ruta)) == directorio:
+            modulos.append(modulo)
+    return modulos
+
+
+def _reemplazar(funcion, envoltura, modulos):
+    modulo = sys.modules.get(funcion.__module__)
+    partes = funcion.__qualname__.split('.')
+    if len(partes) > 1: # método: se reemplaza en la clase
+        clase = getattr(modulo, partes[0], None)
+        if clase is not None and clase.__dict__.get(partes[-1]) is funcion:
+            setattr(clase, partes[-1], envoltura)
+        return
+    for otro in modulos:
+        for atributo, valor in list(vars(otro).items()):
+            if valor is funcion:
+                setattr(otro, atributo, envoltura)
+
+
+def _envolver(funcion, nombre, filas):
+    memoria = _estado["memoria"]
+    if memoria:
+        import tracemalloc
+
+    @functools.wraps(funcion)
+    def envoltura(*argumentos, **opciones):
+        pila = _estado["pila"].__dict__.setdefault("llamadas", [])
+        if memoria:
+            # Cada operación mide su propio pico: el pico anterior se guarda en la operación que la contiene.
+            pico_previo = tracemalloc.get_traced_memory()[1]
+            if pila:
+                pila[-1][1] = max(pila[-1][1], pico_previo)
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        marco = [nombre, 0]
+        pila.append(marco)
+        inicio = time.perf_counter()
+        try:
+            resultado = funcion(*argumentos, **opciones)
+        finally:
+            duracion = time.perf_counter() - inicio
+            pila.pop()
+        pico = None
+        if memoria:
+            pico_total = max(tracemalloc.get_traced_memory()[1], marco[1])
+            pico = pico_total - base
+            if pila:
+                pila[-1][1] = max(pila[-1][1], pico_total)
+        _anotar(nombre, inicio, duracion, filas(argumentos, resultado), pico)
+        return resultado
+
+    return envoltura
+
+
+def _anotar(nombre, inicio, duracion, filas, pico):
+    operacion = _estado["operaciones"].get(nombre)
+    if operacion is None:
+        operacion = _estado["operaciones"][nombre] = {"llamadas": 0, "segundos": 0.0, "maximo": 0.0,
+                                                        "filas": 0, "memoria_pico": 0}
+    operacion["llamadas"] += 1
+    operacion["segundos"] += duracion
+    operacion["maximo"] = max(operacion["maximo"], duracion)
+    operacion["filas"] += filas or 0
+    if pico is not None:
+        operacion["memoria_pico"] = max(operacion["memoria_pico"], pico)
+
+    if _estado["eventos"] is not None:
+        argumentos = {"filas": filas}
+        if pico is not None:
+            argumentos["memoria_pico"] = pico
+        _estado["eventos"].append({"name": nombre, "cat": "paises", "ph": "X",
+                                   "ts": round((inicio - _estado["inicio"]) * 1e6, 1),
+                                   "dur": round(duracion * 1e6, 1), "pid": os.getpid(),
+                                   "tid": threading.get_ident(), "args": argumentos})
+
+
+# Resultados
+
+def resumen():
+    """Lista de mediciones por operación, en el orden en que se usaron por primera vez."""
+    if _estado is None:
+        return []
+    resultado = []
+    for nombre, datos in _estado["operaciones"].items():
+        segundos = datos["segundos"]
+        resultado.append({"operacion": nombre, **datos,
+                          "filas_por_segundo": datos["filas"] / segundos if segundos > 0 else 0.0})
+    return resultado
+
+
+def escribir_resumen(destino=None):
+    """Escribe la tabla de mediciones (por defecto en stderr)."""
+    destino = destino or sys.stderr
+    filas = resumen()
+    memoria = _estado is not None and _estado["memoria"]
+    if not filas:
+        print("\n Instrumentación: no se midió ninguna operación.", file=destino)
+        return
+
+    ancho = 126 if memoria else 112
+    print("\n" + "-" * ancho, file=destino)
+    titulo = (f"{'Operación':<56}{'Llamadas':>9}{'Total (ms)':>12}{'Media (ms)':>12}{'Máx (ms)':>11}"
+              f"{'Filas':>12}{'Filas/s':>14}")
+    print(titulo + (f"{'Mem. pico':>14}" if memoria else ""), file=destino)
+    print("-" * ancho, file=destino)
+    for datos in filas:
+        linea = (f"{datos['operacion'][:55]:<56}{datos['llamadas']:>9}{datos['segundos'] * 1000:>12.2f}"
+                 f"{datos['segundos'] * 1000 / datos['llamadas']:>12.3f}{datos['maximo'] * 1000:>11.2f}"
+                 f"{datos['filas']:>12,}{datos['filas_por_segundo']:>14,.0f}")
+        if memoria:
+            linea += f"{_tamano(datos['memoria_pico']):>14}"
+        print(linea, file=destino)
+    print("-" * ancho, file=destino)
+    if resource is not None:
+        # ru_maxrss está en KiB en Linux y en bytes en macOS
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        print(f" Memoria máxima del proceso: {_tamano(maximo)}", file=destino)
+
+
+def _tamano(cantidad_bytes):
+    for unidad in ('B', 'KiB', 'MiB'):
+        if cantidad_bytes < 1024:
+            return f"{cantidad_bytes:.0f} {unidad}" if unidad == 'B' else f"{cantidad_bytes:.1f} {unidad}"
+        cantidad_bytes /= 1024
+    return f"{cantidad_bytes:.1f} GiB"
+
+
+def escribir_traza(ruta):
+    """Escribe los eventos medidos en formato Chrome trace (JSON)."""
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({"traceEvents": _estado["eventos"] or [], "displayTimeUnit": "ms"}, archivo, ensure_ascii=False)
+
+
+def _finalizar():
+    escribir_resumen()
+    if _estado["traza"]:
+        try:
+            escribir_traza(_estado["traza"])
+            print(f" Traza escrita en '{_estado['traza']}'.", file=sys.stderr)
+        except OSError as error:
+            print(f" No se pudo escribir la traza '{_estado['traza']}': {error}", file=sys.stderr)
@@ -0,0 +1,13 @@
+"""Normalización de textos para comparar nombres sin distinguir mayúsculas ni acentos."""
+
+import unicodedata
+
+
+def normalizar(texto):
+    """Clave canónica de un texto: sin acentos, en minúsculas (casefold) y con los espacios
+    internos reducidos a uno. 'Perú', ' PERU ' y 'perú' tienen la misma clave."""
+    if texto.isascii(): # sin caracteres acentuados no hace falta descomponer
+        return ' '.join(texto.lower().split())
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_acentos.casefold().split())
@@ -0,0 +1,108 @@
+"""Motor de ordenamiento de países por una o varias claves.
+
+Reemplaza al ordenamiento por inserción (O(n²)) por el ordenamiento estable de Python
+(Timsort, O(n log n)). Para ordenar por varias claves se ordena una vez por clave,
+empezando por la menos significativa: como cada pasada es estable, el orden de las
+pasadas anteriores se conserva entre los elementos que empatan.
+
+Una tabla completa ordenada por un solo campo con índice (ver indices.ColumnaOrdenada)
+se resuelve con el índice ya mantenido, sin volver a ordenar.
+"""
+
+from indices import CAMPOS_ORDENABLES, columna_ordenada
+from instrumentacion import medir
+from tabla_paises import CAMPOS_DERIVADOS, TablaPaises, VistaPaises, valor_registro
+
+
+CAMPOS_VALIDOS = ('nombre', 'poblacion', 'superficie', 'continente') + CAMPOS_DERIVADOS
+
+
+def normalizar_claves(claves):
+    """Convierte la especificación de claves en una lista de pares (campo, descendente).
+
+    Acepta un campo suelto ('poblacion'), un campo con prefijo '-' para orden descendente
+    ('-poblacion'), un par (campo, 'a'/'d'), o una lista/cadena separada por comas con
+    cualquiera de las formas anteriores: 'continente,-poblacion'. También acepta el
+    resultado de una normalización anterior (pares (campo, descendente))."""
+    if isinstance(claves, str):
+        claves = [c for c in claves.split(',') if c.strip()]
+    elif isinstance(claves, tuple) and len(claves) == 2 and claves[1] in ('a', 'd'):
+        claves = [claves]
+
+    pasos = []
+    for clave in claves:
+        if isinstance(clave, tuple):
+            campo, orden = clave
+            descendente = orden is True or orden == 'd'
+        else:
+            campo = clave.strip()
+            descendente = campo.startswith('-')
+            campo = campo.lstrip('+-')
+
+        campo = campo.strip().lower()
+        if campo not in CAMPOS_VALIDOS:
+            raise ValueError(f"Clave de ordenamiento desconocida: '{campo}'")
+        pasos.append((campo, descendente))
+
+    if not pasos:
+        raise ValueError("Debe indicar al menos una clave de ordenamiento.")
+    return pasos
+
+
+@medir()
+def ordenar_indices(tabla, claves, indices=None):
+    """Retorna los índices de filas de la tabla (o de indices) ordenados por las claves.
+
+    Se ordenan enteros usando las columnas como clave: no se crea ningún objeto fila."""
+    pasos = normalizar_claves(claves)
+    if indices is None and len(pasos) == 1 and pasos[0][0] in CAMPOS_ORDENABLES:
+        campo, descendente = pasos[0]
+        return columna_ordenada(tabla, campo).ordenados(descendente)
+
+    resultado = list(range(len(tabla))) if indices is None else list(indices)
+
+    for campo, descendente in reversed(pasos):
+        resultado.sort(key=tabla.funcion_valor(campo), reverse=descendente)
+
+    return resultado
+
+
+@medir()
+def ordenar_registros(registros, claves, en_lugar=False):
+    """Ordena los registros por una o varias claves, de forma estable.
+
+    Si en_lugar es False (valor por defecto) devuelve una lista nueva que referencia a los
+    mismos diccionarios y no modifica la original; si es True reordena la lista recibida
+    y la devuelve. Con una TablaPaises (o una VistaPaises) el resultado es una VistaPaises
+    con los índices ordenados, o la misma tabla reordenada si en_lugar es True."""
+    if isinstance(registros, TablaPaises):
+        indices = ordenar_indices(registros, claves)
+        if en_lugar:
+            registros.reordenar(indices)
+            return registros
+        return VistaPaises(registros, indices)
+
+    if isinstance(registros, VistaPaises):
+        indices = ordenar_indices(registros.tabla, claves, registros.indices)
+        if en_lugar:
+            registros.indices = indices
+            return registros
+        return VistaPaises(registros.tabla, indices)
+
+    pasos = normalizar_claves(claves)
+    resultado = registros if en_lugar else list(registros)
+
+    # Una pasada estable por clave, de la menos significativa a la más significativa.
+    # reverse=True también es estable en Python, por eso no hace falta invertir valores.
+    for campo, descendente in reversed(pasos):
+        resultado.sort(key=valor_registro(campo), reverse=descendente)
+
+    return resultado
+
+
+def describir_claves(claves):
+    """Texto legible con el criterio de ordenamiento (para los títulos de los informes)."""
+    partes = []
+    for campo, descendente in normalizar_claves(claves):
+        partes.append(f"{campo.title()} ({'desc' if descendente else 'asc'})")
+    return ", ".join(partes)
@@ -0,0 +1,239 @@
+"""Persistencia incremental: registro de cambios (append-only) y escritura atómica del CSV.
+
+Cada alta o modificación se agrega como una línea JSON al archivo '<csv>.log' (con fsync),
+en lugar de reescribir todo el CSV. Al iniciar, el registro se vuelve a aplicar sobre el
+CSV base. La compactación (reescribir el CSV completo y vaciar el registro) se hace solo
+al salir o cuando el registro supera UMBRAL_COMPACTACION bytes, y siempre de forma atómica:
+archivo temporal + fsync + os.replace, de modo que un corte a mitad de escritura nunca
+deja el CSV a medio escribir.
+
+La compactación puede hacerse desde otro hilo (ver segundo_plano) a partir de una copia
+de la tabla tomada cuando el registro medía N bytes: en ese caso solo se descartan esos N
+bytes y se conservan los cambios agregados mientras tanto. Las escrituras del registro
+se serializan con un cerrojo para que ningún cambio caiga en un registro ya descartado.
+
+Guardar sin cambios (ver cambios_sin_guardar) no escribe nada, y si desde el último
+guardado solo se agregaron países el CSV se pone al día agregando esas filas al final
+(anexar_filas_csv) en lugar de reescribirse completo.
+"""
+
+import csv
+import io
+import json
+import os
+import threading
+
+
+UMBRAL_COMPACTACION = 4 * 1024 * 1024 # Tamaño del registro (bytes) a partir del cual se compacta
+
+_cerrojo_registro = threading.Lock() # agregar al registro y recortarlo no pueden intercalarse
+
+
+def ruta_registro(nombre_archivo):
+    """Ruta del registro de cambios asociado al archivo CSV."""
+    return nombre_archivo + ".log"
+
+
+def _sincronizar_directorio(ruta):
+    """fsync del directorio que contiene ruta, para que el rename sea durable (solo POSIX)."""
+    if os.name != 'posix':
+        return
+    descriptor = os.open(os.path.dirname(os.path.abspath(ruta)), os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def escribir_atomico(nombre_archivo, escribir, binario=False):
+    """Escribe el archivo completo en un temporal con escribir(archivo) y lo reemplaza
+    atómicamente por el original (el temporal se abre en modo texto UTF-8 o binario)."""
+    temporal = nombre_archivo + ".tmp"
+    try:
+        if binario:
+            archivo = open(temporal, 'wb')
+        else:
+            archivo = open(temporal, 'w', encoding='utf-8', newline='')
+        with archivo:
+            escribir(archivo)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, nombre_archivo)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    _sincronizar_directorio(nombre_archivo)
+
+
+def escribir_csv_atomico(nombre_archivo, encabezado, filas):
+    """Escribe el CSV completo en un temporal y lo reemplaza atómicamente por el original."""
+    def escribir(archivo):
+        escritor_csv = csv.writer(archivo)
+        escritor_csv.writerow(encabezado)
+        escritor_csv.writerows(filas)
+
+    escribir_atomico(nombre_archivo, escribir)
+
+
+def anexar_filas_csv(nombre_archivo, filas):
+    """Agrega filas al final del CSV sin reescribirlo (un solo write + fsync). Retorna False,
+    sin tocar el archivo, si no existe o no termina en un salto de línea (hay que reescribirlo).
+
+    Si la escritura falla, el archivo se recorta al tamaño que tenía. Un corte de energía a
+    mitad de la escritura puede dejar una última fila incompleta, pero las altas siguen en
+    el registro de cambios (se descarta recién después) y al cargar lo corrigen: ver
+    reproducir_registro."""
+    try:
+        archivo = open(nombre_archivo, 'r+b')
+    except FileNotFoundError:
+        return False
+    with archivo:
+        tamano = archivo.seek(0, os.SEEK_END)
+        if tamano == 0:
+            return False
+        archivo.seek(max(0, tamano - 2))
+        final = archivo.read()
+        if not final.endswith(b"\n"):
+            return False
+
+        texto = io.StringIO(newline='')
+        fin_linea = "\r\n" if final.endswith(b"\r\n") else "\n" # el mismo fin de línea que el resto del archivo
+        csv.writer(texto, lineterminator=fin_linea).writerows(filas)
+        try:
+            archivo.write(texto.getvalue().encode('utf-8'))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        except BaseException:
+            archivo.truncate(tamano)
+            raise
+    return True
+
+
+def cambios_sin_guardar(nombre_archivo, tabla):
+    """True si el archivo de datos no refleja la tabla: hubo cambios desde el último guardado
+    (ver TablaPaises.modificada) o quedan entradas en el registro de cambios."""
+    return getattr(tabla, 'modificada', True) or tamano_registro(nombre_archivo) > 0
+
+
+# Registro de cambios
+
+def cambio_alta(pais):
+    """Entrada de registro para un país nuevo."""
+    return {"op": "alta", "pais": dict(pais)}
+
+
+def cambio_modificacion(nombre, campos):
+    """Entrada de registro para la modificación de campos de un país existente."""
+    return {"op": "modificacion", "nombre": nombre, "campos": dict(campos)}
+
+
+def anexar_cambios(nombre_archivo, cambios):
+    """Agrega las entradas al final del registro (un solo write + fsync). Retorna el tamaño del registro.
+    Si la escritura falla (disco lleno) el registro vuelve a su tamaño anterior: una línea a medias
+    quedaría pegada a la entrada siguiente. Por lo mismo, si el registro termina en una línea
+    incompleta (un corte anterior) las entradas nuevas empiezan en una línea aparte."""
+    texto = "".join(json.dumps(cambio, ensure_ascii=False) + "\n" for cambio in cambios)
+    with _cerrojo_registro, open(ruta_registro(nombre_archivo), 'a+b', buffering=0) as archivo:
+        tamano = archivo.seek(0, os.SEEK_END)
+        if tamano:
+            archivo.seek(tamano - 1)
+            if archivo.read(1) != b"\n":
+                texto = "\n" + texto # la línea incompleta queda sola y leer_registro la descarta
+        datos = memoryview(texto.encode('utf-8'))
+        try:
+            while datos: # sin búfer: lo que no se escribió no queda pendiente para el cierre
+                datos = datos[archivo.write(datos):]
+            os.fsync(archivo.fileno())
+        except OSError:
+            os.truncate(archivo.name, tamano)
+            raise
+        return archivo.tell()
+
+
+def anexar_cambio(nombre_archivo, cambio):
+    """Agrega una entrada al registro. Retorna el tamaño del registro en bytes."""
+    return anexar_cambios(nombre_archivo, [cambio])
+
+
+def leer_registro(nombre_archivo):
+    """Genera las entradas válidas del registro. Una última línea incompleta (corte durante
+    la escritura) se descarta, igual que una línea que no es JSON válido (una línea incompleta
+    a la que anexar_cambios ya agregó entradas en la línea siguiente)."""
+    ruta = ruta_registro(nombre_archivo)
+    if not os.path.exists(ruta):
+        return
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        for linea in archivo:
+            if not linea.endswith("\n"):
+                break
+            try:
+                yield json.loads(linea)
+            except ValueError:
+                continue
+
+
+def reproducir_registro(nombre_archivo, lista_paises):
+    """Aplica sobre lista_paises (TablaPaises) los cambios pendientes del registro. Retorna la cantidad aplicada.
+
+    Es idempotente: un alta de un país que ya existe vuelve a fijar sus valores (por si el
+    archivo quedó con la fila incompleta) y una modificación vuelve a fijar los mismos valores,
+    por eso no hay problema si el registro ya estaba compactado."""
+    aplicados = 0
+
+    for cambio in leer_registro(nombre_archivo):
+        operacion = cambio.get("op")
+        if operacion == "alta":
+            pais = cambio["pais"]
+            i = lista_paises.indice_de(pais["nombre"])
+            if i is None:
+                lista_paises.append(pais)
+                aplicados += 1
+                continue
+            version = lista_paises.version
+            for campo in ('poblacion', 'superficie', 'continente'):
+                lista_paises[i][campo] = pais[campo]
+            aplicados += lista_paises.version != version # solo cuenta si cambió algo
+        elif operacion == "modificacion":
+            i = lista_paises.indice_de(cambio["nombre"])
+            if i is None:
+                continue
+            for campo, valor in cambio["campos"].items():
+                lista_paises[i][campo] = valor
+            aplicados += 1
+
+    return aplicados
+
+
+def tamano_registro(nombre_archivo):
+    ruta = ruta_registro(nombre_archivo)
+    return os.path.getsize(ruta) if os.path.exists(ruta) else 0
+
+
+def descartar_registro(nombre_archivo, hasta=None):
+    """Descarta el registro de cambios, o solo sus primeros 'hasta' bytes (los ya incluidos
+    en el CSV) conservando lo que se agregó después."""
+    ruta = ruta_registro(nombre_archivo)
+    with _cerrojo_registro:
+        if not os.path.exists(ruta):
+            return
+        if hasta is None or os.path.getsize(ruta) <= hasta:
+            os.remove(ruta)
+            return
+        with open(ruta, 'rb') as archivo:
+            archivo.seek(hasta)
+            resto = archivo.read()
+        temporal = ruta + ".tmp"
+        with open(temporal, 'wb') as archivo:
+            archivo.write(resto)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+
+
+def compactar(nombre_archivo, escribir, registro_hasta=None):
+    """Reescribe el archivo de datos completo con escribir(nombre_archivo) (que debe hacerlo de
+    forma atómica, ver escribir_atomico) y luego descarta el registro de cambios (o sus
+    primeros registro_hasta bytes, si el archivo se armó con una copia anterior)."""
+    escribir(nombre_archivo)
+    descartar_registro(nombre_archivo, registro_hasta)
@@ -0,0 +1,132 @@
+"""Escritura de listados de países por lotes, en formato de tabla o en formatos para máquinas.
+
+En lugar de un print por fila, las filas se formatean de a TAMANO_LOTE y cada lote se
+escribe con una sola llamada a write. El formato 'tabla' es el mismo del menú (miles
+separados con punto); 'csv', 'tsv' y 'jsonl' escriben los números tal cual, sin formato
+local. En 'tsv' la barra invertida, la tabulación y los saltos de línea de un texto se
+escriben como \\\\, \\t, \\n y \\r, para que cada país ocupe una línea con cuatro columnas
+(igual que 'csv' usa comillas y 'jsonl' escapa con JSON). Para una TablaPaises o una
+VistaPaises los datos se leen directamente de las columnas, sin crear un diccionario por fila.
+"""
+
+import csv
+import io
+import sys
+from itertools import islice
+from json.encoder import encode_basestring
+
+from instrumentacion import filas_resultado, medir
+from tabla_paises import CAMPOS, TablaPaises, VistaPaises
+
+
+TAMANO_LOTE = 4096 # Filas que se formatean juntas antes de escribirlas
+
+FORMATOS = ('tabla', 'csv', 'tsv', 'jsonl', 'json') # 'json' es sinónimo de 'jsonl' (un objeto por línea)
+
+SEPARADOR_TABLA = "-" * 75
+
+
+def _tuplas(paises, desplazamiento=0, limite=None):
+    """Genera (nombre, poblacion, superficie, continente) de las filas pedidas."""
+    fin = None if limite is None else desplazamiento + limite
+
+    if isinstance(paises, VistaPaises):
+        tabla, indices = paises.tabla, paises.indices[desplazamiento:fin]
+    elif isinstance(paises, TablaPaises):
+        if desplazamiento == 0 and limite is None:
+            yield from paises.tuplas()
+            return
+        tabla, indices = paises, range(len(paises))[desplazamiento:fin]
+    else:
+        for p in islice(paises, desplazamiento, fin):
+            yield p['nombre'], p['poblacion'], p['superficie'], p['continente']
+        return
+
+    nombre = tabla.nombre
+    poblacion, superficie = tabla.poblacion, tabla.superficie
+    codigo_continente, continentes = tabla.codigo_continente, tabla.continentes
+    for i in indices:
+        yield nombre(i), poblacion[i], superficie[i], continentes[codigo_continente[i]]
+
+
+# Formateo de un lote de filas (cada función devuelve el texto completo del lote)
+
+_numeros_tabla = "{:<18,}{:<20,}".format
+
+
+def _lote_tabla(lote):
+    return "".join([f"{n:<20}{_numeros_tabla(p, s).replace(',', '.')}{c}\n" for n, p, s, c in lote])
+
+
+_escapes_tsv = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _lote_tsv(lote):
+    escapes = _escapes_tsv
+    return "".join([f"{n.translate(escapes)}\t{p}\t{s}\t{c.translate(escapes)}\n" for n, p, s, c in lote])
+
+
+_continentes_json = {} # continente -> texto JSON ya escapado (los continentes se repiten mucho)
+
+
+def _lote_jsonl(lote):
+    textos = _continentes_json
+    lineas = []
+    for n, p, s, c in lote:
+        continente = textos.get(c)
+        if continente is None:
+            continente = textos[c] = encode_basestring(c)
+        lineas.append(f'{{"nombre": {encode_basestring(n)}, "poblacion": {p}, "superficie": {s}, "continente": {continente}}}\n')
+    return "".join(lineas)
+
+
+def _formateador_csv():
+    buffer = io.StringIO()
+    escritor_csv = csv.writer(buffer, lineterminator='\n')
+
+    def lote_csv(lote):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor_csv.writerows(lote)
+        return buffer.getvalue()
+    return lote_csv
+
+
+@medir(filas=filas_resultado)
+def escribir_paises(paises, formato='tabla', destino=None, limite=None, desplazamiento=0):
+    """Escribe los países (desde la posición 'desplazamiento', como mucho 'limite' filas) en
+    destino (por defecto sys.stdout). Retorna la cantidad de filas escritas."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de salida no válido: '{formato}'. Opciones: {', '.join(FORMATOS)}.")
+    if destino is None:
+        destino = sys.stdout
+    if (limite is not None and limite < 0) or desplazamiento < 0:
+        raise ValueError("El límite y el desplazamiento no pueden ser negativos.")
+
+    if formato == 'tabla':
+        if not paises or desplazamiento >= len(paises) or limite == 0:
+            destino.write("La lista de países a mostrar está vacía.\n")
+            return 0
+        destino.write(f"{SEPARADOR_TABLA}\n{'Nombre':<20}{'Población':<18}{'Superficie (km²)':<20}{'Continente'}\n{SEPARADOR_TABLA}\n")
+        formatear = _lote_tabla
+    elif formato == 'csv':
+        destino.write(",".join(CAMPOS) + "\n")
+        formatear = _formateador_csv()
+    elif formato == 'tsv':
+        destino.write("\t".join(CAMPOS) + "\n")
+        formatear = _lote_tsv
+    else:
+        formatear = _lote_jsonl
+
+    filas = _tuplas(paises, desplazamiento, limite)
+    escritas = 0
+    while True:
+        lote = list(islice(filas, TAMANO_LOTE))
+        if not lote:
+            break
+        destino.write(formatear(lote))
+        escritas += len(lote)
+
+    if formato == 'tabla':
+        destino.write(SEPARADOR_TABLA + "\n")
+    return escritas
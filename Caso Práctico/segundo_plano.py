@@ -0,0 +1,90 @@
+"""Guardado del CSV en un hilo aparte, para que el menú no espere la reescritura del archivo.
+
+Cada pedido de guardado toma en el momento una copia de la tabla (TablaPaises.copia, que
+copia las columnas completas sin recorrer filas) junto con el tamaño que tenía el registro
+de cambios, y la deja pendiente para el hilo escritor. Si llegan varios pedidos antes de
+que el hilo empiece a escribir, solo se escribe el último: cada copia ya contiene todos los
+cambios anteriores. El hilo escribe el CSV de forma atómica y recorta del registro solo la
+parte incluida en la copia (ver persistencia.compactar). Cuando la escritura termina bien,
+la tabla queda marcada como guardada en la versión que tenía al copiarla (ver
+TablaPaises.marcar_guardada): los cambios posteriores siguen pendientes.
+
+La durabilidad no cambia: cada cambio se sigue agregando al registro (con fsync) antes de
+volver al menú, y si el programa termina a mitad de una escritura el CSV queda completo
+(versión anterior) y el registro conserva los cambios. Un error del hilo se guarda y se
+lanza en el hilo principal en el siguiente pedido o al esperar(); el guardado al salir
+llama a esperar() para no terminar con escrituras pendientes. El menú muestra ese error
+como un mensaje y sigue (ver mostrar_error_guardado); la línea de comandos termina con 1.
+"""
+
+import threading
+
+import persistencia
+
+
+class EscritorSegundoPlano:
+    """Hilo escritor con un pedido pendiente por archivo (los pedidos seguidos se combinan)."""
+
+    def __init__(self, escribir):
+        # escribir(nombre_archivo, copia, registro_hasta) hace la escritura real desde el hilo
+        self._escribir = escribir
+        self._condicion = threading.Condition()
+        self._pendientes = {} # nombre de archivo -> (copia, bytes del registro incluidos, tabla, versión copiada)
+        self._escribiendo = False
+        self._error = None
+        self._hilo = None
+        self.pedidos = 0
+        self.escrituras = 0
+
+    def programar(self, nombre_archivo, tabla):
+        """Deja pendiente el guardado de una copia de la tabla tal como está ahora."""
+        self._lanzar_error()
+        copia = tabla.copia() if hasattr(tabla, 'copia') else [dict(pais) for pais in tabla]
+        registro_hasta = persistencia.tamano_registro(nombre_archivo)
+        version = getattr(tabla, 'version', None)
+        with self._condicion:
+            self._pendientes[nombre_archivo] = (copia, registro_hasta, tabla, version) # reemplaza al pedido anterior
+            self.pedidos += 1
+            if self._hilo is None:
+                # daemon: si el programa termina sin esperar(), el CSV anterior y el registro siguen completos
+                self._hilo = threading.Thread(target=self._trabajar, name="escritor-csv", daemon=True)
+                self._hilo.start()
+            self._condicion.notify_all()
+
+    def pendiente(self):
+        """True si hay un guardado pendiente o en curso."""
+        with self._condicion:
+            return bool(self._pendientes) or self._escribiendo
+
+    def esperar(self):
+        """Espera a que terminen los guardados pendientes. Lanza el error del hilo escritor, si hubo."""
+        with self._condicion:
+            while self._pendientes or self._escribiendo:
+                self._condicion.wait()
+        self._lanzar_error()
+
+    def _lanzar_error(self):
+        with self._condicion:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _trabajar(self):
+        while True:
+            with self._condicion:
+                while not self._pendientes:
+                    self._condicion.wait()
+                nombre_archivo, (copia, registro_hasta, tabla, version) = self._pendientes.popitem()
+                self._escribiendo = True
+            try:
+                self._escribir(nombre_archivo, copia, registro_hasta)
+                if version is not None:
+                    tabla.marcar_guardada(version)
+            except Exception as error: # se informa en el hilo principal
+                with self._condicion:
+                    self._error = error
+            finally:
+                with self._condicion:
+                    self._escribiendo = False
+                    self.escrituras += 1
+                    self._condicion.notify_all()
@@ -0,0 +1,408 @@
+"""Servidor local: varios operadores trabajan sobre una sola copia de los datos en memoria.
+
+Protocolo: JSON Lines sobre un socket Unix ('unix:RUTA') o TCP local ('HOST:PUERTO'). Cada
+línea que envía el cliente es un pedido {"op": ..., "id": ...} y el servidor responde una
+línea {"id": ..., "ok": true, "version": N, "resultado": ...} o, ante un error,
+{"id": ..., "ok": false, "error": texto, "tipo": "invalido" | "conflicto" | "error"} ("error":
+el pedido era válido pero falló en el servidor, por ejemplo al escribir el registro).
+
+Lecturas: version, get, search, filter (o sort), stats, top y changes. Se resuelven en el bucle de
+asyncio con los índices en memoria (cada una es corta), así que nunca esperan a una
+escritura: mientras una escritura hace fsync en otro hilo, las lecturas siguen atendiéndose.
+
+Escrituras: add y update. Se serializan con un asyncio.Lock y usan versionado optimista:
+cada país tiene la versión de su última modificación (get la informa; la lleva la tabla,
+ver TablaPaises.seguir_cambios) y un update con
+"version" solo se aplica si el país no cambió desde entonces; si cambió, responde un
+conflicto con la versión actual para que el cliente vuelva a leer y reintente. Cada
+escritura se valida completa antes de tocar la tabla, se aplica en memoria y se agrega al
+registro de cambios (con fsync, ver persistencia) antes de responder: el cliente recibe "ok"
+solo cuando el cambio está en disco (mientras tanto, una lectura ya puede verlo), y si la
+escritura del registro falla el cambio se deshace en la tabla. Así el registro nunca guarda un cambio que la tabla rechazó. La
+compactación del CSV se hace en segundo plano (ver segundo_plano), igual que en el menú.
+
+Sincronización: changes {"desde": N} responde los países que cambiaron después de la
+versión N (ver TablaPaises.cambios_desde), para que un cliente que guarda una copia la
+ponga al día sin volver a pedir todo. Las versiones empiezan en 0 en cada arranque.
+
+Uso como cliente (un pedido por argumento):
+    python servidor.py unix:paises.csv.sock '{"op": "search", "texto": "arg"}'
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+
+import consultas
+import estadisticas
+import persistencia
+from busqueda import buscar_paises, indice_busqueda
+from carga_csv import validar_entero_desde_archivo, validar_fila
+from indices import columna_ordenada, grupos_continente
+from tabla_paises import CAMPOS_NUMERICOS
+
+
+MAXIMO_FILAS = 1000 # Filas por respuesta cuando el pedido no indica 'limite'
+
+CAMPOS_ACTUALIZABLES = ('poblacion', 'superficie')
+
+
+class ErrorPedido(Exception):
+    """Pedido inválido (operación desconocida, datos faltantes o no válidos)."""
+    tipo = "invalido"
+
+
+class ConflictoVersion(ErrorPedido):
+    """El país cambió desde la versión que indicó el cliente."""
+    tipo = "conflicto"
+
+    def __init__(self, mensaje, version):
+        super().__init__(mensaje)
+        self.version = version
+
+
+def direccion_por_defecto(nombre_archivo):
+    """Socket Unix junto al CSV ('<csv>.sock'), o TCP local donde no hay sockets Unix."""
+    if hasattr(socket, 'AF_UNIX'):
+        return "unix:" + nombre_archivo + ".sock"
+    return "127.0.0.1:8765"
+
+
+def _separar_direccion(direccion):
+    """('unix', ruta) o ('tcp', (host, puerto)). 'PUERTO' solo equivale a 127.0.0.1:PUERTO."""
+    if direccion.startswith("unix:"):
+        return 'unix', direccion[len("unix:"):]
+    host, _, puerto = direccion.rpartition(":")
+    if not puerto.isdecimal():
+        raise ValueError(f"Dirección no válida: '{direccion}' (use unix:RUTA o HOST:PUERTO).")
+    return 'tcp', (host or "127.0.0.1", int(puerto))
+
+
+class ServidorPaises:
+    """Atiende pedidos de varios clientes sobre una TablaPaises compartida."""
+
+    def __init__(self, tabla, nombre_archivo, escritor):
+        self.tabla = tabla
+        self.nombre_archivo = nombre_archivo
+        self.escritor = escritor # EscritorSegundoPlano que compacta el CSV (ver segundo_plano)
+        self.escrituras = 0      # escrituras aplicadas desde que arrancó el servidor
+        self.pedidos = 0
+        self.conflictos = 0
+        self._cerrojo_escritura = asyncio.Lock()
+        self._lecturas = {
+            'version': self._version, 'get': self._obtener, 'search': self._buscar,
+            'filter': self._filtrar, 'sort': self._filtrar, 'stats': self._estadisticas, 'top': self._ranking,
+            'changes': self._cambios_desde,
+        }
+        self._escrituras = {'add': self._agregar, 'update': self._actualizar}
+        tabla.seguir_cambios() # las versiones de cada país (si la tabla no las venía siguiendo, desde ahora)
+
+    @property
+    def version(self):
+        """Versión de los datos: crece con cada cambio (ver TablaPaises.version)."""
+        return self.tabla.version
+
+    def preparar(self):
+        """Construye antes de atender los índices que usan las lecturas: construirlos con el
+        primer pedido frenaría a todos los clientes conectados mientras tanto."""
+        self.tabla.indice_de("")
+        indice_busqueda(self.tabla)
+        estadisticas.motor_estadisticas(self.tabla)
+        for campo in CAMPOS_NUMERICOS:
+            columna_ordenada(self.tabla, campo)
+        grupos_continente(self.tabla)
+
+    # Conexiones
+
+    async def atender(self, lector, escritor):
+        """Atiende los pedidos de una conexión, de a uno, hasta que el cliente la cierra."""
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                respuesta = await self.procesar(linea)
+                escritor.write(json.dumps(respuesta, ensure_ascii=False).encode('utf-8') + b"\n")
+                await escritor.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass # el cliente cortó la conexión
+        finally:
+            escritor.close()
+
+    async def procesar(self, linea):
+        """Respuesta (diccionario) a una línea de pedido."""
+        self.pedidos += 1
+        identificador = None
+        try:
+            try:
+                pedido = json.loads(linea)
+            except ValueError:
+                raise ErrorPedido("El pedido no es JSON válido.")
+            if not isinstance(pedido, dict):
+                raise ErrorPedido("El pedido debe ser un objeto JSON.")
+            identificador = pedido.get('id')
+            operacion = pedido.get('op')
+            if operacion in self._lecturas:
+                resultado = self._lecturas[operacion](pedido)
+            elif operacion in self._escrituras:
+                async with self._cerrojo_escritura:
+                    resultado = await self._escrituras[operacion](pedido)
+            else:
+                raise ErrorPedido(f"Operación desconocida: '{operacion}'. Opciones: "
+                                  f"{', '.join(list(self._lecturas) + list(self._escrituras))}.")
+        except ErrorPedido as error:
+            respuesta = {"id": identificador, "ok": False, "error": str(error), "tipo": error.tipo}
+            if isinstance(error, ConflictoVersion):
+                self.conflictos += 1
+                respuesta["version"] = error.version
+            return respuesta
+        except (ValueError, TypeError, KeyError) as error:
+            return {"id": identificador, "ok": False, "error": f"Pedido no válido: {error}", "tipo": "invalido"}
+        except Exception as error: # un error inesperado no corta la conexión del cliente
+            print(f" Error al atender el pedido {identificador!r}: {error!r}", file=sys.stderr)
+            return {"id": identificador, "ok": False, "error": f"Error del servidor: {error}", "tipo": "error"}
+        return {"id": identificador, "ok": True, "version": self.version, "resultado": resultado}
+
+    # Lecturas
+
+    def _fila(self, nombre):
+        if not isinstance(nombre, str) or not nombre.strip():
+            raise ErrorPedido("Falta el nombre del país.")
+        fila = self.tabla.indice_de(nombre)
+        if fila is None:
+            raise ErrorPedido(f"El país '{nombre}' no fue encontrado.")
+        return fila
+
+    def _registros(self, vista):
+        registro = self.tabla.registro
+        return [registro(i) for i in vista.indices]
+
+    def _version(self, pedido):
+        return {"version": self.version, "paises": len(self.tabla)}
+
+    def _obtener(self, pedido):
+        fila = self._fila(pedido.get('nombre'))
+        return {"pais": self.tabla.registro(fila), "version": self.tabla.version_de(self.tabla.nombre(fila))}
+
+    def _buscar(self, pedido):
+        texto = pedido.get('texto')
+        if not isinstance(texto, str) or not texto.strip():
+            raise ErrorPedido("Falta el texto a buscar.")
+        limite = pedido.get('limite', MAXIMO_FILAS)
+        return self._registros(buscar_paises(self.tabla, texto, bool(pedido.get('aproximado')), limite))
+
+    def _filtrar(self, pedido):
+        rangos = {}
+        for campo in CAMPOS_NUMERICOS:
+            rango = pedido.get(campo)
+            if rango is not None:
+                minimo, maximo = rango
+                rangos[campo] = (minimo, maximo)
+        continente = pedido.get('continente')
+        consulta = consultas.consulta(self.tabla).donde(continente.strip().title() if continente else None, **rangos)
+        if pedido.get('por'):
+            consulta.ordenar_por(pedido['por'])
+        consulta.desde(pedido.get('desde', 0)).limite(pedido.get('limite', MAXIMO_FILAS))
+        return self._registros(consulta.resultado())
+
+    def _estadisticas(self, pedido):
+        campos = [pedido['campo']] if pedido.get('campo') else list(CAMPOS_NUMERICOS)
+        continente = pedido.get('continente')
+        motor = estadisticas.motor_estadisticas(self.tabla)
+        resultado = {}
+        for campo in campos:
+            if campo not in CAMPOS_NUMERICOS:
+                raise ErrorPedido(f"Campo no válido: '{campo}'. Opciones: {', '.join(CAMPOS_NUMERICOS)}.")
+            resultado[campo] = motor.resumen(campo, continente.strip().title() if continente else None)
+        return resultado
+
+    def _ranking(self, pedido):
+        campo = pedido.get('campo', 'poblacion')
+        if campo not in CAMPOS_NUMERICOS:
+            raise ErrorPedido(f"Campo no válido: '{campo}'. Opciones: {', '.join(CAMPOS_NUMERICOS)}.")
+        cantidad = pedido.get('cantidad', 10)
+        if not isinstance(cantidad, int) or cantidad < 0:
+            raise ErrorPedido("La cantidad debe ser un entero no negativo.")
+        continente = pedido.get('continente')
+        return self._registros(consultas.ranking(self.tabla, campo, cantidad, not pedido.get('menores'),
+                                                 continente.strip().title() if continente else None))
+
+    def _cambios_desde(self, pedido):
+        desde = pedido.get('desde', 0)
+        limite = pedido.get('limite', MAXIMO_FILAS)
+        if not isinstance(desde, int) or desde < 0 or not isinstance(limite, int) or limite < 1:
+            raise ErrorPedido("'desde' debe ser un entero no negativo y 'limite' uno positivo.")
+        if desde > self.version:
+            raise ErrorPedido(f"La versión {desde} es posterior a la actual ({self.version}): "
+                              "el servidor se reinició, vuelva a leer todo.")
+        cambios = self.tabla.cambios_desde(desde, limite)
+        # 'hasta': versión desde la que seguir pidiendo (la actual si ya no quedan cambios)
+        hasta = cambios[-1]["version"] if len(cambios) == limite else self.version
+        return {"cambios": cambios, "hasta": hasta}
+
+    # Escrituras (se ejecutan de a una, con el cerrojo de escritura tomado)
+
+    async def _persistir(self, cambios):
+        """Agrega los cambios al registro desde otro hilo, para no frenar las lecturas durante el fsync."""
+        return await asyncio.to_thread(persistencia.anexar_cambios, self.nombre_archivo, cambios)
+
+    def _confirmar(self, tamano_registro):
+        self.escrituras += 1
+        if tamano_registro > persistencia.UMBRAL_COMPACTACION and not self.escritor.pendiente():
+            self.escritor.programar(self.nombre_archivo, self.tabla)
+
+    async def _agregar(self, pedido):
+        pais = validar_fila(*(str(pedido[campo]) if pedido.get(campo) is not None else None
+                              for campo in ('nombre', 'poblacion', 'superficie', 'continente')))
+        if pais is None:
+            raise ErrorPedido("Datos inválidos: nombre y continente no pueden estar vacíos; población y "
+                              "superficie deben ser enteros positivos.")
+        if self.tabla.indice_de(pais["nombre"]) is not None:
+            raise ErrorPedido(f"El país '{pais['nombre']}' ya existe.")
+        fila = self.tabla.append(pais) # validar_fila ya comprobó que los valores entran en la tabla
+        try:
+            tamano = await self._persistir([persistencia.cambio_alta(pais)])
+        except Exception:
+            self.tabla.eliminar(fila)
+            raise
+        self._confirmar(tamano)
+        return {"pais": self.tabla.registro(fila), "version": self.version}
+
+    async def _actualizar(self, pedido):
+        fila = self._fila(pedido.get('nombre'))
+        esperada = pedido.get('version')
+        actual = self.tabla.version_de(self.tabla.nombre(fila))
+        if esperada is not None and esperada != actual:
+            raise ConflictoVersion(f"El país '{self.tabla.nombre(fila)}' cambió (versión {actual}, "
+                                   f"se esperaba {esperada}). Vuelva a leerlo.", actual)
+
+        campos = {}
+        for campo, valor in (pedido.get('campos') or {}).items():
+            if campo not in CAMPOS_ACTUALIZABLES:
+                raise ErrorPedido(f"Campo no actualizable: '{campo}'. Opciones: {', '.join(CAMPOS_ACTUALIZABLES)}.")
+            valor = validar_entero_desde_archivo(str(valor))
+            if valor is None:
+                raise ErrorPedido(f"Valor de {campo} no válido: debe ser un entero positivo.")
+            campos[campo] = valor
+        if not campos:
+            raise ErrorPedido("Indique los campos a actualizar (poblacion y/o superficie).")
+
+        anteriores = {campo: self.tabla.valor(fila, campo) for campo in campos}
+        for campo, valor in campos.items():
+            self.tabla.actualizar(fila, campo, valor)
+        try:
+            tamano = await self._persistir([persistencia.cambio_modificacion(self.tabla.nombre(fila), campos)])
+        except Exception:
+            for campo, valor in anteriores.items():
+                self.tabla.actualizar(fila, campo, valor)
+            raise
+        self._confirmar(tamano)
+        return {"pais": self.tabla.registro(fila), "version": self.version}
+
+    async def cerrar(self):
+        """Espera la escritura en curso y deja el CSV compactado con todos los cambios (si hubo)."""
+        async with self._cerrojo_escritura:
+            await asyncio.to_thread(self.escritor.esperar)
+            if persistencia.cambios_sin_guardar(self.nombre_archivo, self.tabla):
+                self.escritor.programar(self.nombre_archivo, self.tabla)
+                await asyncio.to_thread(self.escritor.esperar)
+
+
+async def iniciar(servidor_paises, direccion):
+    """Empieza a escuchar en la dirección. Retorna el asyncio.Server."""
+    tipo, destino = _separar_direccion(direccion)
+    if tipo == 'tcp':
+        return await asyncio.start_server(servidor_paises.atender, *destino)
+    if os.path.exists(destino):
+        # Un socket que quedó de un servidor anterior: se borra solo si nadie atiende en él.
+        try:
+            _, escritor = await asyncio.open_unix_connection(destino)
+        except OSError:
+            os.remove(destino)
+        else:
+            escritor.close()
+            raise ValueError(f"Ya hay un servidor atendiendo en '{destino}'.")
+    return await asyncio.start_unix_server(servidor_paises.atender, destino)
+
+
+async def servir(tabla, nombre_archivo, escritor, direccion):
+    """Atiende pedidos hasta recibir SIGINT/SIGTERM (o Ctrl+C); al terminar compacta el CSV."""
+    servidor_paises = ServidorPaises(tabla, nombre_archivo, escritor)
+    servidor_paises.preparar()
+    servidor = await iniciar(servidor_paises, direccion)
+    print(f" Servidor atendiendo en '{direccion}' ({len(tabla)} países). Ctrl+C para terminar.", file=sys.stderr)
+
+    detener = asyncio.Event()
+    bucle = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            bucle.add_signal_handler(senal, detener.set)
+        except (NotImplementedError, RuntimeError, ValueError): # Windows: Ctrl+C llega como KeyboardInterrupt
+            pass
+    try:
+        async with servidor:
+            await detener.wait()
+    finally:
+        servidor.close()
+        await servidor_paises.cerrar()
+        tipo, destino = _separar_direccion(direccion)
+        if tipo == 'unix' and os.path.exists(destino):
+            os.remove(destino)
+        print(f" Servidor detenido: {servidor_paises.pedidos} pedidos, {servidor_paises.escrituras} escrituras, "
+              f"{servidor_paises.conflictos} conflictos de versión.", file=sys.stderr)
+
+
+# Cliente
+
+class ClientePaises:
+    """Conexión de un cliente: un pedido por vez (para pedidos simultáneos, abrir varias conexiones)."""
+
+    def __init__(self, lector, escritor):
+        self._lector = lector
+        self._escritor = escritor
+
+    @classmethod
+    async def conectar(cls, direccion):
+        tipo, destino = _separar_direccion(direccion)
+        if tipo == 'unix':
+            lector, escritor = await asyncio.open_unix_connection(destino)
+        else:
+            lector, escritor = await asyncio.open_connection(*destino)
+        return cls(lector, escritor)
+
+    async def pedir(self, op, **datos):
+        """Envía un pedido y retorna la respuesta completa (diccionario)."""
+        self._escritor.write(json.dumps({"op": op, **datos}, ensure_ascii=False).encode('utf-8') + b"\n")
+        await self._escritor.drain()
+        linea = await self._lector.readline()
+        if not linea:
+            raise ConnectionError("El servidor cerró la conexión.")
+        return json.loads(linea)
+
+    async def cerrar(self):
+        self._escritor.close()
+        await self._escritor.wait_closed()
+
+
+async def _pedidos_de_linea(direccion, pedidos):
+    cliente = await ClientePaises.conectar(direccion)
+    try:
+        for pedido in pedidos:
+            print(json.dumps(await cliente.pedir(**pedido), ensure_ascii=False))
+    finally:
+        await cliente.cerrar()
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__.split("Uso como cliente")[1].strip(), file=sys.stderr)
+        return 2
+    asyncio.run(_pedidos_de_linea(sys.argv[1], [json.loads(texto) for texto in sys.argv[2:]]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
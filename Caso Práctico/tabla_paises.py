@@ -0,0 +1,529 @@
+"""Almacenamiento columnar compacto de los países.
+
+En lugar de un diccionario por país, cada campo se guarda en una columna:
+ - nombre: todos los nombres codificados en UTF-8 dentro de un único bytearray, más un
+   array con la posición donde termina cada uno.
+ - poblacion y superficie: arrays tipados de enteros de 64 bits (array('q')).
+ - continente: codificado como diccionario; cada fila guarda un código entero pequeño
+   (array('H')) y la tabla guarda una sola vez el texto de cada continente.
+
+Las columnas derivadas (COLUMNAS_DERIVADAS, por ejemplo la densidad) no se guardan en el
+CSV: se calculan para toda la tabla de una vez (map sobre las columnas, sin un bucle en
+Python) y se mantienen al agregar o modificar países. Se leen, ordenan y filtran igual
+que las columnas guardadas.
+
+Para que el resto del programa siga funcionando igual que con la lista de diccionarios,
+la tabla se recorre e indexa como una lista y entrega filas (FilaPais) que se leen y se
+modifican como un diccionario: pais['poblacion'], pais['poblacion'] = valor, pais.get(...).
+
+Seguimiento de cambios (ver seguir_cambios): desde que se activa, cada alta, modificación
+o baja suma uno a la versión de la tabla y deja anotada la fila (por nombre) con la
+versión de su último cambio. Así se sabe si hay algo sin guardar (modificada), qué filas
+cambiaron desde cualquier versión (cambios_desde, para sincronizar a otro consumidor sin
+releer todo) y si el archivo puede ponerse al día agregando filas en lugar de reescribirlo
+(filas_agregadas_desde). Las filas que nunca cambiaron no ocupan nada.
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping
+from operator import itemgetter, truediv
+
+from indices import IndiceNombres
+
+
+CAMPOS = ('nombre', 'poblacion', 'superficie', 'continente')
+
+# Columnas derivadas: nombre -> (función, campo, campo). El valor de cada fila es
+# función(fila[campo], fila[campo]); la superficie siempre es positiva (ver carga_csv).
+COLUMNAS_DERIVADAS = {
+    'densidad': (truediv, 'poblacion', 'superficie'), # habitantes por km²
+}
+CAMPOS_DERIVADOS = tuple(COLUMNAS_DERIVADAS)
+CAMPOS_NUMERICOS = ('poblacion', 'superficie') + CAMPOS_DERIVADOS
+
+MAXIMO_ENTERO = 2**63 - 1 # Mayor valor de las columnas array('q') (poblacion y superficie)
+MAXIMO_CODIGOS = 2**16     # Continentes distintos que entran en la columna array('H')
+
+
+def valor_registro(campo):
+    """Función diccionario país -> valor del campo (calcula las columnas derivadas), para
+    ordenar o filtrar listas de diccionarios igual que la tabla."""
+    if campo in COLUMNAS_DERIVADAS:
+        funcion, primero, segundo = COLUMNAS_DERIVADAS[campo]
+        return lambda pais: funcion(pais[primero], pais[segundo])
+    return itemgetter(campo)
+
+
+def _comprobar_entero(campo, valor):
+    """Retorna el valor si entra en una columna array('q'); si no, lanza OverflowError
+    (o TypeError si no es un entero) antes de modificar la tabla."""
+    if not isinstance(valor, int):
+        raise TypeError(f"{campo}: se esperaba un entero, no {type(valor).__name__}.")
+    if not -MAXIMO_ENTERO - 1 <= valor <= MAXIMO_ENTERO:
+        raise OverflowError(f"{campo}: {valor} no entra en un entero de 64 bits.")
+    return valor
+
+
+class FilaPais(Mapping):
+    """Vista tipo diccionario de una fila de la tabla (no copia los datos)."""
+
+    __slots__ = ('tabla', 'indice')
+
+    def __init__(self, tabla, indice):
+        self.tabla = tabla
+        self.indice = indice
+
+    def __getitem__(self, clave):
+        return self.tabla.valor(self.indice, clave)
+
+    def __setitem__(self, clave, valor):
+        self.tabla.actualizar(self.indice, clave, valor)
+
+    def __iter__(self):
+        return iter(CAMPOS)
+
+    def __len__(self):
+        return len(CAMPOS)
+
+    def a_diccionario(self):
+        """Copia de la fila como diccionario común."""
+        return self.tabla.registro(self.indice)
+
+    def __repr__(self):
+        return repr(self.a_diccionario())
+
+
+class VistaPaises:
+    """Secuencia de filas de una tabla indicadas por sus índices (resultado de ordenar o filtrar)."""
+
+    __slots__ = ('tabla', 'indices')
+
+    def __init__(self, tabla, indices):
+        self.tabla = tabla
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        tabla = self.tabla
+        for i in self.indices:
+            yield FilaPais(tabla, i)
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, slice):
+            return VistaPaises(self.tabla, self.indices[posicion])
+        return FilaPais(self.tabla, self.indices[posicion])
+
+    def __repr__(self):
+        return f"VistaPaises({len(self)} filas)"
+
+
+class TablaPaises:
+    """Tabla columnar de países con interfaz compatible con la lista de diccionarios."""
+
+    def __init__(self, paises=()):
+        self._nombres = bytearray()      # nombres UTF-8 concatenados
+        self._fin_nombre = array('q')    # posición (en bytes) donde termina cada nombre
+        self.poblacion = array('q')
+        self.superficie = array('q')
+        self.codigo_continente = array('H')
+        self.continentes = []            # código -> texto del continente
+        self._codigos = {}               # texto del continente -> código
+        self._auxiliares = {}            # estructuras derivadas (índices, cachés), ver auxiliar()
+        self._derivadas = {}             # columna derivada -> array('d'), ver columna()
+        self._indice_nombres = None      # IndiceNombres, se construye en la primera búsqueda por nombre
+        self.version = 0                 # cambios hechos desde seguir_cambios()
+        self.version_guardada = 0        # versión que refleja el archivo (ver marcar_guardada)
+        self._cambios = None             # nombre -> (versión, 'alta' | 'modificacion' | 'baja'), en orden de versión
+        self._version_orden = 0          # versión del último reordenamiento (cambia el orden del archivo)
+        self.extend(paises)
+
+    # Tamaño y acceso
+
+    def __len__(self):
+        return len(self.poblacion)
+
+    def __iter__(self):
+        for i in range(len(self.poblacion)):
+            yield FilaPais(self, i)
+
+    def __getitem__(self, posicion):
+        if isinstance(posicion, slice):
+            return VistaPaises(self, range(len(self))[posicion])
+        if posicion < 0:
+            posicion += len(self)
+        if not 0 <= posicion < len(self):
+            raise IndexError("índice de país fuera de rango")
+        return FilaPais(self, posicion)
+
+    def __repr__(self):
+        return f"TablaPaises({len(self)} países, {len(self.continentes)} continentes)"
+
+    def nombre(self, i):
+        inicio = self._fin_nombre[i - 1] if i else 0
+        return self._nombres[inicio:self._fin_nombre[i]].decode('utf-8')
+
+    def continente(self, i):
+        return self.continentes[self.codigo_continente[i]]
+
+    def valor(self, i, campo):
+        """Valor del campo para la fila i."""
+        if campo == 'poblacion':
+            return self.poblacion[i]
+        if campo == 'superficie':
+            return self.superficie[i]
+        if campo == 'nombre':
+            return self.nombre(i)
+        if campo == 'continente':
+            return self.continente(i)
+        if campo in COLUMNAS_DERIVADAS:
+            return self.columna(campo)[i]
+        raise KeyError(campo)
+
+    def funcion_valor(self, campo):
+        """Función índice -> valor del campo, para usar como clave de ordenamiento."""
+        if campo in CAMPOS_NUMERICOS:
+            return self.columna(campo).__getitem__
+        if campo == 'nombre':
+            return self.nombre
+        if campo == 'continente':
+            continentes = self.continentes
+            codigos = self.codigo_continente
+            return lambda i: continentes[codigos[i]]
+        raise KeyError(campo)
+
+    def columna(self, campo):
+        """Array tipado de una columna numérica (se comparte, no se copia). Una columna
+        derivada se calcula la primera vez que se pide."""
+        if campo == 'poblacion':
+            return self.poblacion
+        if campo == 'superficie':
+            return self.superficie
+        columna = self._derivadas.get(campo)
+        if columna is None:
+            if campo not in COLUMNAS_DERIVADAS:
+                raise KeyError(campo)
+            funcion, primero, segundo = COLUMNAS_DERIVADAS[campo]
+            columna = self._derivadas[campo] = array('d', map(funcion, self.columna(primero), self.columna(segundo)))
+        return columna
+
+    def calcular_derivadas(self):
+        """Calcula todas las columnas derivadas (conviene al terminar una carga, para que
+        la primera consulta no las calcule)."""
+        for campo in COLUMNAS_DERIVADAS:
+            self.columna(campo)
+
+    def _valor_derivado(self, campo, i):
+        funcion, primero, segundo = COLUMNAS_DERIVADAS[campo]
+        return funcion(self.columna(primero)[i], self.columna(segundo)[i])
+
+    def registro(self, i):
+        """Diccionario con los datos de la fila i."""
+        return {
+            "nombre": self.nombre(i),
+            "poblacion": self.poblacion[i],
+            "superficie": self.superficie[i],
+            "continente": self.continente(i)
+        }
+
+    def tuplas(self):
+        """Genera (nombre, poblacion, superficie, continente) por fila, en orden (para guardar)."""
+        continentes = self.continentes
+        nombres = self._nombres
+        inicio = 0
+        for fin, poblacion, superficie, codigo in zip(self._fin_nombre, self.poblacion,
+                                                     self.superficie, self.codigo_continente):
+            yield nombres[inicio:fin].decode('utf-8'), poblacion, superficie, continentes[codigo]
+            inicio = fin
+
+    def indice_de(self, nombre):
+        """Índice de la fila del país (sin distinguir mayúsculas ni acentos), o None si no existe.
+
+        El índice de nombres se construye la primera vez (O(n)) y luego se mantiene al agregar
+        países, por lo que cada consulta es O(1)."""
+        if self._indice_nombres is None:
+            self._indice_nombres = IndiceNombres(self)
+        return self._indice_nombres.buscar(nombre)
+
+    def __contains__(self, nombre):
+        return isinstance(nombre, str) and self.indice_de(nombre) is not None
+
+    def codigo_existente(self, continente):
+        """Código del continente, o None si ningún país lo tiene."""
+        return self._codigos.get(continente)
+
+    # Estructuras auxiliares
+
+    def auxiliar(self, clave, fabrica):
+        """Estructura derivada de la tabla identificada por clave. Se construye con fabrica(tabla)
+        la primera vez y se reutiliza mientras siga siendo válida.
+
+        Cuando la tabla cambia se llama al método de la estructura con el nombre del evento:
+        fila_agregada(i) o fila_actualizada(i, campo, anterior). Si la estructura no tiene
+        ese método, o el método retorna False, se descarta y se reconstruye en el próximo uso.
+        Eliminar o reordenar filas descarta todas las estructuras."""
+        estructura = self._auxiliares.get(clave)
+        if estructura is None:
+            estructura = self._auxiliares[clave] = fabrica(self)
+        return estructura
+
+    def _notificar(self, evento, *datos):
+        for clave, estructura in list(self._auxiliares.items()):
+            metodo = getattr(estructura, evento, None)
+            if metodo is None or metodo(*datos) is False:
+                del self._auxiliares[clave]
+
+    def _invalidar(self):
+        if self._auxiliares:
+            self._auxiliares.clear()
+        self._derivadas.clear() # se vuelven a calcular (de una vez) en el próximo uso
+
+    def descartar_auxiliares(self):
+        """Descarta las estructuras auxiliares (se reconstruyen en el próximo uso). Conviene antes
+        de agregar muchas filas juntas: reconstruir una vez es más barato que mantenerlas fila por fila."""
+        self._invalidar()
+
+    # Seguimiento de cambios
+
+    def seguir_cambios(self):
+        """Empieza a registrar los cambios: las filas que ya tiene la tabla son la versión 0."""
+        if self._cambios is None:
+            self._cambios = {}
+
+    def _anotar_cambio(self, nombre, operacion):
+        self.version += 1
+        anterior = self._cambios.pop(nombre, None) # se vuelve a insertar al final: el dict queda en orden de versión
+        if anterior is not None:
+            if anterior[1] == 'alta' and operacion == 'modificacion':
+                operacion = 'alta' # sigue siendo una fila que el archivo no tiene
+            elif anterior[1] == 'baja' and operacion == 'alta':
+                operacion = 'modificacion' # el archivo puede tener la fila anterior con ese nombre
+        self._cambios[nombre] = (self.version, operacion)
+
+    @property
+    def modificada(self):
+        """True si hubo cambios desde el último guardado (marcar_guardada)."""
+        return self.version != self.version_guardada
+
+    def marcar_guardada(self, version=None):
+        """Anota que el archivo ya refleja la tabla tal como estaba en 'version' (por defecto, la actual)."""
+        self.version_guardada = max(self.version_guardada, self.version if version is None else version)
+
+    def version_de(self, nombre):
+        """Versión del último cambio del país (0 si no cambió desde seguir_cambios)."""
+        cambio = self._cambios.get(nombre) if self._cambios else None
+        return cambio[0] if cambio is not None else 0
+
+    def cambios_desde(self, version, limite=None):
+        """Filas que cambiaron después de 'version', en orden: lista de diccionarios {"version",
+        "op", "nombre", "pais"} con el estado actual de cada fila (None si se eliminó). Una fila
+        que cambió varias veces aparece una sola vez, con su último cambio. Con limite se
+        entregan solo los primeros (se sigue pidiendo desde la versión del último).
+        Lanza ValueError si la versión es posterior a la actual."""
+        if version > self.version:
+            raise ValueError(f"La versión {version} es posterior a la actual ({self.version}).")
+        cambiadas = []
+        for nombre, (version_fila, operacion) in reversed((self._cambios or {}).items()):
+            if version_fila <= version:
+                break
+            cambiadas.append((version_fila, operacion, nombre))
+        cambiadas.reverse()
+        if limite is not None:
+            del cambiadas[limite:]
+
+        resultado = []
+        for version_fila, operacion, nombre in cambiadas:
+            pais = None if operacion == 'baja' else self.registro(self.indice_de(nombre))
+            resultado.append({"version": version_fila, "op": operacion, "nombre": nombre, "pais": pais})
+        return resultado
+
+    def filas_agregadas_desde(self, version):
+        """Si desde 'version' solo se agregaron filas (sin modificar ni eliminar las que ya
+        estaban, ni reordenar), retorna el rango de índices de las filas nuevas, que son las
+        últimas de la tabla; si no, o si no se siguen los cambios, retorna None."""
+        if self._cambios is None or self._version_orden > version:
+            return None
+        agregadas = 0
+        for version_fila, operacion in reversed(self._cambios.values()):
+            if version_fila <= version:
+                break
+            if operacion != 'alta':
+                return None
+            agregadas += 1
+        return range(len(self) - agregadas, len(self))
+
+    # Modificación
+
+    def codigo_de_continente(self, continente):
+        """Código entero del continente; lo registra si es nuevo."""
+        codigo = self._codigos.get(continente)
+        if codigo is None:
+            codigo = len(self.continentes)
+            if codigo >= MAXIMO_CODIGOS:
+                raise OverflowError(f"Demasiados continentes distintos (máximo {MAXIMO_CODIGOS}).")
+            continente = sys.intern(continente) # la misma cadena para todas las filas del continente
+            self.continentes.append(continente)
+            self._codigos[continente] = codigo
+        return codigo
+
+    def append(self, pais):
+        """Agrega un país (diccionario con las cuatro claves) al final. Retorna su índice.
+        Los valores se comprueban antes de tocar las columnas: si alguno no entra, la tabla
+        queda como estaba."""
+        nombre = pais["nombre"].encode('utf-8')
+        poblacion = _comprobar_entero('poblacion', pais["poblacion"])
+        superficie = _comprobar_entero('superficie', pais["superficie"])
+        codigo = self.codigo_de_continente(pais["continente"])
+        self._nombres += nombre
+        self._fin_nombre.append(len(self._nombres))
+        self.poblacion.append(poblacion)
+        self.superficie.append(superficie)
+        self.codigo_continente.append(codigo)
+        indice = len(self.poblacion) - 1
+        for campo, columna in self._derivadas.items():
+            columna.append(self._valor_derivado(campo, indice))
+        if self._indice_nombres is not None:
+            self._indice_nombres.agregar(pais["nombre"], indice)
+        if self._auxiliares:
+            self._notificar('fila_agregada', indice)
+        if self._cambios is not None:
+            self._anotar_cambio(pais["nombre"], 'alta')
+        return indice
+
+    def extend(self, paises):
+        for pais in paises:
+            self.append(pais)
+
+    @classmethod
+    def desde_buffers(cls, nombres, fin_nombre, poblacion, superficie, codigo_continente, continentes):
+        """Tabla armada directamente con sus columnas (por ejemplo, leídas de una instantánea binaria)."""
+        tabla = cls()
+        tabla._nombres = nombres
+        tabla._fin_nombre = fin_nombre
+        tabla.poblacion = poblacion
+        tabla.superficie = superficie
+        tabla.codigo_continente = codigo_continente
+        for continente in continentes:
+            tabla.codigo_de_continente(continente)
+        return tabla
+
+    def buffers(self):
+        """Columnas de la tabla (nombres, fin_nombre, poblacion, superficie, codigo_continente), sin copiar."""
+        return self._nombres, self._fin_nombre, self.poblacion, self.superficie, self.codigo_continente
+
+    def copia(self):
+        """Copia independiente de las columnas (sin índices ni auxiliares): una foto consistente
+        de la tabla que puede leerse desde otro hilo mientras esta se sigue modificando."""
+        return TablaPaises.desde_buffers(self._nombres[:], self._fin_nombre[:], self.poblacion[:],
+                                         self.superficie[:], self.codigo_continente[:], self.continentes)
+
+    def anexar_tabla(self, otra):
+        """Agrega al final todas las filas de otra TablaPaises copiando columnas completas
+        (sin armar un diccionario por fila). Se usa para unir tablas cargadas por separado."""
+        inicio = len(self)
+        base = len(self._nombres)
+        self._nombres += otra._nombres
+        self._fin_nombre.extend(map(base.__add__, otra._fin_nombre) if base else otra._fin_nombre)
+        self.poblacion.extend(otra.poblacion)
+        self.superficie.extend(otra.superficie)
+
+        traduccion = [self.codigo_de_continente(continente) for continente in otra.continentes]
+        if traduccion == list(range(len(traduccion))):
+            self.codigo_continente.extend(otra.codigo_continente)
+        else:
+            self.codigo_continente.extend(map(traduccion.__getitem__, otra.codigo_continente))
+        for campo, columna in self._derivadas.items():
+            columna.extend(otra.columna(campo))
+
+        if self._indice_nombres is not None or self._auxiliares or self._cambios is not None:
+            for i in range(inicio, len(self)):
+                if self._indice_nombres is not None:
+                    self._indice_nombres.agregar(self.nombre(i), i)
+                if self._auxiliares:
+                    self._notificar('fila_agregada', i)
+                if self._cambios is not None:
+                    self._anotar_cambio(self.nombre(i), 'alta')
+
+    def actualizar(self, i, campo, valor):
+        """Modifica un campo de la fila i. El nombre no se modifica (es la clave del país).
+        Asignar el mismo valor que ya tiene no cuenta como cambio."""
+        anterior = self.valor(i, campo) if campo != 'nombre' else None
+        if anterior == valor and campo in CAMPOS:
+            return
+        if campo == 'poblacion':
+            self.poblacion[i] = _comprobar_entero(campo, valor)
+        elif campo == 'superficie':
+            self.superficie[i] = _comprobar_entero(campo, valor)
+        elif campo == 'continente':
+            self.codigo_continente[i] = self.codigo_de_continente(valor)
+        elif campo == 'nombre':
+            raise ValueError("El nombre de un país no se puede modificar.")
+        elif campo in COLUMNAS_DERIVADAS:
+            raise ValueError(f"'{campo}' es una columna calculada: no se puede modificar.")
+        else:
+            raise KeyError(campo)
+
+        derivados = [] # (campo, valor anterior) de las columnas derivadas que cambian con este campo
+        for derivado, columna in self._derivadas.items():
+            if campo in COLUMNAS_DERIVADAS[derivado][1:]:
+                derivados.append((derivado, columna[i]))
+                columna[i] = self._valor_derivado(derivado, i)
+        if self._auxiliares:
+            self._notificar('fila_actualizada', i, campo, anterior)
+            for derivado, anterior_derivado in derivados:
+                if self._auxiliares:
+                    self._notificar('fila_actualizada', i, derivado, anterior_derivado)
+        if self._cambios is not None:
+            self._anotar_cambio(self.nombre(i), 'modificacion')
+
+    def eliminar(self, i):
+        """Quita la fila i y retorna sus datos como diccionario. Las filas siguientes bajan una posición,
+        por lo que el índice de nombres se vuelve a construir en la próxima búsqueda."""
+        registro = self.registro(i)
+        inicio = self._fin_nombre[i - 1] if i else 0
+        largo = self._fin_nombre[i] - inicio
+
+        del self._nombres[inicio:inicio + largo]
+        del self._fin_nombre[i]
+        for j in range(i, len(self._fin_nombre)):
+            self._fin_nombre[j] -= largo
+        del self.poblacion[i]
+        del self.superficie[i]
+        del self.codigo_continente[i]
+
+        self._indice_nombres = None
+        self._invalidar()
+        if self._cambios is not None:
+            self._anotar_cambio(registro["nombre"], 'baja')
+        return registro
+
+    def reordenar(self, indices):
+        """Reordena físicamente todas las columnas según la lista de índices (ordenamiento en lugar).
+        No cambia ninguna fila, pero sí el orden en que se guardan: cuenta como un cambio de versión."""
+        self._invalidar()
+        if self._cambios is not None:
+            self.version += 1
+            self._version_orden = self.version
+        self._indice_nombres = None
+        nombres = [self.nombre(i) for i in indices]
+        self.poblacion = array('q', [self.poblacion[i] for i in indices])
+        self.superficie = array('q', [self.superficie[i] for i in indices])
+        self.codigo_continente = array('H', [self.codigo_continente[i] for i in indices])
+        self._nombres = bytearray()
+        self._fin_nombre = array('q')
+        for nombre in nombres:
+            self._nombres += nombre.encode('utf-8')
+            self._fin_nombre.append(len(self._nombres))
+
+    # Memoria
+
+    def bytes_ocupados(self):
+        """Bytes ocupados por los buffers de las columnas (sin contar el objeto tabla)."""
+        total = len(self._nombres) + self._fin_nombre.itemsize * len(self._fin_nombre)
+        total += self.poblacion.itemsize * len(self.poblacion)
+        total += self.superficie.itemsize * len(self.superficie)
+        total += self.codigo_continente.itemsize * len(self.codigo_continente)
+        total += sum(columna.itemsize * len(columna) for columna in self._derivadas.values())
+        return total
@@ -0,0 +1,44 @@
+"""Configuración común de las pruebas (se ejecutan con: python -m pytest tests)."""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tabla_paises import TablaPaises  # noqa: E402
+
+
+PAISES = [
+    {"nombre": "Argentina", "poblacion": 45376763, "superficie": 2780400, "continente": "America"},
+    {"nombre": "Japon", "poblacion": 125800000, "superficie": 377975, "continente": "Asia"},
+    {"nombre": "Brasil", "poblacion": 213993437, "superficie": 8515767, "continente": "America"},
+    {"nombre": "Alemania", "poblacion": 83149300, "superficie": 357022, "continente": "Europa"},
+    {"nombre": "India", "poblacion": 1380004385, "superficie": 3287263, "continente": "Asia"},
+    {"nombre": "Uruguay", "poblacion": 3473727, "superficie": 176215, "continente": "America"},
+    {"nombre": "Francia", "poblacion": 67391582, "superficie": 551695, "continente": "Europa"},
+    {"nombre": "Nigeria", "poblacion": 206139589, "superficie": 923768, "continente": "Africa"},
+]
+
+
+@pytest.fixture
+def paises():
+    """Lista de diccionarios de referencia (copia nueva en cada prueba)."""
+    return [dict(pais) for pais in PAISES]
+
+
+@pytest.fixture
+def tabla(paises):
+    return TablaPaises(paises)
+
+
+@pytest.fixture
+def muchos_paises():
+    """500 países al azar (siempre los mismos) con muchos empates, para comparar con la lista."""
+    azar = random.Random(7)
+    continentes = ["America", "Asia", "Europa", "Africa", "Oceania"]
+    return [{"nombre": f"{azar.choice('ABCDEFGH')}pais {i:03d}", "poblacion": azar.randint(1, 50) * 1000,
+             "superficie": azar.randint(1, 30) * 100, "continente": azar.choice(continentes)}
+            for i in range(500)]
@@ -0,0 +1,70 @@
+"""La búsqueda con el índice de trigramas encuentra lo mismo que recorrer todos los nombres."""
+
+import pytest
+
+from busqueda import buscar_paises, coincide_aproximado
+from normalizacion import normalizar
+from tabla_paises import TablaPaises
+
+
+def referencia(paises, texto, tolerar_errores=False):
+    """Nombres que contienen el texto (o están a un error de tipeo), recorriendo toda la lista."""
+    consulta = normalizar(texto)
+    encontrados = {pais["nombre"] for pais in paises if consulta in normalizar(pais["nombre"])}
+    if tolerar_errores:
+        encontrados |= {pais["nombre"] for pais in paises if coincide_aproximado(consulta, normalizar(pais["nombre"]))}
+    return encontrados
+
+
+def nombres(paises):
+    return [pais["nombre"] for pais in paises]
+
+
+CONSULTAS = ["a", "pa", "pais", "PAIS 01", "s 12", "cpais 1", "ais 49", "zzz", "país 3"]
+
+
+@pytest.mark.parametrize("texto", CONSULTAS)
+def test_igual_que_recorrer(muchos_paises, texto):
+    tabla = TablaPaises(muchos_paises)
+    encontrados = nombres(buscar_paises(tabla, texto))
+    assert len(encontrados) == len(set(encontrados))
+    assert set(encontrados) == referencia(muchos_paises, texto)
+
+
+@pytest.mark.parametrize("fila, error", [(123, lambda n: n.replace("pais", "paiz")),   # sustitución
+                                         (45, lambda n: n + "9"),                         # inserción
+                                         (300, lambda n: n.replace("pais", "pas")),       # borrado
+                                         (7, lambda n: n[:-1] + "x"),                     # sustitución al final
+                                         (0, lambda n: "apais 01")])                      # prefijo con un error
+def test_tolerando_un_error(muchos_paises, fila, error):
+    tabla = TablaPaises(muchos_paises)
+    texto = error(muchos_paises[fila]["nombre"])
+    esperado = referencia(muchos_paises, texto, True)
+    assert esperado
+    assert set(nombres(buscar_paises(tabla, texto, True))) == esperado
+
+
+def test_orden_por_relevancia(paises):
+    paises.append({"nombre": "Guinea Ecuatorial", "poblacion": 1, "superficie": 1, "continente": "Africa"})
+    paises.append({"nombre": "Papua Nueva Guinea", "poblacion": 1, "superficie": 1, "continente": "Oceania"})
+    paises.append({"nombre": "Guinea", "poblacion": 1, "superficie": 1, "continente": "Africa"})
+    tabla = TablaPaises(paises)
+    # exacta, prefijo, comienzo de palabra
+    assert nombres(buscar_paises(tabla, "guinea")) == ["Guinea", "Guinea Ecuatorial", "Papua Nueva Guinea"]
+    assert nombres(buscar_paises(tabla, "guinea", limite=2)) == ["Guinea", "Guinea Ecuatorial"]
+    assert nombres(buscar_paises(tabla, "Urugay", tolerar_errores=True)) == ["Uruguay"]
+    assert nombres(buscar_paises(tabla, "   ")) == []
+
+
+def test_busqueda_despues_de_agregar_y_modificar(muchos_paises):
+    tabla = TablaPaises(muchos_paises)
+    buscar_paises(tabla, "pais") # construye el índice
+    nuevos = [{"nombre": "Isla Perdida", "poblacion": 10, "superficie": 5, "continente": "Oceania"},
+              {"nombre": "Isla Grande", "poblacion": 20, "superficie": 5, "continente": "Oceania"}]
+    tabla.append(nuevos[0])
+    tabla.extend(nuevos[1:])
+    tabla[0]['poblacion'] = 7
+    muchos_paises += nuevos
+    for texto in ("isla", "perdida", "pais 00", "a"):
+        assert set(nombres(buscar_paises(tabla, texto))) == referencia(muchos_paises, texto)
+    assert nombres(buscar_paises(tabla, "Isla Grnde", tolerar_errores=True)) == ["Isla Grande"]
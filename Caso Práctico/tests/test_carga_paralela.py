@@ -0,0 +1,88 @@
+"""La carga repartida entre procesos da el mismo resultado que la carga secuencial."""
+
+import csv
+
+import pytest
+
+import carga_paralela
+from carga_csv import InformeRechazos, leer_bloques
+
+
+def escribir(ruta, filas):
+    with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(['nombre', 'poblacion', 'superficie', 'continente'])
+        escritor.writerows(filas)
+    return str(ruta)
+
+
+def filas_de_prueba(cantidad):
+    filas = [[f"Pais {i:03d}", str(1000 + i), str(10 + i), "Asia"] for i in range(cantidad)]
+    filas[7][1] = "-5"                     # rechazada
+    filas[30] = ["Corea, Republica De", "51744876", "100210", "Asia"] # comillas sin saltos de línea
+    return filas
+
+
+def secuencial(ruta):
+    informe = InformeRechazos()
+    filas = [pais for bloque in leer_bloques(ruta, informe=informe) for pais in bloque]
+    return filas, informe
+
+
+def paralela(ruta, procesos=3):
+    informe = InformeRechazos()
+    tabla = carga_paralela.cargar_en_paralelo(ruta, procesos, informe=informe)
+    return [dict(pais) for pais in tabla], informe
+
+
+@pytest.fixture(autouse=True)
+def rangos_chicos(monkeypatch):
+    monkeypatch.setattr(carga_paralela, "TAMANO_MINIMO_RANGO", 1) # archivos chicos también se reparten
+
+
+def comparar(ruta):
+    esperadas, informe_esperado = secuencial(ruta)
+    obtenidas, informe = paralela(ruta)
+    assert obtenidas == esperadas
+    assert informe.motivos == informe_esperado.motivos
+    assert [muestra['linea'] for muestra in informe.muestras] == \
+        [muestra['linea'] for muestra in informe_esperado.muestras]
+
+
+def test_igual_a_la_carga_secuencial(tmp_path):
+    ruta = escribir(tmp_path / "paises.csv", filas_de_prueba(100))
+    assert len(carga_paralela.rangos_de_lineas(ruta, 3)[1]) == 3
+    comparar(ruta)
+
+
+def test_campo_con_saltos_de_linea_cortado_entre_rangos(tmp_path):
+    filas = filas_de_prueba(100)
+    # un campo de unas 10 KB en el medio del archivo: el límite entre los rangos cae dentro de él
+    filas.insert(50, ["\n".join("x" * 50 for _ in range(200)), "1", "1", "Asia"])
+    ruta = escribir(tmp_path / "paises.csv", filas)
+    comparar(ruta)
+
+
+def test_encabezado_incompleto(tmp_path):
+    ruta = tmp_path / "paises.csv"
+    ruta.write_text("nombre,poblacion,continente\nChile,1,America\nPeru,2,America\n", encoding='utf-8')
+    for filas, informe in (secuencial(str(ruta)), paralela(str(ruta))):
+        assert filas == [] and informe.motivos == {"encabezado incompleto": 2}
+
+
+def test_campo_con_salto_de_linea_dentro_de_un_rango(tmp_path):
+    filas = filas_de_prueba(100)
+    filas.insert(3, ["Isla\nNorte", "10", "5", "Oceania"])
+    ruta = escribir(tmp_path / "paises.csv", filas)
+    comparar(ruta)
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("a,1,2,Asia\nb,3,4,Asia\n", False),
+    ('"a, b",1,2,Asia\n', False),
+    ('"a\nb",1,2,Asia\n', True),
+    ('a,1,2,"Asia\n', True),              # campo abierto al final del rango
+    ('x\n",1,2,Asia\n', True),            # rango que empieza dentro de un campo
+])
+def test_salto_entre_comillas(texto, esperado):
+    assert carga_paralela.salto_entre_comillas(texto) is esperado
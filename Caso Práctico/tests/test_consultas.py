@@ -0,0 +1,131 @@
+"""Filtros y consultas sobre la tabla: mismo resultado que recorrer la lista de diccionarios."""
+
+from functools import cmp_to_key
+
+import pytest
+
+import consultas
+from ordenamiento import normalizar_claves
+from tabla_paises import TablaPaises, valor_registro
+
+
+def dentro(valor, rango):
+    minimo, maximo = rango
+    return (minimo is None or valor >= minimo) and (maximo is None or valor <= maximo)
+
+
+def referencia(paises, continente=None, **rangos):
+    """Filtro de referencia: una comprensión de lista sobre los diccionarios."""
+    return [pais["nombre"] for pais in paises
+            if (continente is None or pais["continente"] == continente)
+            and all(dentro(valor_registro(campo)(pais), rango) for campo, rango in rangos.items())]
+
+
+def nombres(paises):
+    return [pais["nombre"] for pais in paises]
+
+
+FILTROS = [
+    {},
+    {"continente": "Asia"},
+    {"continente": "Antartida"},
+    {"poblacion": (10_000, 20_000)},
+    {"poblacion": (None, 5_000)},
+    {"superficie": (2_500, None)},
+    {"superficie": (3_001, 2_000)},
+    {"densidad": (10, 20)},
+    {"continente": "Europa", "poblacion": (30_000, None), "superficie": (None, 1_500)},
+    {"continente": "Africa", "densidad": (None, 5), "poblacion": (1_000, 45_000)},
+]
+
+
+@pytest.mark.parametrize("filtro", FILTROS)
+def test_filtrar_tabla_y_lista(muchos_paises, filtro):
+    esperado = referencia(muchos_paises, **filtro)
+    tabla = TablaPaises(muchos_paises)
+    assert nombres(consultas.filtrar(tabla, **filtro)) == esperado
+    assert nombres(consultas.filtrar(muchos_paises, **filtro)) == esperado
+    assert nombres(consultas.filtrar(iter(muchos_paises), **filtro)) == esperado # también un generador
+
+
+def test_filtros_sueltos(muchos_paises):
+    assert nombres(consultas.filtrar_continente(muchos_paises, "Oceania")) == \
+        referencia(muchos_paises, continente="Oceania")
+    assert nombres(consultas.filtrar_rango(iter(muchos_paises), 'densidad', 5, 8)) == \
+        referencia(muchos_paises, densidad=(5, 8))
+
+
+def test_filtrar_despues_de_modificar(muchos_paises):
+    tabla = TablaPaises(muchos_paises)
+    consultas.filtrar(tabla, poblacion=(10_000, 20_000), continente="Asia") # crea índices y grupos
+    for i in range(0, 500, 9):
+        for paises in (tabla, muchos_paises):
+            paises[i]['poblacion'] = 15_000
+            paises[i]['superficie'] += 100
+    nuevo = {"nombre": "Zpais nuevo", "poblacion": 12_000, "superficie": 100, "continente": "Asia"}
+    tabla.append(nuevo)
+    muchos_paises.append(dict(nuevo))
+    for filtro in FILTROS:
+        assert nombres(consultas.filtrar(tabla, **filtro)) == referencia(muchos_paises, **filtro)
+
+
+def test_campo_desconocido(tabla):
+    with pytest.raises(TypeError):
+        consultas.filtrar(tabla, capital=(1, 2))
+
+
+# Consultas compuestas (filtros + orden + límite)
+
+def consulta_referencia(paises, filtro, claves, desplazamiento, cantidad):
+    """Filtra, ordena todo (de forma estable) y recién después corta."""
+    pasos = [(valor_registro(campo), descendente) for campo, descendente in normalizar_claves(claves)]
+
+    def comparar(a, b):
+        for valor, descendente in pasos:
+            if valor(a) != valor(b):
+                resultado = -1 if valor(a) < valor(b) else 1
+                return -resultado if descendente else resultado
+        return 0
+    filtrados = set(referencia(paises, **filtro))
+    ordenados = sorted((pais for pais in paises if pais["nombre"] in filtrados), key=cmp_to_key(comparar))
+    fin = None if cantidad is None else desplazamiento + cantidad
+    return nombres(ordenados[desplazamiento:fin])
+
+
+CONSULTAS = [
+    ({}, '-poblacion', 0, 10),
+    ({}, 'nombre', 490, 20),
+    ({}, 'superficie', 0, None),
+    ({"continente": "Asia"}, 'continente,-poblacion', 5, 15),
+    ({"poblacion": (10_000, None)}, '-superficie,nombre', 0, 25),
+    ({"densidad": (5, None)}, '-nombre,poblacion', 3, 7),      # texto descendente junto a otra clave
+    ({"continente": "Europa", "superficie": (None, 2_000)}, '-densidad', 0, 1),
+    ({}, 'poblacion', 10, 0),
+]
+
+
+@pytest.mark.parametrize("filtro, claves, desplazamiento, cantidad", CONSULTAS)
+def test_consulta_compuesta(muchos_paises, filtro, claves, desplazamiento, cantidad):
+    esperado = consulta_referencia(muchos_paises, filtro, claves, desplazamiento, cantidad)
+    for paises in (TablaPaises(muchos_paises), muchos_paises):
+        pedido = consultas.consulta(paises).donde(**filtro).ordenar_por(claves).desde(desplazamiento).limite(cantidad)
+        assert nombres(pedido.resultado()) == esperado
+        assert nombres(pedido) == esperado # recorrerla da lo mismo
+
+
+def test_consulta_sin_orden_con_limite(muchos_paises):
+    esperado = referencia(muchos_paises, continente="America")[4:9]
+    for paises in (TablaPaises(muchos_paises), muchos_paises):
+        assert nombres(consultas.consulta(paises).donde("America").desde(4).limite(5)) == esperado
+
+
+def test_predicados_acumulados(muchos_paises):
+    tabla = TablaPaises(muchos_paises)
+    pedido = consultas.consulta(tabla).donde(poblacion=(5_000, 30_000)).donde(poblacion=(10_000, 40_000))
+    assert nombres(pedido) == referencia(muchos_paises, poblacion=(10_000, 30_000))
+    assert nombres(consultas.consulta(tabla).donde("Asia").donde("Europa")) == []
+
+
+def test_desplazamiento_negativo(tabla):
+    with pytest.raises(ValueError):
+        consultas.consulta(tabla).desde(-1)
@@ -0,0 +1,67 @@
+"""Pruebas del motor de estadísticas (estadisticas.py)."""
+
+import statistics
+
+import pytest
+
+from estadisticas import motor_estadisticas
+
+
+def test_resumen_total(tabla, paises):
+    datos = motor_estadisticas(tabla).resumen('poblacion')
+    poblaciones = [p["poblacion"] for p in paises]
+    assert datos["cantidad"] == len(paises)
+    assert datos["suma"] == sum(poblaciones)
+    assert datos["pais_maximo"] == "India"
+    assert datos["varianza"] == pytest.approx(statistics.pvariance(poblaciones))
+    assert datos["percentiles"][50] == pytest.approx(statistics.median(poblaciones))
+
+
+def test_resumen_por_continente(tabla, paises):
+    datos = motor_estadisticas(tabla).resumen('superficie', 'America')
+    superficies = [p["superficie"] for p in paises if p["continente"] == "America"]
+    assert datos["cantidad"] == 3
+    assert datos["suma"] == sum(superficies)
+    assert datos["participacion"] == pytest.approx(sum(superficies) / sum(p["superficie"] for p in paises))
+
+
+def test_continente_sin_paises(tabla):
+    motor = motor_estadisticas(tabla)
+    for campo in ('poblacion', 'superficie', 'densidad'):
+        assert motor.resumen(campo, 'Oceania') == {"cantidad": 0}
+    assert 'Oceania' not in motor.resumen_por_continente('poblacion')
+
+
+def test_mantenimiento_al_agregar_y_actualizar(tabla):
+    motor = motor_estadisticas(tabla)
+    tabla.append({"nombre": "Chile", "poblacion": 19116201, "superficie": 756102, "continente": "America"})
+    tabla[0]['poblacion'] = 46000000
+    recalculado = type(motor)(tabla)
+    for campo in ('poblacion', 'superficie', 'densidad'):
+        for continente in (None, 'America', 'Asia'):
+            esperado = recalculado.resumen(campo, continente)
+            obtenido = motor_estadisticas(tabla).resumen(campo, continente)
+            assert obtenido.keys() == esperado.keys()
+            for clave, valor in esperado.items():
+                if isinstance(valor, float):
+                    assert obtenido[clave] == pytest.approx(valor)
+                elif clave == "percentiles":
+                    assert obtenido[clave] == pytest.approx(valor)
+                else:
+                    assert obtenido[clave] == valor
+
+
+def test_varianza_de_la_densidad_con_decimales():
+    # valores grandes y muy parecidos: suma de cuadrados menos cuadrado de la suma da cualquier cosa
+    from tabla_paises import TablaPaises
+    tabla = TablaPaises({"nombre": f"Pais {i}", "poblacion": 10**12 + i, "superficie": 1, "continente": "Asia"}
+                        for i in range(1000))
+    tabla.calcular_derivadas()
+    densidades = [10**12 + i for i in range(1000)]
+    motor = motor_estadisticas(tabla)
+    assert motor.resumen('densidad')["varianza"] == pytest.approx(statistics.pvariance(densidades))
+    tabla.append({"nombre": "Otro", "poblacion": 10**12 + 500, "superficie": 1, "continente": "Asia"})
+    tabla[3]['poblacion'] = 10**12 + 999
+    densidades += [10**12 + 500]
+    densidades[3] = 10**12 + 999
+    assert motor_estadisticas(tabla).resumen('densidad')["varianza"] == pytest.approx(statistics.pvariance(densidades))
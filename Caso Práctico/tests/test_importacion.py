@@ -0,0 +1,38 @@
+"""Importación masiva: una fila que no entra en la tabla se rechaza sin dejar el lote a medias."""
+
+import io
+
+import importacion
+import tabla_paises
+from importacion import LOTE_GRANDE, importar
+
+
+def origen_csv(filas):
+    return io.StringIO("nombre,poblacion,superficie,continente\n" + "".join(",".join(fila) + "\n" for fila in filas))
+
+
+def test_fila_fuera_de_rango_en_un_lote_grande(tabla, paises):
+    filas = [[f"Pais {i}", str(i + 1), str(i + 2), "Oceania"] for i in range(LOTE_GRANDE + 500)]
+    filas[700][1] = "99999999999999999999" # no entra en la columna de 64 bits
+    filas.append(["Uruguay", "3500000", "99999999999999999999", "America"])
+    filas.append(["Japon", "125000000", "377975", "Asia"])
+
+    cambios, informe = importar(tabla, origen_csv(filas), 'sobrescribir', 'csv')
+    assert informe["motivos"] == {"población no válida": 1, "superficie no válida": 1}
+    assert (informe["agregados"], informe["actualizados"]) == (LOTE_GRANDE + 499, 1)
+    assert len(cambios) == LOTE_GRANDE + 500
+
+    assert len(tabla) == len(paises) + LOTE_GRANDE + 499
+    assert tabla.indice_de("Pais 700") is None and tabla[tabla.indice_de("Pais 701")]['poblacion'] == 702
+    assert tabla[5]['superficie'] == 176215 and tabla[1]['poblacion'] == 125000000
+
+
+def test_demasiados_continentes(tabla, monkeypatch):
+    for modulo in (importacion, tabla_paises):
+        monkeypatch.setattr(modulo, "MAXIMO_CODIGOS", len(tabla.continentes) + 1)
+    filas = [["Fiyi", "1", "1", "Oceania"], ["Base", "1", "1", "Antartida"], ["Samoa", "1", "1", "Oceania"]]
+
+    cambios, informe = importar(tabla, origen_csv(filas), formato='csv')
+    assert informe["motivos"] == {"demasiados continentes": 1}
+    assert [cambio["pais"]["nombre"] for cambio in cambios] == ["Fiyi", "Samoa"]
+    assert tabla.continentes[-1] == "Oceania" and tabla.indice_de("Base") is None
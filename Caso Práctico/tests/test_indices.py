@@ -0,0 +1,168 @@
+"""Los índices de la tabla siguen de acuerdo con las filas después de agregar y modificar."""
+
+import pytest
+
+import consultas
+from indices import CAMPOS_ORDENABLES, columna_ordenada, grupos_continente
+from normalizacion import normalizar
+from tabla_paises import TablaPaises
+
+
+def indice_referencia(tabla):
+    """Nombre normalizado -> fila, recorriendo la tabla."""
+    return {normalizar(pais["nombre"]): i for i, pais in enumerate(tabla)}
+
+
+def verificar_nombres(tabla):
+    for clave, fila in indice_referencia(tabla).items():
+        assert tabla.indice_de(clave) == fila
+
+
+# Índice de nombres
+
+def test_busqueda_sin_mayusculas_ni_acentos(tabla):
+    tabla.append({"nombre": "Perú", "poblacion": 33000000, "superficie": 1285216, "continente": "America"})
+    assert tabla.indice_de("Perú") == tabla.indice_de(" PERU ") == tabla.indice_de("peru") == 8
+    assert tabla.indice_de("Japón") == 1
+    assert tabla.indice_de("Chile") is None
+    assert "uruguay" in tabla and "Chile" not in tabla
+
+
+def test_indice_al_agregar_muchos(muchos_paises):
+    tabla = TablaPaises(muchos_paises[:10])
+    verificar_nombres(tabla) # crea el índice con pocas filas: tiene que crecer al agregar
+    for pais in muchos_paises[10:300]:
+        tabla.append(pais)
+    tabla.extend(muchos_paises[300:])
+    verificar_nombres(tabla)
+    assert len(indice_referencia(tabla)) == 500
+
+
+def test_indice_al_modificar_eliminar_y_reordenar(muchos_paises):
+    tabla = TablaPaises(muchos_paises)
+    verificar_nombres(tabla)
+    tabla[3]['poblacion'] = 1
+    tabla[4]['continente'] = "Antartida"
+    verificar_nombres(tabla)
+
+    eliminado = tabla.eliminar(0)
+    assert tabla.indice_de(eliminado["nombre"]) is None
+    verificar_nombres(tabla)
+
+    tabla.reordenar(list(reversed(range(len(tabla)))))
+    verificar_nombres(tabla)
+
+
+def test_indice_al_anexar_otra_tabla(muchos_paises):
+    tabla = TablaPaises(muchos_paises[:250])
+    verificar_nombres(tabla)
+    tabla.anexar_tabla(TablaPaises(muchos_paises[250:]))
+    verificar_nombres(tabla)
+    assert len(tabla) == 500
+
+
+def test_el_nombre_no_se_modifica(tabla):
+    with pytest.raises(ValueError):
+        tabla[0]['nombre'] = "Otro"
+    assert tabla.indice_de("Argentina") == 0
+
+
+# Columnas ordenadas y rankings
+
+def verificar_columna(tabla, campo):
+    """La columna ordenada coincide con ordenar las filas por (valor, fila)."""
+    ordenada = columna_ordenada(tabla, campo)
+    valor = tabla.funcion_valor(campo)
+    ascendente = sorted(range(len(tabla)), key=lambda fila: (valor(fila), fila))
+    descendente = sorted(range(len(tabla)), key=valor, reverse=True) # estable: empates en orden de la tabla
+    assert list(ordenada.permutacion) == ascendente
+    if ordenada.valores is not None:
+        assert list(ordenada.valores) == [valor(fila) for fila in ascendente]
+    assert list(ordenada.ordenados()) == ascendente
+    assert list(ordenada.ordenados(True)) == list(ordenada.recorrer(True)) == descendente
+
+    if campo != 'nombre':
+        valores = sorted(set(map(valor, range(len(tabla)))))
+        minimo, maximo = valores[len(valores) // 4], valores[len(valores) // 2]
+        assert sorted(ordenada.indices_en_rango(minimo, maximo)) == \
+            [fila for fila in range(len(tabla)) if minimo <= valor(fila) <= maximo]
+
+
+@pytest.mark.parametrize("campo", CAMPOS_ORDENABLES)
+def test_columna_ordenada(muchos_paises, campo):
+    verificar_columna(TablaPaises(muchos_paises), campo)
+
+
+@pytest.mark.parametrize("campo", CAMPOS_ORDENABLES)
+def test_columna_ordenada_al_modificar_y_agregar(muchos_paises, campo):
+    tabla = TablaPaises(muchos_paises[:400])
+    columna_ordenada(tabla, campo) # se construye antes de los cambios y se mantiene
+    for i in range(0, 400, 3):
+        tabla[i]['poblacion'] = tabla[(i * 7) % 400]['poblacion']  # valores repetidos: muchos empates
+        tabla[i]['superficie'] += 100 * (i % 4)
+    for pais in muchos_paises[400:450]:
+        tabla.append(pais)
+    tabla.extend(muchos_paises[450:])
+    tabla[420]['poblacion'] = 0
+    tabla[499]['superficie'] = 1
+    verificar_columna(tabla, campo)
+
+
+def referencia_ranking(paises, campo, cantidad, mayores, continente):
+    """Ordenamiento estable completo y los primeros 'cantidad'."""
+    candidatos = [pais for pais in paises if continente is None or pais["continente"] == continente]
+    clave = (lambda pais: pais["poblacion"] / pais["superficie"]) if campo == 'densidad' else \
+        (lambda pais: pais[campo])
+    return [pais["nombre"] for pais in sorted(candidatos, key=clave, reverse=mayores)[:cantidad]]
+
+
+@pytest.mark.parametrize("campo, mayores, continente", [
+    ('poblacion', True, None), ('poblacion', False, None), ('superficie', False, "Asia"),
+    ('densidad', True, "Oceania"), ('superficie', True, "Antartida"), ('poblacion', True, "Atlantida")])
+def test_ranking(muchos_paises, campo, mayores, continente):
+    muchos_paises[10]["continente"] = muchos_paises[20]["continente"] = "Antartida" # continente muy chico
+    tabla = TablaPaises(muchos_paises)
+    esperado = referencia_ranking(muchos_paises, campo, 10, mayores, continente)
+    assert [pais["nombre"] for pais in consultas.ranking(tabla, campo, 10, mayores, continente)] == esperado
+    assert [pais["nombre"] for pais in consultas.ranking(muchos_paises, campo, 10, mayores, continente)] == esperado
+
+    tabla[5]['poblacion'] = muchos_paises[5]['poblacion'] = 10**9 # el ranking usa el índice mantenido
+    esperado = referencia_ranking(muchos_paises, campo, 10, mayores, continente)
+    assert [pais["nombre"] for pais in consultas.ranking(tabla, campo, 10, mayores, continente)] == esperado
+
+
+# Grupos por continente
+
+def verificar_grupos(tabla):
+    grupos = grupos_continente(tabla)
+    esperado = {}
+    for fila, pais in enumerate(tabla):
+        esperado.setdefault(pais["continente"], []).append(fila)
+    for continente, filas in esperado.items():
+        assert list(grupos.filas_de(continente)) == filas
+        assert grupos.cantidad(continente) == len(filas)
+    assert grupos.conteo() == {continente: len(filas) for continente, filas in esperado.items()} \
+        == consultas.conteo_por_continente(tabla)
+    assert grupos.continentes() == sorted(esperado)
+
+
+def test_grupos_continente(muchos_paises):
+    tabla = TablaPaises(muchos_paises)
+    verificar_grupos(tabla)
+    assert grupos_continente(tabla).cantidad("Atlantida") == 0
+
+
+def test_grupos_al_cambiar_continente_y_agregar(muchos_paises):
+    tabla = TablaPaises(muchos_paises[:450])
+    verificar_grupos(tabla)
+    for i in range(0, 450, 11):
+        tabla[i]['continente'] = "Antartida" if i % 2 else "Asia"
+    tabla.extend(muchos_paises[450:])
+    tabla.append({"nombre": "Base Marambio", "poblacion": 60, "superficie": 1, "continente": "Antartida"})
+    verificar_grupos(tabla)
+
+    for fila in list(grupos_continente(tabla).filas_de("Oceania")): # un continente que se queda sin países
+        tabla[fila]['continente'] = "Europa"
+    verificar_grupos(tabla)
+    assert "Oceania" not in grupos_continente(tabla).conteo()
+    assert list(consultas.filtrar(tabla, continente="Oceania")) == []
@@ -0,0 +1,91 @@
+"""La instantánea binaria se usa solo mientras el CSV del que salió no cambie."""
+
+import os
+
+import pytest
+
+import Gestion_Info_Paises as gestion
+import instantanea
+
+
+@pytest.fixture
+def archivo(tmp_path, paises):
+    ruta = str(tmp_path / "paises.csv")
+    gestion.escribir_datos_csv(ruta, paises)
+    return ruta
+
+
+def cargar_csv(ruta):
+    return gestion.cargar_datos_csv(ruta, usar_instantanea=False)
+
+
+def tocar(ruta, segundos=10):
+    estado = os.stat(ruta)
+    os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + segundos * 10**9))
+
+
+def test_ida_y_vuelta(archivo):
+    tabla = cargar_csv(archivo)
+    assert instantanea.guardar(archivo, tabla, {"faltan columnas": 2})
+    cargada, motivos = instantanea.cargar(archivo)
+    assert list(cargada.tuplas()) == list(tabla.tuplas())
+    assert cargada.continentes == tabla.continentes
+    assert motivos == {"faltan columnas": 2}
+
+
+def test_sin_instantanea(archivo):
+    assert instantanea.cargar(archivo) is None
+
+
+def test_csv_con_otro_tamano(archivo):
+    instantanea.guardar(archivo, cargar_csv(archivo))
+    with open(archivo, 'a', encoding='utf-8') as csv:
+        csv.write("Chile,19116201,756102,America\n")
+    assert instantanea.cargar(archivo) is None
+
+
+def test_csv_con_el_mismo_tamano_y_otro_contenido(archivo):
+    instantanea.guardar(archivo, cargar_csv(archivo))
+    with open(archivo, 'r+', encoding='utf-8') as csv:
+        contenido = csv.read()
+        csv.seek(0)
+        csv.write(contenido.replace("Uruguay,3473727", "Uruguay,3473728"))
+    tocar(archivo)
+    assert instantanea.cargar(archivo) is None
+
+
+def test_csv_tocado_sin_cambios_actualiza_el_encabezado(archivo, monkeypatch):
+    instantanea.guardar(archivo, cargar_csv(archivo))
+    tocar(archivo)
+    assert instantanea.cargar(archivo) is not None # mismo hash: sigue siendo válida
+
+    def sin_hash(nombre_archivo):
+        raise AssertionError("el encabezado debía tener el mtime nuevo")
+    monkeypatch.setattr(instantanea, "hash_archivo", sin_hash)
+    assert instantanea.cargar(archivo) is not None
+
+
+def test_instantanea_incompleta(archivo):
+    instantanea.guardar(archivo, cargar_csv(archivo))
+    ruta = instantanea.ruta_instantanea(archivo)
+    os.truncate(ruta, os.path.getsize(ruta) - 1)
+    assert instantanea.cargar(archivo) is None
+
+
+def test_cambio_durante_la_carga_no_guarda(archivo):
+    tabla = cargar_csv(archivo)
+    estado = os.stat(archivo)
+    tocar(archivo)
+    assert not instantanea.guardar(archivo, tabla, estado=estado)
+    assert not os.path.exists(instantanea.ruta_instantanea(archivo))
+
+
+def test_guardar_el_csv_regenera_la_instantanea(archivo):
+    gestion.cargar_datos_csv(archivo) # crea la instantánea
+    tabla = gestion.cargar_datos_csv(archivo)
+    tabla.append({"nombre": "Chile", "poblacion": 19116201, "superficie": 756102, "continente": "America"})
+    tabla[0]['poblacion'] += 1
+    gestion.guardar_datos_csv(archivo, tabla)
+
+    cargada, _ = instantanea.cargar(archivo)
+    assert list(cargada.tuplas()) == list(cargar_csv(archivo).tuplas()) == list(tabla.tuplas())
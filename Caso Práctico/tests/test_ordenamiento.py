@@ -0,0 +1,79 @@
+"""El motor de ordenamiento da el mismo orden (estable) que ordenar la lista de diccionarios."""
+
+from functools import cmp_to_key
+
+import pytest
+
+from ordenamiento import normalizar_claves, ordenar_registros
+from tabla_paises import TablaPaises, VistaPaises, valor_registro
+
+
+CLAVES = ['nombre', '-nombre', 'poblacion', '-poblacion', 'superficie', '-superficie', 'densidad', '-densidad',
+          'continente', '-continente', 'continente,-poblacion', '-continente,nombre', 'superficie,-densidad,nombre',
+          [('continente', 'a'), ('poblacion', 'd')]]
+
+
+def referencia(paises, claves):
+    """Ordenamiento de referencia: compara campo por campo; sorted es estable para los empates."""
+    pasos = [(valor_registro(campo), descendente) for campo, descendente in normalizar_claves(claves)]
+
+    def comparar(a, b):
+        for valor, descendente in pasos:
+            if valor(a) != valor(b):
+                resultado = -1 if valor(a) < valor(b) else 1
+                return -resultado if descendente else resultado
+        return 0
+    return [pais["nombre"] for pais in sorted(paises, key=cmp_to_key(comparar))]
+
+
+def nombres(paises):
+    return [pais["nombre"] for pais in paises]
+
+
+@pytest.mark.parametrize("claves", CLAVES)
+def test_lista_de_diccionarios(muchos_paises, claves):
+    original = nombres(muchos_paises)
+    assert nombres(ordenar_registros(muchos_paises, claves)) == referencia(muchos_paises, claves)
+    assert nombres(muchos_paises) == original # sin en_lugar no se modifica la lista
+
+
+@pytest.mark.parametrize("claves", CLAVES)
+def test_tabla(muchos_paises, claves):
+    tabla = TablaPaises(muchos_paises)
+    vista = ordenar_registros(tabla, claves)
+    assert isinstance(vista, VistaPaises)
+    assert nombres(vista) == referencia(muchos_paises, claves)
+
+
+@pytest.mark.parametrize("claves", ['poblacion', '-superficie', 'continente,-poblacion'])
+def test_vista_y_en_lugar(muchos_paises, claves):
+    tabla = TablaPaises(muchos_paises)
+    asiaticos = [pais for pais in muchos_paises if pais["continente"] == "Asia"]
+    vista = VistaPaises(tabla, [i for i, pais in enumerate(muchos_paises) if pais["continente"] == "Asia"])
+    assert nombres(ordenar_registros(vista, claves)) == referencia(asiaticos, claves)
+
+    assert ordenar_registros(tabla, claves, en_lugar=True) is tabla
+    assert nombres(tabla) == referencia(muchos_paises, claves)
+    assert tabla.indice_de(tabla[0]["nombre"]) == 0 # el índice de nombres sigue al nuevo orden
+    assert ordenar_registros(muchos_paises, claves, en_lugar=True) is muchos_paises
+    assert nombres(muchos_paises) == nombres(tabla)
+
+
+def test_orden_despues_de_modificar(muchos_paises):
+    tabla = TablaPaises(muchos_paises)
+    ordenar_registros(tabla, 'poblacion') # crea el índice ordenado de la columna
+    for i in range(0, 500, 7):
+        tabla[i]['poblacion'] = 1000 * (i % 13)
+        muchos_paises[i]['poblacion'] = 1000 * (i % 13)
+    nuevo = {"nombre": "Zpais nuevo", "poblacion": 5, "superficie": 1, "continente": "Asia"}
+    tabla.append(nuevo)
+    muchos_paises.append(dict(nuevo))
+    for claves in ('poblacion', '-poblacion', '-densidad'):
+        assert nombres(ordenar_registros(tabla, claves)) == referencia(muchos_paises, claves)
+
+
+def test_clave_desconocida(tabla):
+    with pytest.raises(ValueError):
+        ordenar_registros(tabla, 'capital')
+    with pytest.raises(ValueError):
+        ordenar_registros(tabla, ' , ')
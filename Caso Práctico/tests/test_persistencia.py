@@ -0,0 +1,126 @@
+"""Registro de cambios y guardado: los cambios sobreviven a un corte en cualquier momento."""
+
+import os
+
+import pytest
+
+import Gestion_Info_Paises as gestion
+import persistencia
+
+
+@pytest.fixture
+def archivo(tmp_path, paises):
+    ruta = str(tmp_path / "paises.csv")
+    gestion.escribir_datos_csv(ruta, paises)
+    return ruta
+
+
+def cargar(ruta, usar_instantanea=False):
+    return gestion.cargar_datos_csv(ruta, usar_instantanea=usar_instantanea)
+
+
+def contenido(tabla):
+    return sorted(tabla.tuplas())
+
+
+def hacer_cambios(tabla, ruta):
+    gestion.agregar_registro(tabla, ruta, "Chile", 19116201, 756102, "America")
+    gestion.actualizar_registro(tabla, ruta, "Uruguay", poblacion=3500000)
+    gestion.actualizar_registro(tabla, ruta, "Japon", superficie=377976)
+
+
+@pytest.mark.parametrize("usar_instantanea", [False, True])
+def test_registro_se_aplica_al_cargar(archivo, usar_instantanea):
+    tabla = cargar(archivo, usar_instantanea)
+    hacer_cambios(tabla, archivo)
+    assert os.path.getsize(persistencia.ruta_registro(archivo)) > 0
+    # el programa termina sin guardar: el CSV no cambió, los cambios están en el registro
+    cargada = cargar(archivo, usar_instantanea)
+    assert contenido(cargada) == contenido(tabla)
+    assert cargada.modificada # los cambios del registro cuentan como no guardados
+    assert cargar(archivo, usar_instantanea).version == cargada.version # cargar otra vez no los duplica
+
+
+def test_guardar_compacta_el_registro(archivo):
+    tabla = cargar(archivo)
+    hacer_cambios(tabla, archivo)
+    assert gestion.guardar_datos_csv(archivo, tabla)
+    assert not os.path.exists(persistencia.ruta_registro(archivo))
+    assert contenido(cargar(archivo)) == contenido(tabla)
+    assert not gestion.guardar_datos_csv(archivo, tabla) # sin cambios no escribe nada
+
+
+def test_solo_altas_se_agregan_al_final(archivo):
+    tabla = cargar(archivo)
+    with open(archivo, 'rb') as csv:
+        anterior = csv.read()
+    gestion.agregar_registro(tabla, archivo, "Chile", 19116201, 756102, "America")
+    gestion.agregar_registro(tabla, archivo, "Peru", 33715471, 1285216, "America")
+    assert gestion.guardar_datos_csv(archivo, tabla)
+    with open(archivo, 'rb') as csv:
+        assert csv.read().startswith(anterior) # no se reescribió
+    assert contenido(cargar(archivo)) == contenido(tabla)
+
+
+def test_ultima_linea_incompleta_del_registro(archivo):
+    tabla = cargar(archivo)
+    hacer_cambios(tabla, archivo)
+    with open(persistencia.ruta_registro(archivo), 'a', encoding='utf-8') as registro:
+        registro.write('{"op": "modificacion", "nombre": "Brasil", "campos": {"pobla') # corte a mitad de línea
+    cargada = cargar(archivo)
+    assert contenido(cargada) == contenido(tabla)
+
+    gestion.agregar_registro(cargada, archivo, "Peru", 33715471, 1285216, "America") # el registro sigue usable
+    assert cargar(archivo).indice_de("Peru") is not None
+
+
+def test_corte_al_agregar_filas_al_csv(archivo):
+    tabla = cargar(archivo)
+    gestion.agregar_registro(tabla, archivo, "Chile", 19116201, 756102, "America")
+    # corte durante anexar_filas_csv: la fila quedó a medias y el registro todavía no se descartó
+    with open(archivo, 'a', encoding='utf-8', newline='') as csv:
+        csv.write("Chile,191")
+    cargada = cargar(archivo)
+    assert cargada[cargada.indice_de("Chile")]['poblacion'] == 19116201 # el alta del registro la corrige
+    assert contenido(cargada) == contenido(tabla)
+
+    assert gestion.guardar_datos_csv(archivo, cargada) # sin salto de línea final: se reescribe completo
+    assert contenido(cargar(archivo)) == contenido(tabla)
+
+
+def test_corte_al_reescribir_el_csv(archivo):
+    tabla = cargar(archivo)
+    hacer_cambios(tabla, archivo)
+    with open(archivo, 'rb') as csv:
+        anterior = csv.read()
+
+    def escritura_cortada(nombre):
+        def escribir(salida):
+            salida.write("nombre,poblacion,superficie,continente\nArgen")
+            raise KeyboardInterrupt # corte a mitad de la escritura
+        persistencia.escribir_atomico(nombre, escribir)
+    with pytest.raises(KeyboardInterrupt):
+        persistencia.compactar(archivo, escritura_cortada)
+
+    with open(archivo, 'rb') as csv:
+        assert csv.read() == anterior # el CSV anterior sigue completo
+    assert not os.path.exists(archivo + ".tmp")
+    assert contenido(cargar(archivo)) == contenido(tabla) # y el registro conserva los cambios
+
+
+def test_compactar_conserva_los_cambios_posteriores(archivo):
+    tabla = cargar(archivo)
+    gestion.agregar_registro(tabla, archivo, "Chile", 19116201, 756102, "America")
+    copia = tabla.copia()
+    hasta = persistencia.tamano_registro(archivo)
+    gestion.actualizar_registro(tabla, archivo, "Uruguay", poblacion=3500000) # llega durante la compactación
+
+    gestion.escribir_datos_csv(archivo, copia, hasta)
+    assert persistencia.tamano_registro(archivo) > 0
+    assert contenido(cargar(archivo)) == contenido(tabla)
+
+
+def test_modificacion_de_un_pais_inexistente_se_ignora(archivo):
+    persistencia.anexar_cambio(archivo, persistencia.cambio_modificacion("Atlantida", {"poblacion": 1}))
+    assert contenido(cargar(archivo)) == contenido(cargar(archivo))
+    assert cargar(archivo).indice_de("Atlantida") is None
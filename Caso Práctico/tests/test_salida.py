@@ -0,0 +1,35 @@
+"""Listados por lotes: los formatos para máquinas conservan una fila por país."""
+
+import csv
+import io
+import json
+
+import pytest
+
+from salida import escribir_paises
+from tabla_paises import TablaPaises
+
+
+RAROS = [{"nombre": "Tab\tulado", "poblacion": 1, "superficie": 2, "continente": "Asia"},
+         {"nombre": "Salto\nde linea", "poblacion": 3, "superficie": 4, "continente": "Europa\r"},
+         {"nombre": "Barra\\t", "poblacion": 5, "superficie": 6, "continente": "America"}]
+
+
+def escrito(paises, formato):
+    destino = io.StringIO()
+    escribir_paises(paises, formato, destino)
+    return destino.getvalue()
+
+
+@pytest.mark.parametrize("como_tabla", [False, True])
+def test_tsv_escapa_tabulaciones_y_saltos(como_tabla):
+    paises = TablaPaises(RAROS) if como_tabla else RAROS
+    lineas = escrito(paises, 'tsv').split("\n")
+    assert lineas[0] == "nombre\tpoblacion\tsuperficie\tcontinente" and lineas[-1] == ""
+    assert lineas[1:-1] == ["Tab\\tulado\t1\t2\tAsia", "Salto\\nde linea\t3\t4\tEuropa\\r", "Barra\\\\t\t5\t6\tAmerica"]
+
+
+def test_csv_y_jsonl_leen_los_mismos_textos():
+    filas = list(csv.reader(io.StringIO(escrito(RAROS, 'csv'), newline='')))
+    assert [fila[0] for fila in filas[1:]] == [pais["nombre"] for pais in RAROS]
+    assert [json.loads(linea) for linea in escrito(RAROS, 'jsonl').splitlines()] == RAROS
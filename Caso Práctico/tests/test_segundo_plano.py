@@ -0,0 +1,116 @@
+"""Errores del guardado en segundo plano: se informan sin cortar el menú ni perder los cambios."""
+
+import builtins
+import threading
+
+import pytest
+
+import Gestion_Info_Paises as gestion
+import persistencia
+from segundo_plano import EscritorSegundoPlano
+
+
+def escritura_fallida(nombre_archivo, copia, registro_hasta):
+    raise OSError(28, "No space left on device")
+
+
+@pytest.fixture
+def archivo(tmp_path, paises):
+    ruta = str(tmp_path / "paises.csv")
+    gestion.escribir_datos_csv(ruta, paises)
+    return ruta
+
+
+@pytest.fixture
+def escritor_fallido(monkeypatch):
+    escritor = EscritorSegundoPlano(escritura_fallida)
+    monkeypatch.setattr(gestion, "escritor_csv", escritor)
+    return escritor
+
+
+def responder(monkeypatch, respuestas):
+    respuestas = iter(respuestas)
+    monkeypatch.setattr(builtins, "input", lambda mensaje="": next(respuestas))
+
+
+def test_pedidos_seguidos_se_combinan(tabla):
+    empezo, seguir = threading.Event(), threading.Event()
+    escritas = []
+
+    def escribir(nombre_archivo, copia, registro_hasta):
+        empezo.set()
+        seguir.wait()
+        escritas.append(list(copia.poblacion))
+
+    escritor = EscritorSegundoPlano(escribir)
+    escritor.programar("paises.csv", tabla)
+    assert empezo.wait(5) # la primera escritura está en curso
+    for poblacion in (1, 2, 3):
+        tabla[0]['poblacion'] = poblacion
+        escritor.programar("paises.csv", tabla)
+    tabla[0]['poblacion'] = 4 # después del último pedido: no se escribe
+    assert escritor.pendiente()
+    seguir.set()
+    escritor.esperar()
+
+    assert not escritor.pendiente()
+    assert (escritor.pedidos, escritor.escrituras) == (4, 2)
+    assert [escrita[0] for escrita in escritas] == [45376763, 3]
+
+
+def test_error_del_hilo_se_lanza_al_esperar(tabla, escritor_fallido):
+    tabla.seguir_cambios()
+    tabla[0]['poblacion'] += 1
+    escritor_fallido.programar("paises.csv", tabla)
+    with pytest.raises(OSError):
+        escritor_fallido.esperar()
+    assert tabla.modificada
+    escritor_fallido.esperar() # el error se informa una sola vez
+
+
+def test_opcion_del_menu_informa_el_error_pendiente(archivo, escritor_fallido, monkeypatch, capsys):
+    tabla = gestion.cargar_datos_csv(archivo, usar_instantanea=False)
+    monkeypatch.setattr(persistencia, "UMBRAL_COMPACTACION", 0) # el alta pide compactar
+    escritor_fallido._error = OSError(28, "No space left on device") # falló una compactación anterior
+
+    responder(monkeypatch, ["1", "Chile", "19116201", "756102", "America", "9"])
+    gestion.menu_principal(tabla, archivo)
+    salida = capsys.readouterr().out
+    assert f"Error al guardar '{archivo}'" in salida
+    assert "Gracias por usar" in salida
+    # el alta llegó al registro y al salir se agregó al final del CSV
+    assert gestion.cargar_datos_csv(archivo, usar_instantanea=False).indice_de("Chile") is not None
+
+
+def test_salir_con_error_pregunta_antes_de_perder_cambios(archivo, escritor_fallido, monkeypatch, capsys):
+    tabla = gestion.cargar_datos_csv(archivo, usar_instantanea=False)
+    tabla[0]['poblacion'] += 1 # una modificación: al salir se reescribe el archivo (y falla)
+
+    responder(monkeypatch, ["9", "n", "7", "9", "s"])
+    gestion.menu_principal(tabla, archivo)
+    salida = capsys.readouterr().out
+    assert salida.count(f"Error al guardar '{archivo}'") == 2
+    assert "LISTA COMPLETA DE PAISES" in salida # con 'n' el menú siguió
+    assert salida.count("Gracias por usar") == 1
+    assert tabla.modificada
+
+
+def test_linea_de_comandos_retorna_error(archivo, monkeypatch, capsys):
+    monkeypatch.setattr(gestion, "escritor_csv", EscritorSegundoPlano(escritura_fallida))
+    monkeypatch.setattr(persistencia, "UMBRAL_COMPACTACION", 0) # el primer cambio ya compacta
+    assert gestion.main(["--archivo", archivo, "update", "Uruguay", "--poblacion", "3500000"]) == 1
+    assert "no se pudo guardar" in capsys.readouterr().err
+    # el cambio quedó en el registro y se aplica al volver a cargar
+    assert gestion.cargar_datos_csv(archivo, usar_instantanea=False)[5]['poblacion'] == 3500000
+
+
+def test_registro_vuelve_a_su_tamano_si_falla_la_escritura(archivo, monkeypatch):
+    persistencia.anexar_cambio(archivo, {"op": "alta", "nombre": "Chile"})
+    tamano = persistencia.tamano_registro(archivo)
+
+    def fsync_fallido(descriptor):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(persistencia.os, "fsync", fsync_fallido)
+    with pytest.raises(OSError):
+        persistencia.anexar_cambio(archivo, {"op": "alta", "nombre": "Peru"})
+    assert persistencia.tamano_registro(archivo) == tamano
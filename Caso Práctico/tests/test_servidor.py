@@ -0,0 +1,176 @@
+"""Servidor de varios usuarios: versionado optimista de las escrituras y sincronización."""
+
+import asyncio
+import json
+import socket
+
+import pytest
+
+import Gestion_Info_Paises as gestion
+import servidor
+from segundo_plano import EscritorSegundoPlano
+
+
+@pytest.fixture
+def archivo(tmp_path, paises):
+    ruta = str(tmp_path / "paises.csv")
+    gestion.escribir_datos_csv(ruta, paises)
+    return ruta
+
+
+@pytest.fixture
+def servidor_paises(archivo):
+    tabla = gestion.cargar_datos_csv(archivo, usar_instantanea=False)
+    return servidor.ServidorPaises(tabla, archivo, EscritorSegundoPlano(gestion.escribir_datos_csv))
+
+
+def pedir(servidor_paises, op, **datos):
+    return asyncio.run(servidor_paises.procesar(json.dumps({"op": op, **datos})))
+
+
+def test_update_con_la_version_leida(servidor_paises):
+    leido = pedir(servidor_paises, "get", nombre="uruguay")["resultado"]
+    respuesta = pedir(servidor_paises, "update", nombre="Uruguay", version=leido["version"],
+                      campos={"poblacion": 3500000})
+    assert respuesta["ok"] and respuesta["resultado"]["pais"]["poblacion"] == 3500000
+    assert respuesta["resultado"]["version"] > leido["version"]
+
+
+def test_update_con_version_vieja_es_un_conflicto(servidor_paises):
+    leido = pedir(servidor_paises, "get", nombre="Uruguay")["resultado"]
+    assert pedir(servidor_paises, "update", nombre="Uruguay", version=leido["version"],
+                 campos={"poblacion": 3500000})["ok"]
+
+    respuesta = pedir(servidor_paises, "update", nombre="Uruguay", version=leido["version"],
+                      campos={"superficie": 1})
+    assert not respuesta["ok"] and respuesta["tipo"] == "conflicto"
+    actual = pedir(servidor_paises, "get", nombre="Uruguay")["resultado"]
+    assert respuesta["version"] == actual["version"]
+    assert actual["pais"]["superficie"] == 176215 # el update en conflicto no se aplicó
+    assert servidor_paises.conflictos == 1
+
+    # con la versión que informó el conflicto, el reintento se aplica
+    assert pedir(servidor_paises, "update", nombre="Uruguay", version=respuesta["version"],
+                 campos={"superficie": 1})["ok"]
+
+
+def test_versiones_por_pais(servidor_paises):
+    version_japon = pedir(servidor_paises, "get", nombre="Japon")["resultado"]["version"]
+    assert pedir(servidor_paises, "update", nombre="Uruguay", campos={"poblacion": 3500000})["ok"] # sin versión
+    assert pedir(servidor_paises, "add", nombre="Chile", poblacion=19116201, superficie=756102,
+                 continente="America")["ok"]
+    # los cambios de otros países no cuentan como conflicto
+    assert pedir(servidor_paises, "update", nombre="Japon", version=version_japon,
+                 campos={"poblacion": 125000000})["ok"]
+
+
+def test_updates_simultaneos_con_la_misma_version(servidor_paises):
+    async def competir():
+        leido = await servidor_paises.procesar(json.dumps({"op": "get", "nombre": "Brasil"}))
+        version = leido["resultado"]["version"]
+        pedidos = [json.dumps({"op": "update", "nombre": "Brasil", "version": version,
+                               "campos": {"poblacion": 214000000 + i}}) for i in range(5)]
+        return await asyncio.gather(*(servidor_paises.procesar(pedido) for pedido in pedidos))
+
+    respuestas = asyncio.run(competir())
+    assert [respuesta["ok"] for respuesta in respuestas].count(True) == 1
+    assert {respuesta["tipo"] for respuesta in respuestas if not respuesta["ok"]} == {"conflicto"}
+    ganador = next(respuesta for respuesta in respuestas if respuesta["ok"])
+    assert pedir(servidor_paises, "get", nombre="Brasil")["resultado"]["pais"] == ganador["resultado"]["pais"]
+
+
+def test_escrituras_quedan_en_el_registro(servidor_paises, archivo):
+    pedir(servidor_paises, "add", nombre="Chile", poblacion=19116201, superficie=756102, continente="America")
+    pedir(servidor_paises, "update", nombre="Uruguay", campos={"poblacion": 3500000})
+    cargada = gestion.cargar_datos_csv(archivo, usar_instantanea=False) # sin cerrar el servidor: corte
+    assert sorted(cargada.tuplas()) == sorted(servidor_paises.tabla.tuplas())
+
+
+def test_changes_desde_una_version(servidor_paises):
+    inicial = pedir(servidor_paises, "version")["resultado"]["version"]
+    pedir(servidor_paises, "update", nombre="Uruguay", campos={"poblacion": 3500000})
+    intermedia = pedir(servidor_paises, "version")["resultado"]["version"]
+    pedir(servidor_paises, "add", nombre="Chile", poblacion=19116201, superficie=756102, continente="America")
+    pedir(servidor_paises, "update", nombre="Uruguay", campos={"poblacion": 3600000})
+
+    cambios = pedir(servidor_paises, "changes", desde=inicial)["resultado"]
+    assert [cambio["nombre"] for cambio in cambios["cambios"]] == ["Chile", "Uruguay"] # Uruguay una sola vez
+    assert cambios["cambios"][1]["pais"]["poblacion"] == 3600000
+    assert cambios["hasta"] == pedir(servidor_paises, "version")["resultado"]["version"]
+    assert [cambio["nombre"] for cambio in pedir(servidor_paises, "changes", desde=intermedia)
+            ["resultado"]["cambios"]] == ["Chile", "Uruguay"]
+
+    parcial = pedir(servidor_paises, "changes", desde=inicial, limite=1)["resultado"]
+    assert [cambio["nombre"] for cambio in parcial["cambios"]] == ["Chile"]
+    assert [cambio["nombre"] for cambio in pedir(servidor_paises, "changes", desde=parcial["hasta"])
+            ["resultado"]["cambios"]] == ["Uruguay"]
+    assert pedir(servidor_paises, "changes", desde=10**6)["tipo"] == "invalido"
+
+
+@pytest.mark.parametrize("pedido", [
+    "no es json", "[1, 2]", '{"op": "borrar"}', '{"op": "get"}', '{"op": "get", "nombre": "Atlantida"}',
+    '{"op": "update", "nombre": "Uruguay", "campos": {"nombre": "X"}}',
+    '{"op": "update", "nombre": "Uruguay", "campos": {"poblacion": -1}}',
+    '{"op": "add", "nombre": "Uruguay", "poblacion": 1, "superficie": 1, "continente": "America"}',
+    '{"op": "update", "nombre": "Uruguay", "campos": {"poblacion": 99999999999999999999}}',
+    '{"op": "add", "nombre": "Chile", "poblacion": 99999999999999999999, "superficie": 1, "continente": "America"}',
+    '{"op": "filter", "poblacion": 5}'])
+def test_pedidos_invalidos(servidor_paises, pedido):
+    respuesta = asyncio.run(servidor_paises.procesar(pedido))
+    assert not respuesta["ok"] and respuesta["tipo"] == "invalido"
+    assert servidor_paises.escrituras == 0
+
+
+def test_escritura_fallida_se_deshace(servidor_paises, archivo, monkeypatch):
+    def registro_lleno(nombre_archivo, cambios):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(servidor.persistencia, "anexar_cambios", registro_lleno)
+    antes = sorted(servidor_paises.tabla.tuplas())
+
+    alta = pedir(servidor_paises, "add", nombre="Chile", poblacion=19116201, superficie=756102, continente="America")
+    cambio = pedir(servidor_paises, "update", nombre="Uruguay", campos={"poblacion": 3500000})
+    for respuesta in (alta, cambio):
+        assert not respuesta["ok"] and respuesta["tipo"] == "error" # el pedido recibe respuesta
+    assert sorted(servidor_paises.tabla.tuplas()) == antes
+    assert servidor_paises.escrituras == 0
+
+    monkeypatch.undo() # con el registro andando, el mismo alta se aplica
+    assert pedir(servidor_paises, "add", nombre="Chile", poblacion=19116201, superficie=756102,
+                 continente="America")["ok"]
+    cargada = gestion.cargar_datos_csv(archivo, usar_instantanea=False)
+    assert sorted(cargada.tuplas()) == sorted(servidor_paises.tabla.tuplas())
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="requiere sockets Unix")
+def test_clientes_por_socket(servidor_paises, archivo):
+    direccion = "unix:" + archivo + ".sock"
+
+    async def sesion():
+        servidor_paises.preparar()
+        escuchando = await servidor.iniciar(servidor_paises, direccion)
+        async with escuchando:
+            uno = await servidor.ClientePaises.conectar(direccion)
+            otro = await servidor.ClientePaises.conectar(direccion)
+            version = (await uno.pedir("get", nombre="India"))["resultado"]["version"]
+            primera = await otro.pedir("update", nombre="India", version=version, campos={"poblacion": 1})
+            segunda = await uno.pedir("update", nombre="India", version=version, campos={"poblacion": 2})
+            busqueda = await uno.pedir("search", texto="ind")
+            await uno.cerrar()
+            await otro.cerrar()
+        await servidor_paises.cerrar()
+        return primera, segunda, busqueda
+
+    primera, segunda, busqueda = asyncio.run(sesion())
+    assert primera["ok"] and segunda["tipo"] == "conflicto"
+    assert busqueda["resultado"][0]["poblacion"] == 1
+    cargada = gestion.cargar_datos_csv(archivo, usar_instantanea=False)
+    assert cargada[cargada.indice_de("India")]['poblacion'] == 1 # al cerrar se compactó el CSV
+
+
+def test_direcciones():
+    assert servidor._separar_direccion("unix:/tmp/x.sock") == ('unix', "/tmp/x.sock")
+    assert servidor._separar_direccion("8765") == ('tcp', ("127.0.0.1", 8765))
+    assert servidor._separar_direccion("0.0.0.0:9000") == ('tcp', ("0.0.0.0", 9000))
+    for direccion in ("localhost", "host:puerto", "host:²"):
+        with pytest.raises(ValueError, match="Dirección no válida"):
+            servidor._separar_direccion(direccion)
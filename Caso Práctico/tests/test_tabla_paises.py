@@ -0,0 +1,52 @@
+"""La tabla columnar guarda y devuelve los mismos datos que la lista de diccionarios."""
+
+import pytest
+
+from tabla_paises import TablaPaises, VistaPaises
+
+
+def test_filas_como_diccionarios(tabla, paises):
+    assert len(tabla) == len(paises)
+    assert [dict(pais) for pais in tabla] == paises
+    assert list(tabla.tuplas()) == [tuple(pais.values()) for pais in paises]
+    assert tabla[-1]["nombre"] == "Nigeria" and tabla[2].get("poblacion") == 213993437
+    assert tabla.continentes == ["America", "Asia", "Europa", "Africa"] # cada continente una sola vez
+    with pytest.raises(IndexError):
+        tabla[len(paises)]
+
+
+def test_porciones(tabla, paises):
+    vista = tabla[2:6]
+    assert isinstance(vista, VistaPaises)
+    assert [pais["nombre"] for pais in vista] == [pais["nombre"] for pais in paises[2:6]]
+    assert vista[-1]["nombre"] == "Uruguay"
+
+
+def test_modificar_filas(tabla):
+    tabla[5]['poblacion'] = 3500000
+    tabla[1]['continente'] = "Oceania"
+    tabla.append({"nombre": "Côte d'Ivoire", "poblacion": 26378274, "superficie": 322463, "continente": "Africa"})
+    assert tabla[5]['poblacion'] == 3500000
+    assert tabla[1]['continente'] == "Oceania" and tabla.continentes[-1] == "Oceania"
+    assert tabla[8]['nombre'] == "Côte d'Ivoire" and tabla[7]['nombre'] == "Nigeria"
+    with pytest.raises(KeyError):
+        tabla[0]['capital'] = "Buenos Aires"
+
+
+def test_reordenar(muchos_paises):
+    tabla = TablaPaises(muchos_paises)
+    orden = list(reversed(range(len(tabla))))
+    tabla.reordenar(orden)
+    assert [dict(pais) for pais in tabla] == muchos_paises[::-1]
+
+
+def test_valor_fuera_de_rango_no_deja_la_fila_a_medias(tabla, paises):
+    with pytest.raises(OverflowError):
+        tabla.append({"nombre": "Chile", "poblacion": 10**20, "superficie": 756102, "continente": "Oceania"})
+    with pytest.raises(OverflowError):
+        tabla[5]['superficie'] = 2**63
+    assert [dict(pais) for pais in tabla] == paises
+    assert "Oceania" not in tabla.continentes
+    assert tabla.append({"nombre": "Chile", "poblacion": 19116201, "superficie": 756102,
+                         "continente": "America"}) == len(paises)
+    assert tabla[-1]['nombre'] == "Chile"
@@ -0,0 +1,111 @@
+"""El validador compilado acepta y rechaza las mismas filas que validar_fila, con el mismo motivo."""
+
+import csv
+import random
+
+import pytest
+
+from carga_csv import InformeRechazos, leer_bloques, motivo_rechazo, posiciones_encabezado, validar_fila, validar_filas
+
+
+TEXTOS = ["Chile", " perú ", "", "   ", "costa rica", "ASIA", " europa", "África", "\t"]
+NUMEROS = ["1", "42", "007", "0", "-5", "+5", "1.5", "1e3", " 12", "12 ", "", "abc", "٣٤", "²", "³5",
+           "99999999999", "9223372036854775807", "9223372036854775808", "99999999999999999999"]
+
+
+def filas_al_azar(cantidad, columnas=4, semilla=3):
+    azar = random.Random(semilla)
+    filas = []
+    for _ in range(cantidad):
+        fila = [azar.choice(TEXTOS), azar.choice(NUMEROS), azar.choice(NUMEROS), azar.choice(TEXTOS)]
+        fila += [azar.choice(TEXTOS) for _ in range(columnas - 4)]
+        if azar.random() < 0.05:
+            fila = fila[:azar.randrange(4)] # faltan columnas (o línea en blanco)
+        filas.append(fila)
+    return filas
+
+
+def referencia(filas, posiciones):
+    """Validación fila por fila con validar_fila y motivo_rechazo."""
+    validos, motivos = [], {}
+    for fila in filas:
+        if not fila:
+            continue
+        campos = [fila[i] if i < len(fila) else None for i in posiciones]
+        pais = validar_fila(*campos)
+        if pais is None:
+            motivo = motivo_rechazo(*campos)
+            motivos[motivo] = motivos.get(motivo, 0) + 1
+        else:
+            validos.append(pais)
+    return validos, motivos
+
+
+@pytest.mark.parametrize("posiciones", [(0, 1, 2, 3), (3, 1, 2, 0), (2, 0, 3, 1), (5, 1, 4, 0)])
+def test_misma_decision_que_validar_fila(posiciones):
+    filas = filas_al_azar(3000, columnas=6)
+    informe = InformeRechazos()
+    validos = list(validar_filas(filas, posiciones, informe=informe))
+    esperados, motivos = referencia(filas, posiciones)
+    assert validos == esperados
+    assert informe.motivos == motivos
+    assert sum(informe.campos.values()) >= informe.total # cada rechazo tiene al menos un campo inválido
+
+
+def test_numeros_con_otros_digitos():
+    assert validar_fila("Chile", "²", "5", "America") is None # antes lanzaba ValueError en int()
+    assert validar_fila("Chile", "٣٤", "5", "America")["poblacion"] == 34
+    assert list(validar_filas([["Chile", "٣٤", "5", "America"]], (0, 1, 2, 3)))[0]["poblacion"] == 34
+
+
+def test_numeros_que_no_entran_en_64_bits():
+    assert validar_fila("Chile", "9223372036854775807", "5", "America")["poblacion"] == 2**63 - 1
+    assert validar_fila("Chile", "99999999999999999999", "5", "America") is None
+    assert motivo_rechazo("Chile", "5", "99999999999999999999", "America") == "superficie no válida"
+    informe = InformeRechazos()
+    assert list(validar_filas([["Chile", "99999999999999999999", "5", "America"]], (0, 1, 2, 3),
+                              informe=informe)) == []
+    assert informe.motivos == {"población no válida": 1}
+
+
+def test_campos_y_muestras_del_informe():
+    informe = InformeRechazos(muestras=2)
+    filas = [["", "x", "5", "Asia"], ["Chile", "5", "0", ""], ["Peru", "5", "5", "America"], ["Solo"]]
+    assert [pais["nombre"] for pais in validar_filas(filas, (0, 1, 2, 3), informe=informe)] == ["Peru"]
+    assert informe.motivos == {"nombre vacío": 1, "continente vacío": 1, "faltan columnas": 1}
+    assert informe.campos == {"nombre": 1, "poblacion": 2, "continente": 2, "superficie": 2}
+    assert informe.muestras[0] == {"linea": 1, "campo": "nombre", "motivo": "nombre vacío",
+                                   "errores": "nombre: nombre vacío; poblacion: población no válida",
+                                   "fila": ["", "x", "5", "Asia"]}
+    assert len(informe.muestras) == 2
+
+
+def test_lectura_del_archivo(tmp_path):
+    filas = filas_al_azar(500, semilla=11)
+    ruta = tmp_path / "paises.csv"
+    with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow([" continente", "nombre ", "superficie", "poblacion"])
+        escritor.writerows([[fila[3], fila[0], fila[2], fila[1]] if len(fila) == 4 else fila for fila in filas])
+
+    rechazos = tmp_path / "rechazos.csv"
+    informe = InformeRechazos(archivo_rechazos=str(rechazos))
+    try:
+        validos = [pais for bloque in leer_bloques(str(ruta), 100, informe=informe) for pais in bloque]
+    finally:
+        informe.cerrar()
+    posiciones = posiciones_encabezado([" continente", "nombre ", "superficie", "poblacion"])
+    leidas = [[fila[3], fila[0], fila[2], fila[1]] if len(fila) == 4 else fila for fila in filas]
+    assert (validos, informe.motivos) == referencia(leidas, posiciones)
+
+    with open(rechazos, encoding='utf-8', newline='') as archivo:
+        rechazadas = list(csv.reader(archivo))
+    assert rechazadas[0] == ['linea', 'campo', 'motivo', 'errores', 'continente', 'nombre', 'superficie', 'poblacion']
+    assert len(rechazadas) - 1 == informe.total
+    for registro in rechazadas[1:]: # la línea de cada rechazo apunta a esa fila del CSV
+        assert registro[4:] == leidas[int(registro[0]) - 2]
+
+
+def test_encabezado_incompleto():
+    assert posiciones_encabezado(["nombre", "poblacion", "continente"]) is None
+    assert posiciones_encabezado([" superficie ", "nombre", "poblacion", "continente"]) == (1, 2, 0, 3)